@@ -0,0 +1,38 @@
+""" Масштабирование разбора нескольких выгрузок по числу процессов"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.synthetic import generate_operations, write_operations
+from src.accounts import process_files
+
+
+def bench_accounts(files: int, rows: int, fmt: str = "xlsx") -> list[dict]:
+    """ Время построения сводки по files выгрузкам при 1, 2, 4... процессах"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for number in range(files):
+            df = generate_operations(rows, seed=number, start=datetime(2023 + number % 3, 1, 1))
+            write_operations(df, Path(tmp) / f"account_{number}.{fmt}")
+        results = []
+        workers = 1
+        while workers <= min(files, os.cpu_count() or 1):
+            start = time.perf_counter()
+            process_files(tmp, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            results.append({"workers": workers, "seconds": round(elapsed, 3),
+                            "speedup": round(results[0]["seconds"] / elapsed, 2) if results else 1.0})
+            workers *= 2
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк параллельной обработки выгрузок")
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+    args = parser.parse_args()
+    for result in bench_accounts(args.files, args.rows, args.format):
+        print(result)
@@ -0,0 +1,34 @@
+""" Сравнение холодной загрузки XLSX и загрузки из колоночного кэша"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import generate_operations, write_operations
+from src.store import OperationsStore
+
+
+def bench_cache(rows: int, repeat: int = 3) -> dict:
+    """ Замер времени загрузки операций без кэша и из кэша"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_operations(generate_operations(rows), Path(tmp) / "operations.xlsx")
+
+        start = time.perf_counter()
+        OperationsStore(path).get(rebuild=True)
+        cold = time.perf_counter() - start
+
+        cached = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            OperationsStore(path).get()
+            cached.append(time.perf_counter() - start)
+    return {"rows": rows, "xlsx_cold_s": round(cold, 3), "cache_s": round(min(cached), 3),
+            "speedup": round(cold / min(cached), 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк колоночного кэша операций")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(bench_cache(args.rows, args.repeat))
@@ -0,0 +1,39 @@
+""" Сравнение поиска переводов физлицам: регулярное выражение по всем строкам против отбора по категории"""
+import argparse
+import re
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_operations
+from src.services import find_transfers
+
+
+def _baseline(df: pd.DataFrame) -> pd.DataFrame:
+    name_pattern = re.compile(r'\b[А-Я][а-я]+\s[А-Я]\.')
+    descriptions = df['Описание'].astype(object)
+    return df[(df['Категория'] == 'Переводы') & (descriptions.str.contains(name_pattern, na=False))]
+
+
+def bench_name_filter(rows: int, repeat: int = 3) -> dict:
+    """ Замер времени поиска переводов на синтетических данных"""
+    df = generate_operations(rows)
+    df['Категория'] = df['Категория'].astype('category')
+    results = {}
+    for name, func in (("baseline_s", _baseline), ("engine_s", find_transfers)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            found = func(df)
+            timings.append(time.perf_counter() - start)
+        results[name] = round(min(timings), 3)
+        results[name.replace("_s", "_rows")] = len(found)
+    return {"rows": rows, **results, "speedup": round(results["baseline_s"] / results["engine_s"], 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска переводов физическим лицам")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(bench_name_filter(args.rows, args.repeat))
@@ -0,0 +1,63 @@
+""" Регрессионный бенчмарк времени запуска: импорт точки входа и запуск команды на закэшированных данных"""
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Бюджеты в миллисекундах: импорт CLI не должен тянуть pandas, команда на кэше укладывается в бюджет целиком
+IMPORT_BUDGET_MS = 100.0
+RUN_BUDGET_MS = 3000.0
+
+# Модули, которые не должны загружаться при импорте точки входа
+HEAVY_MODULES = ("pandas", "numpy", "requests", "openpyxl", "dotenv")
+
+
+def import_time(module: str) -> tuple[float, list[str]]:
+    """ Суммарное время импорта модуля по -X importtime (мс) и загруженные при этом тяжелые модули"""
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$", line)
+        if match and match.group(2) == module:
+            total = int(match.group(1))
+    return total / 1000, result.stdout.split()
+
+
+def run_time(command: list[str], repeat: int = 3) -> float:
+    """ Лучшее время запуска команды main.py (мс), данные берутся из кэша"""
+    subprocess.run([sys.executable, "main.py", *command], cwd=ROOT, capture_output=True, check=True)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", *command], cwd=ROOT, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench_startup(import_budget: float = IMPORT_BUDGET_MS, run_budget: float = RUN_BUDGET_MS,
+                  command: tuple[str, ...] = ("report",)) -> dict:
+    cli_ms, heavy = import_time("src.cli")
+    command_ms = run_time(list(command))
+    return {
+        "import_src_cli_ms": round(cli_ms, 1),
+        "heavy_modules_on_import": heavy,
+        f"run_{'_'.join(command)}_ms": round(command_ms, 1),
+        "ok": cli_ms <= import_budget and not heavy and command_ms <= run_budget,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк времени запуска CLI")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_MS, help="бюджет импорта CLI, мс")
+    parser.add_argument("--run-budget", type=float, default=RUN_BUDGET_MS, help="бюджет команды на кэше, мс")
+    parser.add_argument("command", nargs="*", default=["report"], help="команда main.py для замера")
+    args = parser.parse_args()
+    result = bench_startup(args.import_budget, args.run_budget, tuple(args.command))
+    print(result)
+    sys.exit(0 if result["ok"] else 1)
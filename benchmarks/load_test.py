@@ -0,0 +1,89 @@
+""" Нагрузочный тест HTTP-сервиса: синтетические операции, заглушка внешних API и параллельные клиенты"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+from benchmarks.stub_market import start_stub
+from benchmarks.synthetic import generate_operations, write_operations
+from src.market import MarketDataClient, set_market_client
+from src.server import OperationsService
+from src.store import OperationsStore
+
+# Синтетические операции за три года до даты запросов
+START = datetime(2022, 6, 1)
+
+TARGETS = [
+    "/dashboard?date=" + quote("2025-05-05 16:44:00"),
+    "/search",
+    "/report?category=" + quote("Переводы") + "&date=" + quote("2025-05-05 16:44:00"),
+    "/report?category=" + quote("Фастфуд") + "&date=" + quote("2025-05-05 16:44:00"),
+]
+
+
+def _request(port: int, target: str) -> float:
+    start = time.perf_counter()
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{target}", timeout=60) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def _serve_in_thread(service: OperationsService) -> asyncio.AbstractEventLoop:
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    async def main():
+        await service.start(port=0)
+        ready.set()
+
+    threading.Thread(target=lambda: (loop.run_until_complete(main()), loop.run_forever()), daemon=True).start()
+    ready.wait(120)
+    return loop
+
+
+def load_test(rows: int, requests: int, concurrency: int) -> dict:
+    """ Задержки и пропускная способность при concurrency одновременных клиентах"""
+    stub = start_stub()
+    base = f"http://127.0.0.1:{stub.server_address[1]}"
+    set_market_client(MarketDataClient(api_key="demo", cbr_url=f"{base}/daily_json.js", stocks_url=f"{base}/query"))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_operations(generate_operations(rows, start=START), Path(tmp) / "operations.csv")
+        service = OperationsService(OperationsStore(path))
+        loop = _serve_in_thread(service)
+        targets = [TARGETS[number % len(TARGETS)] for number in range(requests)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(lambda target: _request(service.port, target), targets))
+        elapsed = time.perf_counter() - start
+        asyncio.run_coroutine_threadsafe(service.stop(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+    stub.shutdown()
+    set_market_client(None)
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "computed": service.computed,
+        "coalesced": service.coalesced,
+        "stub_hits": stub.hits,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный тест HTTP-сервиса операций")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    print(json.dumps(load_test(args.rows, args.requests, args.concurrency), ensure_ascii=False))
@@ -0,0 +1,44 @@
+""" Локальная заглушка API курсов ЦБ и котировок Alpha Vantage с настраиваемой задержкой"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RATES = {"USD": 78.5025, "EUR": 89.3108, "CNY": 10.9, "GBP": 104.2}
+
+PRICES = {"AAPL": "150.00", "AMZN": "3173.18", "GOOGL": "120.50", "MSFT": "410.00", "TSLA": "180.25"}
+
+
+class StubMarketHandler(BaseHTTPRequestHandler):
+    delay = 0.05
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.hits += 1
+        time.sleep(self.delay)
+        if url.path == "/daily_json.js":
+            body = {"Valute": {code: {"Value": value} for code, value in RATES.items()}}
+        elif url.path == "/query" and parse_qs(url.query).get("symbol", [""])[0] in PRICES:
+            body = {"Global Quote": {"02. open": PRICES[parse_qs(url.query)["symbol"][0]]}}
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(port: int = 0) -> ThreadingHTTPServer:
+    """ Запуск заглушки в фоновом потоке, адрес - server.server_address"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubMarketHandler)
+    server.hits = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,171 @@
+""" Набор бенчмарков публичных функций на синтетических выгрузках 10k-10M строк: время, пиковая память и
+сравнение с сохраненным базовым запуском"""
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Optional
+from unittest.mock import patch
+
+from benchmarks.stub_market import start_stub
+from benchmarks.synthetic import generate_operations, write_operations
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Лист Excel вмещает 1 048 576 строк, большие выгрузки измеряются только в CSV
+EXCEL_MAX_ROWS = 1_048_575
+
+DATA_DIR = Path(__file__).parent / ".data"
+BASELINE = Path(__file__).parent / "baseline.json"
+
+DATE = "2025-05-05 16:44:00"
+SEED = 42
+
+# Допустимое ухудшение относительно базового запуска и порог, ниже которого разница считается шумом
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.25
+TIME_NOISE_S = 0.01
+MEMORY_NOISE_MB = 1.0
+
+
+def dataset(rows: int, fmt: str) -> Path:
+    """ Синтетическая выгрузка нужного размера, создается один раз и переиспользуется"""
+    DATA_DIR.mkdir(exist_ok=True)
+    path = DATA_DIR / f"operations_{rows}_{SEED}.{fmt}"
+    if not path.exists():
+        write_operations(generate_operations(rows, seed=SEED), path)
+    return path
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict:
+    """ Лучшее время из repeat запусков после прогрева и пиковая память отдельного запуска под tracemalloc"""
+    func()
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(timings), 4), "peak_mb": round(peak / 2 ** 20, 2)}
+
+
+def _functions(path: Path) -> dict[str, Callable[[], object]]:
+    """ Измеряемые функции на операциях из файла path"""
+    from src.cards import get_card_summary
+    from src.reports import expenses_by_category
+    from src.services import get_name_filter
+    from src.store import OperationsStore, read_source
+    from src.utils import get_top_transactions, read_excel, summ_by_category
+    from src.views import clear_memo, dictionary
+
+    store = OperationsStore(path, use_cache=False)
+    df = store.get()
+
+    def dashboard():
+        clear_memo()
+        return dictionary(DATE, store=store)
+
+    if path.suffix == ".xlsx":
+        read = {"read_excel": lambda: read_excel(path)}
+    else:
+        read = {"read_csv": lambda: read_source(path)}
+    return {
+        **read,
+        "summ_by_category": lambda: summ_by_category(df),
+        "get_card_summary": lambda: get_card_summary(df, DATE, ["mtd", "wtd", "rolling_30"], by_currency=True),
+        "get_top_transactions": lambda: get_top_transactions(df),
+        "get_name_filter": lambda: get_name_filter(df),
+        "expenses_by_category": lambda: expenses_by_category(df, "Переводы", DATE),
+        "dictionary": dashboard,
+    }
+
+
+def run_suite(sizes: list[str], formats: list[str], repeat: int = 3, only: Optional[list[str]] = None) -> list[dict]:
+    """ Запуск всех бенчмарков: результаты с ключами function, rows, format"""
+    from src.market import MarketDataClient, set_market_client
+
+    stub = start_stub()
+    base = f"http://127.0.0.1:{stub.server_address[1]}"
+    set_market_client(MarketDataClient(api_key="demo", cbr_url=f"{base}/daily_json.js", stocks_url=f"{base}/query"))
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+        for folder in ("data", "logs"):
+            (Path(tmp) / folder).mkdir()
+        stack.enter_context(patch("src.services.W_JSON_SERVICES", Path(tmp) / "data" / "w_json_services.json"))
+        stack.enter_context(patch("src.views.W_JSON_VIEWS", Path(tmp) / "data" / "w_json_views.json"))
+        stack.enter_context(patch("src.reports.BASE_DIR", Path(tmp)))
+        for size in sizes:
+            rows = SIZES[size]
+            for fmt in formats:
+                if fmt == "xlsx" and rows > EXCEL_MAX_ROWS:
+                    print(f"{size} {fmt}: пропущено, больше строк, чем помещается на лист Excel", file=sys.stderr)
+                    continue
+                for name, func in _functions(dataset(rows, fmt)).items():
+                    if only and name not in only:
+                        continue
+                    result = {"function": name, "rows": rows, "format": fmt, **measure(func, repeat)}
+                    print(json.dumps(result, ensure_ascii=False), file=sys.stderr)
+                    results.append(result)
+    stub.shutdown()
+    set_market_client(None)
+    return results
+
+
+def _key(result: dict) -> tuple:
+    return result["function"], result["rows"], result["format"]
+
+
+def compare(results: list[dict], baseline: list[dict], time_tolerance: float = TIME_TOLERANCE,
+            memory_tolerance: float = MEMORY_TOLERANCE) -> list[str]:
+    """ Описания регрессий: время или пиковая память хуже базовых больше допустимого"""
+    previous = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get(_key(result))
+        if base is None:
+            continue
+        name = "{} {} {}".format(*_key(result))
+        if (result["seconds"] > base["seconds"] * (1 + time_tolerance)
+                and result["seconds"] - base["seconds"] > TIME_NOISE_S):
+            regressions.append(f"{name}: время {base['seconds']} -> {result['seconds']} с")
+        if (result["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance)
+                and result["peak_mb"] - base["peak_mb"] > MEMORY_NOISE_MB):
+            regressions.append(f"{name}: память {base['peak_mb']} -> {result['peak_mb']} МБ")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарки публичных функций на синтетических выгрузках")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["10k", "100k"])
+    parser.add_argument("--formats", nargs="+", choices=["xlsx", "csv"], default=["xlsx", "csv"])
+    parser.add_argument("--functions", nargs="+", help="только указанные функции")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE, type=Path, help="сохранить результаты как базу")
+    parser.add_argument("--compare", nargs="?", const=BASELINE, type=Path,
+                        help="сравнить с базой, код выхода 1 при регрессии")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    suite = run_suite(args.sizes, args.formats, args.repeat, args.functions)
+    print(json.dumps(suite, ensure_ascii=False, indent=2))
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(suite, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.compare:
+        found = compare(suite, json.loads(args.compare.read_text(encoding="utf-8")),
+                        args.time_tolerance, args.memory_tolerance)
+        for regression in found:
+            print(f"Регрессия: {regression}", file=sys.stderr)
+        sys.exit(1 if found else 0)
@@ -0,0 +1,69 @@
+""" Генератор синтетических банковских операций в формате выгрузки operations_2025.xlsx"""
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+CARDS = ["*4506", "*8361", "*8378", "*3040", "*9488", "*4362", "*1418", "*1910", None]
+
+CATEGORIES = ["Переводы", "Фастфуд", "Супермаркеты", "Бонусы", "Пополнения", "Связь", "Транспорт",
+              "Мобильная связь", "Местный транспорт", "Кредиты", "Цифровые товары", "Красота", "Такси"]
+
+DESCRIPTIONS = ["Перевод между счетами", "Яндекс Еда", "Лента", "Пятерочка", "билайн", "Покупка по QR",
+                "Метро Санкт-Петербург", "Получение займа МФК", "Яндекс Такси"]
+
+NAMES = ["Валерий А.", "Иван П.", "Светлана Т.", "Константин Л.", "Ольга С.", "Михаил Ю.", "Анна К."]
+
+
+def generate_operations(rows: int, seed: int = 42, start: Optional[datetime] = None) -> pd.DataFrame:
+    """ Функция генерации датафрейма операций с колонками реальной выгрузки"""
+    rng = np.random.default_rng(seed)
+    start = start or datetime(2023, 1, 1)
+    seconds = np.sort(rng.integers(0, 3 * 365 * 24 * 3600, rows))[::-1]
+    dates = pd.Timestamp(start) + pd.to_timedelta(seconds, unit="s")
+    categories = rng.choice(CATEGORIES, rows)
+    descriptions = rng.choice(DESCRIPTIONS, rows).astype(object)
+    transfers = categories == "Переводы"
+    to_person = transfers & (rng.random(rows) < 0.5)
+    descriptions[to_person] = rng.choice(NAMES, int(to_person.sum()))
+    amounts = np.round(rng.normal(-1500, 4000, rows), 2)
+    cashback = np.where(rng.random(rows) < 0.2, np.abs(np.round(amounts / 100)), np.nan)
+    return pd.DataFrame({
+        "Дата операции": dates.strftime("%d.%m.%Y %H:%M:%S"),
+        "Дата платежа": (dates + pd.Timedelta(days=1)).strftime("%d.%m.%Y"),
+        "Номер карты": rng.choice(np.array(CARDS, dtype=object), rows),
+        "Статус": np.where(rng.random(rows) < 0.97, "OK", "FAILED"),
+        "Сумма операции": amounts,
+        "Валюта операции": "RUB",
+        "Сумма платежа": amounts,
+        "Валюта платежа": "RUB",
+        "Кэшбэк": cashback,
+        "Категория": categories,
+        "MCC": np.where(transfers, np.nan, rng.integers(4000, 6000, rows)),
+        "Описание": descriptions,
+        "Бонусы (включая кэшбэк)": np.nan_to_num(cashback),
+        "Округление на инвесткопилку": 0.0,
+        "Сумма операции с округлением": np.abs(amounts),
+    })
+
+
+def write_operations(df: pd.DataFrame, path: Union[str, Path]) -> Path:
+    """ Запись синтетических операций в XLSX или CSV по расширению файла"""
+    path = Path(path)
+    if path.suffix == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генерация синтетической выгрузки операций")
+    parser.add_argument("path", help="путь к файлу .xlsx или .csv")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(write_operations(generate_operations(args.rows, args.seed), args.path))
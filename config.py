@@ -10,10 +10,20 @@ W_JSON_VIEWS = BASE_DIR / "data" / "w_json_views.json"
 
 W_JSON_SERVICES = BASE_DIR / "data" / "w_json_services.json"
 
-LOGS_REPORTS = BASE_DIR / "logs" / "reports.logs"
+CBR_URL = "https://www.cbr-xml-daily.ru/daily_json.js"
 
-LOGS_SERVICES = BASE_DIR / "logs" / "services.logs"
+STOCKS_URL = "https://www.alphavantage.co/query"
 
-LOGS_UTILS = BASE_DIR / "logs" / "utils.logs"
+MARKET_CACHE = BASE_DIR / "data" / "market_cache.json"
 
-LOGS_VIEWS = BASE_DIR / "logs" / "views.logs"
+OPERATIONS_STORE = BASE_DIR / "data" / "operations_store.feather"
+
+INGEST_STATE = BASE_DIR / "data" / "ingest_state.json"
+
+OPERATIONS_DB = BASE_DIR / "data" / "operations.sqlite"
+
+W_JSON_ACCOUNTS = BASE_DIR / "data" / "w_json_accounts.json"
+
+W_JSON_DASHBOARDS = BASE_DIR / "data" / "dashboards"
+
+LOGS_DIR = BASE_DIR / "logs"
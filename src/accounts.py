@@ -0,0 +1,92 @@
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import pandas as pd
+
+from src.logger import worker_logging
+from src.schema import apply_schema, to_kopecks
+from src.store import read_source
+from src.utils import card_records, card_totals, get_operations_with_range, top_records, top_rows
+
+logger = logging.getLogger('accounts')
+
+SOURCE_SUFFIXES = (".xlsx", ".csv")
+
+
+def collect_files(source: Union[str, Path, Iterable[Union[str, Path]]]) -> list[Path]:
+    """ Файлы выгрузок: все XLSX и CSV каталога, файлы по маске или явный список"""
+    if not isinstance(source, (str, Path)):
+        return [Path(path) for path in source]
+    path = Path(source)
+    if path.is_dir():
+        return sorted(file for file in path.iterdir() if file.suffix.lower() in SOURCE_SUFFIXES)
+    return sorted(Path(file) for file in glob.glob(str(source)))
+
+
+def category_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """ Суммы операций в копейках и количество операций по категориям"""
+    df = df[df["Категория"].notna()]
+    kopecks = pd.DataFrame({"Категория": df["Категория"].to_numpy(dtype=object),
+                            "total": to_kopecks(df["Сумма операции"])})
+    return kopecks.groupby("Категория").agg(total=("total", "sum"), operations=("total", "size"))
+
+
+def partial_aggregates(path: Union[str, Path], top_n: int = 5, date: Optional[str] = None) -> dict:
+    """ Частичные агрегаты одной выгрузки: суммы по картам и категориям, кандидаты топа.
+    Выполняется в отдельном процессе, поэтому возвращает только небольшие таблицы"""
+    df = read_source(Path(path))
+    if not isinstance(df, pd.DataFrame):
+        raise ValueError(f"Не удалось загрузить операции из файла {path}")
+    df = apply_schema(df)
+    if date is not None:
+        df = get_operations_with_range(df, date)
+    return {
+        "rows": len(df),
+        "cards": card_totals(df),
+        "categories": category_totals(df),
+        "top": top_rows(df, top_n),
+    }
+
+
+def merge_aggregates(parts: Iterable[dict], top_n: int = 5) -> dict:
+    """ Объединение частичных агрегатов нескольких выгрузок в одну сводку"""
+    rows, cards, categories, top = 0, None, None, None
+    for part in parts:
+        rows += part["rows"]
+        cards = part["cards"] if cards is None else cards.add(part["cards"], fill_value=0)
+        categories = part["categories"] if categories is None else categories.add(part["categories"], fill_value=0)
+        top = part["top"] if top is None else top_rows(pd.concat([top, part["top"]], ignore_index=True), top_n)
+    if categories is None:
+        return {"operations": 0, "cards": [], "categories": [], "top_transactions": []}
+    categories = categories.astype("int64").sort_values("total", kind="stable")
+    return {
+        "operations": rows,
+        "cards": card_records(cards.astype("int64")),
+        "categories": [{"category": category, "total_expenses": total / 100, "operations": int(count)}
+                       for category, total, count in categories.itertuples(name=None)],
+        "top_transactions": top_records(top),
+    }
+
+
+def process_files(source: Union[str, Path, Iterable[Union[str, Path]]], top_n: int = 5,
+                  date: Optional[str] = None, max_workers: Optional[int] = None) -> dict:
+    """ Сводка по выгрузкам всех счетов: файлы разбираются параллельно в пуле процессов"""
+    files = collect_files(source)
+    if not files:
+        raise FileNotFoundError(f"Не найдены файлы операций: {source}")
+    max_workers = min(max_workers or os.cpu_count() or 1, len(files))
+    logger.info("Обработка %s файлов в %s процессах", len(files), max_workers)
+    start = datetime.now()
+    if max_workers == 1:
+        parts = [partial_aggregates(file, top_n, date) for file in files]
+    else:
+        with worker_logging() as pool, ProcessPoolExecutor(max_workers=max_workers, **pool) as executor:
+            parts = list(executor.map(partial_aggregates, files, [top_n] * len(files), [date] * len(files)))
+    dashboard = {"files": [str(file) for file in files], **merge_aggregates(parts, top_n)}
+    logger.info("Сводка по %s операциям построена за %s", dashboard["operations"], datetime.now() - start)
+    return dashboard
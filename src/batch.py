@@ -0,0 +1,123 @@
+""" Пакетная сборка главных страниц для многих пользователей: общий запрос курсов и котировок на объединение
+символов, секции операций считаются один раз на счет, ответы пишутся параллельно"""
+import glob
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Union
+
+from config import BASE_DIR, PATH_DATA, W_JSON_DASHBOARDS
+from src import metrics
+from src.cards import DEFAULT_PERIODS, get_card_summary
+from src.dates import INPUT_FORMAT, parse_moment
+from src.logger import setup_logging
+from src.store import get_store
+from src.utils import (data_time, get_currency, get_operations_with_range, get_stocks, get_top_transactions,
+                       load_user_settings)
+from src.writers import write_json
+
+logger = logging.getLogger('batch')
+setup_logging()
+
+MAX_WORKERS = 8
+
+
+def collect_settings(source: Union[str, Path, Iterable[Union[str, Path]]]) -> list[Path]:
+    """ Файлы настроек пользователей: все JSON каталога, файлы по маске или список из них"""
+    if not isinstance(source, (str, Path)):
+        return [path for item in source for path in collect_settings(item)]
+    path = Path(source)
+    if path.is_dir():
+        return sorted(path.glob("*.json"))
+    return sorted(Path(file) for file in glob.glob(str(source)))
+
+
+def account_path(settings: dict) -> Path:
+    """ Выгрузка операций пользователя: ключ account настроек (относительно корня проекта) или общая выгрузка"""
+    account = settings.get("account")
+    if not account:
+        return Path(PATH_DATA)
+    account = Path(account)
+    return account if account.is_absolute() else BASE_DIR / account
+
+
+def load_users(paths: Iterable[Path]) -> dict[str, dict]:
+    """ Настройки пользователей по имени файла без расширения - это имя файла ответа.
+    Один и тот же файл, указанный несколько раз, читается один раз; разные файлы с одним именем - ошибка,
+    иначе ответ одного пользователя перезаписал бы ответ другого"""
+    files: dict[str, Path] = {}
+    for path in paths:
+        resolved = Path(path).resolve()
+        previous = files.setdefault(resolved.stem, resolved)
+        if previous != resolved:
+            raise ValueError(f"Файлы настроек {previous} и {resolved} дают один файл ответа {resolved.stem}.json")
+    return {user: load_user_settings(path) for user, path in files.items()}
+
+
+def _select(result: Any, symbols: list[str], key: str) -> Any:
+    """ Записи запрошенных пользователем символов из общего ответа; ошибка запроса передается как есть"""
+    if not isinstance(result, list):
+        return result
+    records = {record[key]: record for record in result}
+    return [records[symbol] for symbol in symbols if symbol in records]
+
+
+def build_dashboards(source: Union[str, Path, Iterable[Union[str, Path]]], date: str,
+                     output_dir: Union[str, Path] = W_JSON_DASHBOARDS,
+                     max_workers: int = MAX_WORKERS) -> dict[str, Path]:
+    """ Главные страницы всех пользователей из файлов настроек source на дату date.
+
+    Валюты и тикеры всех пользователей объединяются в один запрос курсов и один запрос котировок, срез операций
+    и топ транзакций считаются один раз на выгрузку, сводка по картам - один раз на выгрузку и набор периодов.
+    Ответ пользователя пишется в output_dir/<имя файла настроек>.json, возвращаются пути по пользователям.
+    Символ, для которого API не вернул значение, пропускается только в ответах запросивших его пользователей.
+    """
+    users = load_users(collect_settings(source))
+    logger.info("Пакетная сборка главных страниц для %s пользователей", len(users))
+    try:
+        moment = parse_moment(date)
+    except ValueError:
+        logger.error("Неверный формат даты, используется текущая дата")
+        moment = datetime.now()
+    day_end = datetime.combine(moment.date(), datetime.max.time())
+    currencies = list(dict.fromkeys(symbol for settings in users.values() for symbol in settings['user_currencies']))
+    stocks = list(dict.fromkeys(symbol for settings in users.values() for symbol in settings['user_stocks']))
+    logger.info("Уникальных валют: %s, тикеров: %s", len(currencies), len(stocks))
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as executor:
+        rates = executor.submit(get_currency, "", settings={'user_currencies': currencies})
+        quotes = executor.submit(get_stocks, "", settings={'user_stocks': stocks})
+
+        greeting = data_time(moment.strftime(INPUT_FORMAT))
+        accounts: dict[Path, tuple] = {}
+        cards: dict[tuple, list[dict]] = {}
+        responses = {}
+        for user, settings in users.items():
+            account = account_path(settings)
+            if account not in accounts:
+                transactions = get_store(account).get()
+                accounts[account] = (transactions,
+                                     get_top_transactions(get_operations_with_range(transactions, day_end)))
+            transactions, top_transactions = accounts[account]
+            periods = tuple(settings.get('card_periods', DEFAULT_PERIODS))
+            by_currency = settings.get('card_by_currency', False)
+            card_key = (account, periods, by_currency)
+            if card_key not in cards:
+                cards[card_key] = get_card_summary(transactions, day_end, periods, by_currency)
+            responses[user] = {
+                'greeting': greeting,
+                'cards': cards[card_key],
+                'top_transactions': top_transactions,
+                'stock_prices': _select(rates.result(), settings['user_currencies'], "currency"),
+                'currency_rates': _select(quotes.result(), settings['user_stocks'], "stock"),
+            }
+        logger.info("Выгрузок: %s, сводок по картам: %s", len(accounts), len(cards))
+
+        paths = {user: output_dir / f"{user}.json" for user in responses}
+        with metrics.stage("serialize", "build_dashboards", responses):
+            list(executor.map(lambda user: write_json(responses[user], paths[user]), responses))
+    logger.info("Главные страницы записаны в каталог %s", output_dir)
+    return paths
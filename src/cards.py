@@ -0,0 +1,102 @@
+""" Сводка по картам за несколько периодов и в разрезе валют за один проход группировки"""
+import logging
+import re
+from datetime import datetime
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+from src import metrics
+from src.database import OperationsDatabase
+from src.logger import setup_logging
+from src.schema import to_kopecks
+from src.utils import slice_by_date, summ_by_category
+
+logger = logging.getLogger('cards')
+setup_logging()
+
+CARD = "Номер карты"
+CURRENCY = "Валюта платежа"
+PAYMENT = "Сумма платежа"
+CASHBACK = "Кэшбэк"
+
+MONTH_TO_DATE = "mtd"
+WEEK_TO_DATE = "wtd"
+ROLLING = re.compile(r"rolling_(\d+)")
+
+DEFAULT_PERIODS = (MONTH_TO_DATE,)
+
+
+def period_start(period: str, date: Union[str, datetime]) -> pd.Timestamp:
+    """ Начало периода, заканчивающегося датой date: с начала месяца, с понедельника или за N последних дней"""
+    day = pd.Timestamp(date).normalize()
+    if period == MONTH_TO_DATE:
+        return day.replace(day=1)
+    if period == WEEK_TO_DATE:
+        return day - pd.Timedelta(days=day.weekday())
+    rolling = ROLLING.fullmatch(period)
+    if rolling and int(rolling.group(1)) > 0:
+        return day - pd.Timedelta(days=int(rolling.group(1)) - 1)
+    raise ValueError(f"Неизвестный период {period}: поддерживаются {MONTH_TO_DATE}, {WEEK_TO_DATE} и rolling_N")
+
+
+@metrics.timed("groupby")
+def card_summary(df: pd.DataFrame, date: Union[str, datetime], periods: Iterable[str] = DEFAULT_PERIODS,
+                 by_currency: bool = False) -> pd.DataFrame:
+    """ Суммы платежей и кешбека в копейках по картам (и валютам) для каждого периода.
+
+    Операции берутся одним срезом от самого раннего начала периода до date, принадлежность к периодам
+    размечается масками по дате, все периоды суммируются одной группировкой. Колонки - пары (период, поле).
+    """
+    date = pd.Timestamp(date)
+    starts = {period: period_start(period, date) for period in periods}
+    if not starts:
+        raise ValueError("Не указан ни один период")
+    window = slice_by_date(df, min(starts.values()), date)
+    window = window[(window[PAYMENT] < 0) & (window["Статус"] == "OK")]
+    dates = window["Дата операции"].to_numpy()
+    payments = to_kopecks(window[PAYMENT])
+    cashback = to_kopecks(window[CASHBACK])
+    columns = {}
+    for period, start in starts.items():
+        inside = dates >= np.datetime64(start)
+        columns[(period, PAYMENT)] = np.where(inside, payments, 0)
+        columns[(period, CASHBACK)] = np.where(inside, cashback, 0)
+    keys = [CARD, CURRENCY] if by_currency else [CARD]
+    frame = pd.DataFrame(columns, index=pd.MultiIndex.from_arrays([window[key] for key in keys]))
+    return frame.groupby(level=list(range(len(keys))), observed=True).sum()
+
+
+def summary_records(summary: pd.DataFrame) -> list[dict]:
+    """ Записи сводки в формате ответа: суммы первого периода и, если периодов несколько, все периоды"""
+    periods = list(dict.fromkeys(summary.columns.get_level_values(0)))
+    by_currency = summary.index.nlevels > 1
+    records = []
+    for key, row in (summary / 100).iterrows():
+        card, currency = key if by_currency else (key, None)
+        record = {"last_digits": card}
+        if by_currency:
+            record["currency"] = currency
+        record["total_spent"] = float(row[(periods[0], PAYMENT)])
+        record["cashback"] = float(row[(periods[0], CASHBACK)])
+        if len(periods) > 1:
+            record["periods"] = {
+                period: {"total_spent": float(row[(period, PAYMENT)]), "cashback": float(row[(period, CASHBACK)])}
+                for period in periods}
+        records.append(record)
+    return records
+
+
+def get_card_summary(df: Union[pd.DataFrame, OperationsDatabase], date: Union[str, datetime],
+                     periods: Iterable[str] = DEFAULT_PERIODS, by_currency: bool = False) -> list[dict]:
+    """ Сводка по картам за периоды в формате ответа.
+    Из базы за один период без валют суммы берутся группировкой в базе, иначе из базы читается только окно периодов"""
+    logger.debug("Сводка по картам за периоды %s на %s", periods, date)
+    periods = tuple(periods)
+    if isinstance(df, OperationsDatabase) and periods:
+        starts = [period_start(period, date) for period in periods]
+        if len(periods) == 1 and not by_currency:
+            return summ_by_category(df, starts[0], date)
+        df = df.between(min(starts), date)
+    return summary_records(card_summary(df, date, periods, by_currency))
@@ -0,0 +1,165 @@
+""" Точка входа командной строки: модули с pandas и сетевым клиентом загружаются только выбранной командой"""
+import argparse
+from typing import Optional, Sequence
+
+from config import PATH_DATA, W_JSON_ACCOUNTS, W_JSON_DASHBOARDS, W_JSON_SERVICES, W_JSON_VIEWS
+
+DEFAULT_DATE = "2025-05-05 16:44:00"
+DEFAULT_CATEGORY = "Переводы"
+
+
+def _operations(args: argparse.Namespace):
+    """ Операции из общего хранилища или из базы SQLite: база читает выгрузку только для перезаполнения"""
+    if args.backend == "sqlite":
+        from src.database import open_database
+
+        return open_database(args.data, rebuild=args.rebuild_cache)
+    from src.store import get_operations
+
+    return get_operations(args.data, rebuild=args.rebuild_cache)
+
+
+def cmd_dashboard(args: argparse.Namespace) -> None:
+    """ Главная страница: приветствие, карты, топ операций, курсы и акции"""
+    from src.views import dictionary
+
+    if args.backend == "sqlite":
+        dictionary(args.date, database=_operations(args))
+    else:
+        from src.store import get_store
+
+        store = get_store(args.data)
+        store.get(rebuild=args.rebuild_cache)
+        dictionary(args.date, store=store)
+    print(f"Результат работы записан в файле: {W_JSON_VIEWS}")
+
+
+def cmd_dashboards(args: argparse.Namespace) -> None:
+    """ Главные страницы многих пользователей по их файлам настроек"""
+    from src.batch import build_dashboards
+
+    paths = build_dashboards(args.settings, args.date, args.output, max_workers=args.workers)
+    print(f"Главные страницы {len(paths)} пользователей записаны в каталог: {args.output}")
+
+
+def cmd_search(args: argparse.Namespace) -> None:
+    """ Поиск переводов физическим лицам"""
+    from src.services import get_name_filter
+
+    count = get_name_filter(_operations(args), args.patterns, records=False)
+    print(f"Найдено переводов: {count}. Результат работы записан в файле: {W_JSON_SERVICES}")
+
+
+def cmd_report(args: argparse.Namespace) -> None:
+    """ Траты по категории за три месяца до даты"""
+    from src.reports import expenses_by_category
+
+    print(f"Результат работы указан ниже: \n{expenses_by_category(_operations(args), args.category, args.date)}")
+
+
+def cmd_ingest(args: argparse.Namespace) -> None:
+    """ Добавление новых операций из выгрузки в хранилище"""
+    from src.ingest import ingest_export
+
+    print(f"Добавлено новых операций: {ingest_export(args.path)}")
+
+
+def cmd_accounts(args: argparse.Namespace) -> None:
+    """ Сводка по выгрузкам всех счетов"""
+    from src.accounts import process_files
+    from src.writers import write_json
+
+    write_json(process_files(args.pattern, max_workers=args.workers), W_JSON_ACCOUNTS)
+    print(f"Сводка по счетам записана в файле: {W_JSON_ACCOUNTS}")
+
+
+def cmd_serve(args: argparse.Namespace) -> None:
+    """ HTTP-сервис с маршрутами /dashboard, /search и /report"""
+    from src.server import run
+    from src.store import get_store
+
+    run(args.host, args.port, store=get_store(args.data), max_workers=args.workers)
+
+
+def cmd_all(args: argparse.Namespace) -> None:
+    """ Запуск без команды: главная страница, поиск переводов и отчет, как раньше делал main.py"""
+    args.patterns = None
+    args.category = DEFAULT_CATEGORY
+    for command in (cmd_dashboard, cmd_search, cmd_report):
+        print("-" * 10)
+        command(args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Обработка банковских операций")
+    parser.add_argument("--data", default=PATH_DATA, help="файл выгрузки операций")
+    parser.add_argument("--rebuild-cache", action="store_true", help="пересобрать кэш операций")
+    parser.add_argument("--backend", choices=["pandas", "sqlite"], default="pandas",
+                        help="хранение операций: датафрейм в памяти или встроенная база SQLite")
+    parser.add_argument("--log-level", help="уровень логирования (по умолчанию из LOG_LEVEL или INFO)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="записать метрики этапов в файл: .prom - формат Prometheus, иначе JSON")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="профилировать запуск cProfile и tracemalloc, статистику cProfile сохранить в файл")
+    parser.set_defaults(func=cmd_all, date=DEFAULT_DATE)
+    commands = parser.add_subparsers(title="команды")
+
+    dashboard = commands.add_parser("dashboard", help="JSON главной страницы")
+    dashboard.add_argument("--date", default=DEFAULT_DATE, help="дата и время в формате YYYY-MM-DD HH:MM:SS")
+    dashboard.set_defaults(func=cmd_dashboard)
+
+    dashboards = commands.add_parser("dashboards", help="JSON главной страницы для многих пользователей")
+    dashboards.add_argument("settings", nargs="+", help="файлы настроек пользователей, каталог или маска")
+    dashboards.add_argument("--date", default=DEFAULT_DATE, help="дата и время в формате YYYY-MM-DD HH:MM:SS")
+    dashboards.add_argument("--output", default=W_JSON_DASHBOARDS, help="каталог ответов пользователей")
+    dashboards.add_argument("--workers", type=int, default=8, help="потоки записи ответов")
+    dashboards.set_defaults(func=cmd_dashboards)
+
+    search = commands.add_parser("search", help="поиск переводов физическим лицам")
+    search.add_argument("--patterns", nargs="+", help="шаблоны имен: initial, full_name, patronymic, latin или regex")
+    search.set_defaults(func=cmd_search)
+
+    report = commands.add_parser("report", help="траты по категории за три месяца")
+    report.add_argument("--category", default=DEFAULT_CATEGORY)
+    report.add_argument("--date", default=DEFAULT_DATE, help="дата и время в формате YYYY-MM-DD HH:MM:SS")
+    report.set_defaults(func=cmd_report)
+
+    ingest = commands.add_parser("ingest", help="добавить в хранилище только новые операции из выгрузки")
+    ingest.add_argument("path")
+    ingest.set_defaults(func=cmd_ingest)
+
+    accounts = commands.add_parser("accounts", help="сводка по выгрузкам всех счетов")
+    accounts.add_argument("pattern", help="каталог или маска файлов")
+    accounts.add_argument("--workers", type=int, help="число процессов (по умолчанию по числу ядер)")
+    accounts.set_defaults(func=cmd_accounts)
+
+    serve = commands.add_parser("serve", help="HTTP-сервис главной страницы, поиска и отчетов")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--workers", type=int, default=4, help="потоки для расчетов pandas")
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    if args.log_level:
+        from src.logger import setup_logging
+
+        setup_logging(args.log_level)
+    if args.metrics:
+        from src import metrics
+
+        metrics.enable(memory=True)
+    if args.profile:
+        from src.metrics import profile
+
+        with profile(args.profile) as report:
+            args.func(args)
+        print(report["cpu"])
+        print(report["memory"])
+    else:
+        args.func(args)
+    if args.metrics:
+        metrics.write(args.metrics)
+        print(f"Метрики записаны в файле: {args.metrics}")
@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+from config import OPERATIONS_DB, PATH_DATA
+from src.dates import DATE_COLUMNS
+from src.schema import apply_schema
+
+logger = logging.getLogger('database')
+
+TABLE = "operations"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Индексы под запросы: интервал дат, окно категории и группировка по карте
+INDEXES = {
+    "operations_date": ['"Дата операции"'],
+    "operations_category_date": ['"Категория"', '"Дата операции"'],
+    "operations_card": ['"Номер карты"'],
+}
+
+
+@lru_cache(maxsize=32)
+def _regex(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+@lru_cache(maxsize=65536)
+def _regexp(pattern: str, value: Optional[str]) -> bool:
+    """ Функция REGEXP для SQLite: поиск по шаблону Python re, результат кэшируется по описанию"""
+    return value is not None and _regex(pattern).search(value) is not None
+
+
+def _kopecks(column: str) -> str:
+    """ Выражение суммы в целых копейках, пропуск считается нулем"""
+    return f'COALESCE(CAST(ROUND("{column}" * 100) AS INTEGER), 0)'
+
+
+def _bound(date: Union[str, datetime]) -> str:
+    return pd.Timestamp(date).strftime(DATE_FORMAT)
+
+
+def _to_sql_values(df: pd.DataFrame) -> pd.DataFrame:
+    """ Колонки в типах SQLite: даты строкой ISO, категории и nullable-целые как объекты"""
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            columns[column] = values.dt.strftime(DATE_FORMAT)
+        elif isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_extension_array_dtype(values):
+            columns[column] = values.astype(object).where(values.notna(), None)
+        else:
+            columns[column] = values
+    return pd.DataFrame(columns)
+
+
+class OperationsDatabase:
+    """ Операции во встроенной базе SQLite: фильтры и группировки выполняются индексными запросами"""
+
+    def __init__(self, path: Union[str, Path] = ":memory:") -> None:
+        self.path = str(path)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.create_function("REGEXP", 2, _regexp, deterministic=True)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, path: Union[str, Path] = ":memory:") -> "OperationsDatabase":
+        """ База, заполненная операциями датафрейма"""
+        database = cls(path)
+        database.load(df)
+        return database
+
+    def _query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._connection, params=params)
+
+    def _frame(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        """ Операции из запроса в тех же типах, что и в датафрейме хранилища"""
+        df = self._query(sql, params)
+        for column in DATE_COLUMNS:
+            if column in df:
+                df[column] = pd.to_datetime(df[column], format=DATE_FORMAT)
+        return apply_schema(df)
+
+    def load(self, df: pd.DataFrame, source: Optional[tuple] = None) -> None:
+        """ Замена содержимого таблицы операциями датафрейма и построение индексов"""
+        with self._lock, self._connection:
+            _to_sql_values(df).to_sql(TABLE, self._connection, if_exists="replace", index=False, chunksize=10_000)
+            for name, columns in INDEXES.items():
+                if all(column.strip('"') in df for column in columns):
+                    self._connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {TABLE} ({', '.join(columns)})")
+            self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (json.dumps(source),))
+        logger.info("В базу загружено операций: %s", len(df))
+
+    @property
+    def source(self) -> Optional[tuple]:
+        """ Подпись исходного файла, из которого заполнена база"""
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        source = json.loads(row[0]) if row else None
+        return tuple(source) if source else None
+
+    def between(self, date_from: Union[str, datetime], date_to: Union[str, datetime]) -> pd.DataFrame:
+        """ Операции в интервале [date_from, date_to] по индексу даты"""
+        return self._frame(f'SELECT * FROM {TABLE} WHERE "Дата операции" BETWEEN ? AND ? '
+                           f'ORDER BY "Дата операции", rowid', (_bound(date_from), _bound(date_to)))
+
+    def card_totals(self, date_from: Optional[Union[str, datetime]] = None,
+                    date_to: Optional[Union[str, datetime]] = None) -> pd.DataFrame:
+        """ Суммы платежей и кешбека в копейках по картам, как card_totals для датафрейма"""
+        where, params = "", ()
+        if date_from is not None and date_to is not None:
+            where, params = 'AND "Дата операции" BETWEEN ? AND ?', (_bound(date_from), _bound(date_to))
+        totals = self._query(
+            f'SELECT "Номер карты", SUM({_kopecks("Сумма платежа")}) AS "Сумма платежа", '
+            f'SUM({_kopecks("Кэшбэк")}) AS "Кэшбэк" FROM {TABLE} '
+            f'WHERE "Сумма платежа" < 0 AND "Статус" = \'OK\' AND "Номер карты" IS NOT NULL {where} '
+            f'GROUP BY "Номер карты" ORDER BY "Номер карты"', params)
+        return totals.set_index("Номер карты").astype("int64")
+
+    def category_total(self, category: str, date_from: Union[str, datetime],
+                       date_to: Union[str, datetime]) -> tuple[float, int]:
+        """ Сумма в рублях и количество операций категории за период по индексу (категория, дата)"""
+        with self._lock:
+            total, count = self._connection.execute(
+                f'SELECT COALESCE(SUM({_kopecks("Сумма операции")}), 0), COUNT(*) FROM {TABLE} '
+                f'WHERE "Категория" = ? AND "Дата операции" BETWEEN ? AND ?',
+                (category, _bound(date_from), _bound(date_to))).fetchone()
+        return total / 100, count
+
+    def transfers(self, category: str, pattern: str) -> pd.DataFrame:
+        """ Операции категории, описание которых совпадает с регулярным выражением"""
+        return self._frame(f'SELECT * FROM {TABLE} WHERE "Категория" = ? AND "Описание" REGEXP ? ORDER BY rowid',
+                           (category, pattern))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def open_database(source: Union[str, Path] = PATH_DATA, path: Union[str, Path] = OPERATIONS_DB,
+                  rebuild: bool = False) -> OperationsDatabase:
+    """ База операций для файла выгрузки, перезаполняется только при изменении файла или при rebuild=True.
+    Операции загружаются в pandas только для перезаполнения"""
+    from src.store import get_operations
+
+    database = OperationsDatabase(path)
+    stat = os.stat(source)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if rebuild or database.source != signature:
+        logger.info("Заполнение базы %s из файла %s", path, source)
+        database.load(get_operations(source, rebuild=rebuild), signature)
+    return database
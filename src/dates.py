@@ -0,0 +1,108 @@
+""" Разбор дат выгрузки: формат определяется один раз на файл, колонки дат разбираются векторно в datetime64"""
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+
+from src import metrics
+from src.logger import setup_logging
+
+logger = logging.getLogger('dates')
+setup_logging()
+
+OPERATION_DATE = "Дата операции"
+PAYMENT_DATE = "Дата платежа"
+DATE_COLUMNS = (OPERATION_DATE, PAYMENT_DATE)
+
+# Формат дат, которые вводит пользователь (аргументы функций, параметры запросов)
+INPUT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Форматы выгрузок в порядке проверки: дата с временем раньше даты без времени
+EXPORT_FORMATS = (
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y",
+)
+
+# Строк выборки, по которым определяется формат колонки
+SAMPLE_SIZE = 100
+
+_formats: dict[tuple[Optional[str], str], str] = {}
+_formats_lock = threading.Lock()
+
+
+def parse_moment(date: Union[str, datetime]) -> datetime:
+    """ Дата пользователя в формате YYYY-MM-DD HH:MM:SS, ValueError при другом формате"""
+    if isinstance(date, datetime):
+        return date
+    return datetime.strptime(date, INPUT_FORMAT)
+
+
+def detect_format(values: pd.Series) -> Optional[str]:
+    """ Первый формат, которым разбирается выборка непустых значений колонки, None, если ни один не подошел"""
+    sample = values.dropna()
+    sample = sample.iloc[:SAMPLE_SIZE].astype(str)
+    if sample.empty:
+        return None
+    for date_format in EXPORT_FORMATS:
+        try:
+            pd.to_datetime(sample, format=date_format)
+        except (ValueError, TypeError):
+            continue
+        return date_format
+    return None
+
+
+def _source_key(source: Union[str, Path, None]) -> Optional[str]:
+    return None if source is None else str(Path(source).resolve())
+
+
+def clear_formats() -> None:
+    """ Сброс запомненных форматов файлов"""
+    with _formats_lock:
+        _formats.clear()
+
+
+def _parse(values: pd.Series, date_format: str) -> Optional[pd.Series]:
+    """ Векторный разбор колонки одним форматом, None, если формат подходит не ко всем значениям"""
+    try:
+        return pd.to_datetime(values, format=date_format)
+    except ValueError:
+        return None
+
+
+def to_datetime(values: pd.Series, source: Union[str, Path, None] = None) -> pd.Series:
+    """ Колонка дат в datetime64: формат берется из кэша файла source или определяется по выборке"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    key = (_source_key(source), values.name)
+    with _formats_lock:
+        date_format = _formats.get(key)
+    parsed = None if date_format is None else _parse(values, date_format)
+    if parsed is None:
+        date_format = detect_format(values)
+        parsed = None if date_format is None else _parse(values, date_format)
+    if parsed is None:
+        logger.warning("Формат колонки '%s' не определен, даты разбираются поэлементно", values.name)
+        return pd.to_datetime(values, dayfirst=True, format="mixed")
+    if source is not None:
+        with _formats_lock:
+            _formats[key] = date_format
+    return parsed
+
+
+@metrics.timed("parse_dates")
+def parse_dates(df: pd.DataFrame, source: Union[str, Path, None] = None) -> pd.DataFrame:
+    """ Разбор колонок "Дата операции" (обязательна) и "Дата платежа" в datetime64; уже разобранные колонки
+    не меняются"""
+    df[OPERATION_DATE] = to_datetime(df[OPERATION_DATE], source)
+    if PAYMENT_DATE in df:
+        df[PAYMENT_DATE] = to_datetime(df[PAYMENT_DATE], source)
+    return df
@@ -0,0 +1,83 @@
+import json
+import logging
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from config import INGEST_STATE, OPERATIONS_STORE
+from src.store import get_store, read_source, require_feather
+from src.writers import write_json
+
+logger = logging.getLogger('ingest')
+
+# Колонки, по которым операция считается той же самой в разных выгрузках
+FINGERPRINT_COLUMNS = ["Дата операции", "Номер карты", "Сумма операции", "Категория", "Описание"]
+
+
+def fingerprints(df: pd.DataFrame) -> pd.Series:
+    """ Отпечатки строк: хэш ключевых колонок и номер повторения одинаковой операции"""
+    columns = [column for column in FINGERPRINT_COLUMNS if column in df]
+    hashes = pd.util.hash_pandas_object(df[columns].astype(str), index=False).astype(str)
+    occurrence = hashes.groupby(hashes, sort=False).cumcount().astype(str)
+    return (hashes + ":" + occurrence).set_axis(df.index)
+
+
+def load_state(path: Union[str, Path] = INGEST_STATE) -> dict:
+    """ Водяной знак прошлой загрузки: последняя дата операции и отпечатки строк за эту дату"""
+    path = Path(path)
+    if not path.exists():
+        return {"last_date": None, "fingerprints": []}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_state(state: dict, path: Union[str, Path] = INGEST_STATE) -> None:
+    """ Атомарная запись водяного знака"""
+    write_json(state, path, compact=True)
+
+
+def unseen_operations(df: pd.DataFrame, state: dict) -> pd.DataFrame:
+    """ Операции выгрузки после водяного знака, пересечение с прошлой загрузкой отбрасывается"""
+    if state.get("last_date") is None:
+        return df
+    last_date = pd.Timestamp(state["last_date"])
+    dates = df["Дата операции"]
+    boundary = (dates == last_date).to_numpy()
+    seen = np.zeros(len(df), dtype=bool)
+    if boundary.any():
+        seen[boundary] = fingerprints(df[boundary]).isin(set(state["fingerprints"])).to_numpy()
+    return df[((dates > last_date).to_numpy() | boundary) & ~seen]
+
+
+def _watermark(export: pd.DataFrame, state: dict) -> dict:
+    """ Новый водяной знак по выгрузке: отпечатки всех ее строк за последнюю дату"""
+    if export.empty:
+        return state
+    last_date = export["Дата операции"].max()
+    if state.get("last_date") is not None and last_date < pd.Timestamp(state["last_date"]):
+        return state
+    rows = fingerprints(export[export["Дата операции"] == last_date]).tolist()
+    if state.get("last_date") == str(last_date):
+        rows = list(dict.fromkeys(state["fingerprints"] + rows))
+    return {"last_date": str(last_date), "fingerprints": rows}
+
+
+def ingest_export(path: Union[str, Path], store_path: Union[str, Path] = OPERATIONS_STORE,
+                  state_path: Union[str, Path] = INGEST_STATE) -> int:
+    """ Загрузка новой выгрузки в хранилище операций, возвращает количество добавленных операций"""
+    path = Path(path)
+    require_feather()
+    logger.info("Загрузка выгрузки %s в хранилище %s", path, store_path)
+    export = read_source(path)
+    if not isinstance(export, pd.DataFrame):
+        raise ValueError(f"Не удалось загрузить операции из файла {path}")
+    export = export[export["Дата операции"].notna()]
+    state = load_state(state_path)
+    new = unseen_operations(export, state)
+    logger.info("Строк в выгрузке: %s, новых: %s", len(export), len(new))
+    if not new.empty:
+        get_store(store_path).append(new.reset_index(drop=True))
+    save_state(_watermark(export, state), state_path)
+    return len(new)
@@ -0,0 +1,146 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from config import LOGS_DIR
+
+LOG_FORMAT = '[%(asctime)s.%(msecs)03d] - [%(name)r] - [%(levelname)-7s] - %(message)s'
+
+# Уровень по умолчанию, переопределяется переменной окружения LOG_LEVEL
+DEFAULT_LEVEL = "INFO"
+
+_listener: Optional[QueueListener] = None
+_directory: Union[str, Path] = LOGS_DIR
+_lock = threading.Lock()
+
+
+class ModuleFileHandler(logging.Handler):
+    """ Запись каждого логгера в свой файл logs/<имя>.logs, файлы открываются при первой записи"""
+
+    def __init__(self, directory: Union[str, Path] = LOGS_DIR, mode: str = "w") -> None:
+        super().__init__()
+        self.directory = Path(directory)
+        self.mode = mode
+        self._handlers: dict[str, logging.FileHandler] = {}
+
+    def _handler(self, name: str) -> logging.FileHandler:
+        module = name.split(".")[0] or "root"
+        if module not in self._handlers:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            handler = logging.FileHandler(self.directory / f"{module}.logs", mode=self.mode, encoding="utf-8")
+            handler.setFormatter(self.formatter)
+            self._handlers[module] = handler
+        return self._handlers[module]
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._handler(record.name).emit(record)
+
+    def close(self) -> None:
+        for handler in self._handlers.values():
+            handler.close()
+        self._handlers.clear()
+        super().close()
+
+
+def _level(level: Optional[Union[str, int]]) -> int:
+    """ Уровень из аргумента или LOG_LEVEL, неизвестное имя уровня заменяется на INFO"""
+    if level is None:
+        level = os.getenv("LOG_LEVEL", DEFAULT_LEVEL)
+    if isinstance(level, str):
+        return logging.getLevelNamesMapping().get(level.upper(), logging.INFO)
+    return level
+
+
+def _remove_queue_handlers(root: logging.Logger) -> None:
+    for handler in [handler for handler in root.handlers if isinstance(handler, QueueHandler)]:
+        root.removeHandler(handler)
+
+
+def _start(directory: Union[str, Path], mode: str = "w") -> None:
+    """ Очередь записей процесса и фоновый поток, который пишет их в файлы"""
+    global _listener, _directory
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    file_handler = ModuleFileHandler(directory, mode)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logging.getLogger().addHandler(QueueHandler(records))
+    _listener = QueueListener(records, file_handler, respect_handler_level=True)
+    _listener.start()
+    _directory = directory
+
+
+def setup_logging(level: Optional[Union[str, int]] = None, directory: Union[str, Path] = LOGS_DIR) -> None:
+    """ Общая настройка логирования процесса: записи уходят в очередь, файлы пишет один фоновый поток.
+    Повторный вызов меняет только уровень"""
+    root = logging.getLogger()
+    with _lock:
+        if _listener is not None:
+            if level is not None:
+                root.setLevel(_level(level))
+            return
+        root.setLevel(_level(level))
+        _start(directory)
+        atexit.register(stop_logging)
+
+
+def _after_fork() -> None:
+    """ В дочернем процессе нет потока родителя: очередь пересоздается, а файлы дописываются, а не перезаписываются"""
+    global _listener, _lock
+    _lock = threading.Lock()
+    if _listener is None:
+        return
+    _listener = None
+    _remove_queue_handlers(logging.getLogger())
+    _start(_directory, mode="a")
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _init_worker(records: multiprocessing.Queue, level: int) -> None:
+    """ Инициализация процесса пула: записи передаются в очередь родителя, свой поток записи не нужен"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+        root = logging.getLogger()
+        _remove_queue_handlers(root)
+        root.addHandler(QueueHandler(records))
+        root.setLevel(level)
+
+
+@contextmanager
+def worker_logging() -> Iterator[dict]:
+    """ Аргументы пула процессов (initializer, initargs), при которых записи процессов пула пишет поток родителя
+    в те же файлы logs/<модуль>.logs"""
+    setup_logging()
+    records = multiprocessing.Queue()
+    listener = QueueListener(records, *_listener.handlers, respect_handler_level=True)
+    listener.start()
+    try:
+        yield {"initializer": _init_worker, "initargs": (records, logging.getLogger().level)}
+    finally:
+        listener.stop()
+        records.close()
+
+
+def stop_logging() -> None:
+    """ Запись оставшихся сообщений и остановка фонового потока"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _remove_queue_handlers(logging.getLogger())
+        _listener = None
@@ -0,0 +1,296 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import CBR_URL, MARKET_CACHE, STOCKS_URL
+from src import metrics
+from src.writers import write_json
+
+logger = logging.getLogger('market')
+
+TIMEOUT = (3.05, 10)
+
+# Срок жизни значений кэша: None - до следующей публикации курсов ЦБ, число - фиксированный срок в секундах.
+# Курсы публикуются раз в день, поэтому повторные сборки в течение дня обходятся без сетевых запросов
+TTL: Optional[float] = None
+
+MOSCOW = timezone(timedelta(hours=3))
+PUBLICATION_TIME = (11, 30)
+MAX_WORKERS = 8
+
+
+class MarketDataError(Exception):
+    """ Ошибка запроса к API курсов валют и котировок"""
+
+    def __init__(self, status_code: int, url: str = "", reason: Optional[str] = None) -> None:
+        super().__init__(reason or f"Не успешный запрос, код ошибки: {status_code}")
+        self.status_code = status_code
+        self.url = url
+
+
+class MalformedResponseError(MarketDataError):
+    """ Ответ 200 без ожидаемых полей, например сообщение об ограничении частоты запросов"""
+
+
+Key = tuple[str, str]
+
+# Ошибки обращения к API, при которых отдаются сохраненные значения
+UPSTREAM_ERRORS = (requests.RequestException, MarketDataError)
+
+
+def next_publication(timestamp: float) -> float:
+    """ Момент ближайшей после timestamp публикации курсов ЦБ (ежедневно в 11:30 по Москве)"""
+    moment = datetime.fromtimestamp(timestamp, MOSCOW)
+    hour, minute = PUBLICATION_TIME
+    publication = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if moment >= publication:
+        publication += timedelta(days=1)
+    return publication.timestamp()
+
+
+class MarketDataClient:
+    """ Клиент курсов валют ЦБ и котировок акций с пулом соединений, таймаутами и кэшем до следующей публикации
+    курсов (или на ttl секунд).
+
+    Если задан cache_path, последние успешные значения сохраняются на диск. Устаревшие значения отдаются сразу
+    с пометкой stale, а обновление идет в фоне; при недоступности API отдается сохраненный снимок.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, cbr_url: str = CBR_URL, stocks_url: str = STOCKS_URL,
+                 timeout: Any = TIMEOUT, ttl: Optional[float] = TTL, max_workers: int = MAX_WORKERS,
+                 session: Optional[requests.Session] = None, cache_path: Optional[Union[str, Path]] = None) -> None:
+        self.api_key = api_key
+        self.cbr_url = cbr_url
+        self.stocks_url = stocks_url
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_workers = max_workers
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cache: dict[tuple[str, str], tuple[float, Any]] = {}
+        self._refreshing: set[tuple[str, str]] = set()
+        self._background: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """ Чтение сохраненного снимка курсов и котировок"""
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as file:
+                saved = json.load(file)
+            self._cache = {tuple(key.split(":", 1)): (timestamp, value) for key, (timestamp, value) in saved.items()}
+            logger.info("Загружен кэш рыночных данных: %s значений", len(self._cache))
+        except Exception as ex:
+            logger.error("Ошибка чтения кэша рыночных данных %s: %s", self.cache_path, ex)
+
+    def _save(self) -> None:
+        """ Атомарная запись снимка на диск"""
+        if self.cache_path is None:
+            return
+        with self._lock:
+            saved = {f"{kind}:{symbol}": list(entry) for (kind, symbol), entry in self._cache.items()}
+        try:
+            write_json(saved, self.cache_path, compact=True)
+        except Exception as ex:
+            logger.error("Ошибка записи кэша рыночных данных %s: %s", self.cache_path, ex)
+
+    def _store(self, values: dict[tuple[str, str], Any]) -> None:
+        """ Сохранение новых значений с отметкой времени"""
+        timestamp = time.time()
+        with self._lock:
+            for key, value in values.items():
+                self._cache[key] = (timestamp, value)
+        self._save()
+
+    def _get_json(self, url: str, params: Optional[dict] = None) -> Any:
+        """ GET-запрос с таймаутом, возвращает разобранный JSON"""
+        with metrics.stage("http", "get_json"):
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        if response.status_code != 200:
+            logger.error("Не успешный запрос %s, код ошибки: %s", url, response.status_code)
+            raise MarketDataError(response.status_code, url)
+        return response.json()
+
+    @staticmethod
+    def _malformed(url: str, body: Any, ex: Exception) -> MalformedResponseError:
+        """ Ответ 200 без ожидаемых полей, например сообщение об ограничении частоты запросов Alpha Vantage"""
+        logger.error("Неожиданный ответ %s: %s", url, str(body)[:200])
+        return MalformedResponseError(200, url, f"Неожиданный ответ API: нет поля {ex}")
+
+    def _refresh_rates(self, keys: list[tuple[str, str]]) -> None:
+        """ Загрузка документа ЦБ, сохраняются курсы всех валют из него"""
+        document = self._get_json(self.cbr_url)
+        try:
+            rates = {("rate", code): float(valute["Value"]) for code, valute in document["Valute"].items()}
+        except (KeyError, TypeError, ValueError, AttributeError) as ex:
+            raise self._malformed(self.cbr_url, document, ex) from ex
+        self._store(rates)
+
+    def _fetch_quote(self, symbol: str) -> None:
+        params = {"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": self.api_key}
+        body = self._get_json(self.stocks_url, params)
+        try:
+            price = float(body["Global Quote"]["02. open"])
+        except (KeyError, TypeError, ValueError) as ex:
+            raise self._malformed(self.stocks_url, body, ex) from ex
+        self._store({("stock", symbol): price})
+
+    def _try_fetch_quote(self, symbol: str) -> Optional[Exception]:
+        """ Загрузка котировки, ошибка API возвращается, а не выбрасывается"""
+        try:
+            self._fetch_quote(symbol)
+        except UPSTREAM_ERRORS as ex:
+            logger.warning("Котировка %s не получена: %s", symbol, ex)
+            return ex
+        return None
+
+    def _refresh_quotes(self, keys: list[tuple[str, str]]) -> None:
+        """ Параллельная загрузка котировок по тикерам; ошибка одного тикера не мешает остальным"""
+        symbols = [symbol for _, symbol in keys]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as executor:
+            errors = [ex for ex in executor.map(self._try_fetch_quote, symbols) if ex is not None]
+        if errors:
+            raise errors[0]
+
+    def _refresh_in_background(self, keys: list[tuple[str, str]],
+                               refresh: Callable[[list[tuple[str, str]]], None]) -> None:
+        """ Фоновое обновление устаревших значений, одно на ключ"""
+        with self._lock:
+            keys = [key for key in keys if key not in self._refreshing]
+            self._refreshing.update(keys)
+        if not keys:
+            return
+
+        def run() -> None:
+            try:
+                refresh(keys)
+            except Exception as ex:
+                logger.warning("Фоновое обновление не удалось, остаются сохраненные значения: %s", ex)
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(keys)
+
+        thread = threading.Thread(target=run, daemon=True)
+        self._background.append(thread)
+        thread.start()
+
+    def _fresh(self, timestamp: float, now: float) -> bool:
+        """ Значение, полученное в timestamp, еще не устарело"""
+        if self.ttl is None:
+            return now < next_publication(timestamp)
+        return now - timestamp < self.ttl
+
+    def _lookup(self, keys: list[Key], refresh: Callable[[list[Key]], None]) -> dict[Key, tuple[Any, Optional[float]]]:
+        """ Значения по ключам: (значение, время обновления для устаревших или None для свежих).
+
+        Ключи, которых нет ни в кэше, ни в ответе API, пропускаются; ошибка выбрасывается, только если не найдено
+        ни одного значения.
+        """
+        with self._lock:
+            entries = {key: self._cache.get(key) for key in keys}
+        now = time.time()
+        missing = [key for key in keys if entries[key] is None]
+        stale = [key for key in keys if entries[key] is not None and not self._fresh(entries[key][0], now)]
+        if missing:
+            error: Optional[Exception] = None
+            try:
+                refresh(list(dict.fromkeys(missing + stale)))
+            except UPSTREAM_ERRORS as ex:
+                error = ex
+                logger.warning("API недоступно, отдаются сохраненные значения: %s", ex)
+            with self._lock:
+                entries = {key: self._cache.get(key) for key in keys}
+            lost = [key[1] for key, entry in entries.items() if entry is None]
+            if len(lost) == len(entries):
+                raise error or KeyError(", ".join(lost))
+            if lost:
+                logger.warning("Нет данных для %s, они пропускаются", ", ".join(lost))
+        elif stale:
+            self._refresh_in_background(stale, refresh)
+        now = time.time()
+        return {key: (entry[1], None if self._fresh(entry[0], now) else entry[0])
+                for key, entry in entries.items() if entry is not None}
+
+    @staticmethod
+    def _record(record: dict, updated: Optional[float]) -> dict:
+        """ Пометка устаревшего значения"""
+        if updated is not None:
+            record["stale"] = True
+            record["updated_at"] = datetime.fromtimestamp(updated).strftime("%Y-%m-%d %H:%M:%S")
+        return record
+
+    def wait_refresh(self, timeout: Optional[float] = None) -> None:
+        """ Ожидание завершения фоновых обновлений"""
+        for thread in list(self._background):
+            thread.join(timeout)
+        self._background = [thread for thread in self._background if thread.is_alive()]
+
+    def clear(self) -> None:
+        """ Сброс кэша"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_rates(self, currencies: Iterable[str]) -> list[dict]:
+        """ Курсы валют из одного документа ЦБ на все запрошенные валюты; валюты без данных пропускаются"""
+        currencies = list(currencies)
+        if not currencies:
+            return []
+        values = self._lookup([("rate", currency) for currency in currencies], self._refresh_rates)
+        records = []
+        for currency in currencies:
+            if ("rate", currency) in values:
+                rate, updated = values[("rate", currency)]
+                records.append(self._record({"currency": currency, "rate": rate}, updated))
+        return records
+
+    def get_quote(self, symbol: str) -> float:
+        """ Цена открытия акции"""
+        return self._lookup([("stock", symbol)], self._refresh_quotes)[("stock", symbol)][0]
+
+    def get_quotes(self, symbols: Iterable[str]) -> list[dict]:
+        """ Цены акций, запросы по разным тикерам выполняются параллельно; тикеры без данных пропускаются"""
+        symbols = list(symbols)
+        if not symbols:
+            return []
+        values = self._lookup([("stock", symbol) for symbol in symbols], self._refresh_quotes)
+        records = []
+        for symbol in symbols:
+            if ("stock", symbol) in values:
+                price, updated = values[("stock", symbol)]
+                records.append(self._record({"stock": symbol, "price": price}, updated))
+        return records
+
+
+_client: Optional[MarketDataClient] = None
+_client_lock = threading.Lock()
+
+
+def get_market_client(api_key: Optional[str] = None) -> MarketDataClient:
+    """ Общий для процесса клиент рыночных данных"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MarketDataClient(api_key=api_key, cache_path=MARKET_CACHE)
+        return _client
+
+
+def set_market_client(client: Optional[MarketDataClient]) -> None:
+    """ Замена общего клиента, например клиентом локальной заглушки API; None сбрасывает клиента"""
+    global _client
+    with _client_lock:
+        _client = client
@@ -0,0 +1,205 @@
+""" Метрики этапов обработки: время, строки на входе и выходе, изменение памяти.
+
+Сбор выключен по умолчанию и включается enable() или переменной окружения METRICS=1; в выключенном состоянии
+обертка стоит одну проверку флага. Этапы: read, parse_dates, filter, groupby, serialize, http.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Union
+
+PREFIX = "operations"
+
+_enabled = os.getenv("METRICS", "0") == "1"
+_memory = False
+_lock = threading.Lock()
+_stages: dict[tuple[str, str], dict[str, float]] = {}
+
+
+def enable(memory: bool = False) -> None:
+    """ Включение сбора метрик; memory=True дополнительно считает изменение памяти через tracemalloc"""
+    global _enabled, _memory
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    global _enabled, _memory
+    _enabled = False
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memory = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """ Сброс накопленных метрик"""
+    with _lock:
+        _stages.clear()
+
+
+def _rows(value: Any) -> Optional[int]:
+    """ Количество строк датафрейма или записей списка, для остальных значений None"""
+    if isinstance(value, (str, bytes)) or not hasattr(value, "__len__"):
+        return None
+    return len(value)
+
+
+class Stage:
+    """ Замер одного выполнения этапа, rows_out можно задать внутри блока"""
+
+    __slots__ = ("name", "function", "rows_in", "rows_out", "_start", "_memory")
+
+    def __init__(self, name: str, function: str, rows_in: Optional[int] = None) -> None:
+        self.name = name
+        self.function = function
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self._memory = tracemalloc.get_traced_memory()[0] if _memory and tracemalloc.is_tracing() else None
+        self._start = time.perf_counter()
+
+    def finish(self) -> None:
+        elapsed = time.perf_counter() - self._start
+        delta = None
+        if self._memory is not None and tracemalloc.is_tracing():
+            delta = tracemalloc.get_traced_memory()[0] - self._memory
+        with _lock:
+            entry = _stages.setdefault((self.name, self.function), {
+                "calls": 0, "seconds": 0.0, "seconds_max": 0.0, "rows_in": 0, "rows_out": 0, "memory_delta": 0})
+            entry["calls"] += 1
+            entry["seconds"] += elapsed
+            entry["seconds_max"] = max(entry["seconds_max"], elapsed)
+            entry["rows_in"] += self.rows_in or 0
+            entry["rows_out"] += self.rows_out or 0
+            if delta is not None:
+                entry["memory_delta"] += delta
+
+
+class _NoStage:
+    """ Заглушка этапа при выключенных метриках"""
+
+    __slots__ = ()
+    rows_in = rows_out = None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+@contextmanager
+def stage(name: str, function: str, rows_in: Any = None) -> Iterator[Union[Stage, _NoStage]]:
+    """ Замер блока кода как этапа name функции function"""
+    if not _enabled:
+        yield _NO_STAGE
+        return
+    current = Stage(name, function, _rows(rows_in))
+    try:
+        yield current
+    finally:
+        current.finish()
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """ Декоратор этапа: строки на входе - по первому аргументу, на выходе - по результату"""
+    def decorator(func: Callable) -> Callable:
+        function = func.__name__
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return func(*args, **kwargs)
+            current = Stage(name, function, _rows(args[0]) if args else None)
+            try:
+                result = func(*args, **kwargs)
+                current.rows_out = _rows(result)
+                return result
+            finally:
+                current.finish()
+
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> dict[str, dict[str, dict[str, float]]]:
+    """ Метрики по этапам и функциям: {этап: {функция: {calls, seconds, seconds_max, rows_in, rows_out,
+    memory_delta}}}"""
+    result: dict[str, dict[str, dict[str, float]]] = {}
+    with _lock:
+        for (name, function), entry in sorted(_stages.items()):
+            result.setdefault(name, {})[function] = {
+                key: round(value, 6) if isinstance(value, float) else value for key, value in entry.items()}
+    return result
+
+
+def to_json(indent: Optional[int] = 2) -> str:
+    return json.dumps(snapshot(), ensure_ascii=False, indent=indent)
+
+
+def to_prometheus() -> str:
+    """ Метрики в текстовом формате Prometheus"""
+    series = {
+        "calls": ("calls_total", "counter", "Количество выполнений этапа"),
+        "seconds": ("seconds_total", "counter", "Суммарное время этапа, секунды"),
+        "seconds_max": ("seconds_max", "gauge", "Максимальное время одного выполнения, секунды"),
+        "rows_in": ("rows_in_total", "counter", "Строк на входе"),
+        "rows_out": ("rows_out_total", "counter", "Строк на выходе"),
+        "memory_delta": ("memory_delta_bytes", "gauge", "Суммарное изменение памяти по tracemalloc, байты"),
+    }
+    metrics = snapshot()
+    lines = []
+    for key, (suffix, kind, description) in series.items():
+        metric = f"{PREFIX}_stage_{suffix}"
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, functions in metrics.items():
+            for function, entry in functions.items():
+                lines.append(f'{metric}{{stage="{name}",function="{function}"}} {entry[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def write(path: Union[str, Path]) -> None:
+    """ Запись метрик в файл: .prom - формат Prometheus, иначе JSON"""
+    path = Path(path)
+    path.write_text(to_prometheus() if path.suffix == ".prom" else to_json(), encoding="utf-8")
+
+
+@contextmanager
+def profile(path: Optional[Union[str, Path]] = None, memory: bool = True, top: int = 20) -> Iterator[dict]:
+    """ Профилирование одного запуска: cProfile и, по желанию, tracemalloc.
+    В словарь результата попадают текстовые отчеты 'cpu' и 'memory'; при path статистика cProfile сохраняется"""
+    report: dict[str, str] = {}
+    profiler = cProfile.Profile()
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        if path is not None:
+            profiler.dump_stats(str(path))
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+        report["cpu"] = text.getvalue()
+        if memory:
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+            report["memory"] = "\n".join(str(line) for line in statistics)
+            if started_tracing:
+                tracemalloc.stop()
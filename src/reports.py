@@ -1,19 +1,26 @@
-import json
 import logging
 from datetime import datetime, timedelta
 from functools import wraps
-from typing import Optional
+from typing import Iterable, Optional, Union
 
+import numpy as np
 import pandas as pd
 
-from config import BASE_DIR, LOGS_REPORTS, PATH_DATA
+from config import BASE_DIR, PATH_DATA
+from src import metrics
+from src.database import OperationsDatabase
+from src.dates import parse_moment
+from src.logger import setup_logging
+from src.rollup import CategoryRollup
+from src.schema import to_kopecks
+from src.store import get_operations
+from src.utils import slice_by_date
+from src.writers import write_json
 
 logger = logging.getLogger('reports')
-logging.basicConfig(
-    filename=LOGS_REPORTS,
-    level=logging.INFO, filemode='w', encoding='utf-8',
-    format='[%(asctime)s.%(msecs)03d] - [%(name)r] - [%(levelname)-s] - %(message)s',
-)
+setup_logging()
+
+BATCH_REPORT_FILE = "batch_report_file.json"
 
 
 def get_expenses_by_category_report(filename=None):
@@ -22,13 +29,13 @@ def get_expenses_by_category_report(filename=None):
         @wraps(func)
         def inner(*args, **kwargs):
             df = func(*args, **kwargs)
-            logger.info("Проверка файла")
+            logger.debug("Проверка файла")
             if filename:
-                logger.info("Проверка, являются ли данные датафреймом")
+                logger.debug("Проверка, являются ли данные датафреймом")
                 if isinstance(df, pd.DataFrame):
                     logger.info("Запись отчёта в файл")
-                    with open(BASE_DIR / "logs" / filename, "w", encoding="UTF-8") as f:
-                        json.dump(df.to_dict(), f, ensure_ascii=False, indent=4)
+                    with metrics.stage("serialize", func.__name__, df):
+                        write_json(df.to_dict(), BASE_DIR / "logs" / filename)
                 else:
                     logger.error("Данные не являются датафреймом. В файл записаны не будут")
             else:
@@ -36,8 +43,8 @@ def get_expenses_by_category_report(filename=None):
                 if isinstance(df, pd.DataFrame):
                     date = datetime.now().strftime("%d.%m.%Y")
                     logger.info("Запись отчёта в файл")
-                    with open(BASE_DIR / "data" / f"{date}-report_file.json", "w", encoding="UTF-8") as f:
-                        json.dump(df.to_dict(), f, ensure_ascii=False, indent=4)
+                    with metrics.stage("serialize", func.__name__, df):
+                        write_json(df.to_dict(), BASE_DIR / "data" / f"{date}-report_file.json")
                 else:
                     logger.error("Данные не являются датафреймом. В файл записаны не будут")
             return df
@@ -47,27 +54,53 @@ def get_expenses_by_category_report(filename=None):
     return wrapper
 
 
+@metrics.timed("filter")
+def _category_total(df: Union[pd.DataFrame, OperationsDatabase], category: str, date_from: datetime,
+                    date_to: datetime) -> tuple[float, int]:
+    """ Сумма и количество операций категории за период для одного датафрейма или запросом к базе"""
+    if isinstance(df, OperationsDatabase):
+        return df.category_total(category, date_from, date_to)
+    if 'Категория' not in df:
+        logger.error("В файле отсутствует колонка 'Категория'")
+        raise TypeError("В файле отсутствует колонка 'Категория'")
+    window = slice_by_date(df, date_from, date_to)
+    filtered_data = window[window["Категория"] == category]
+    return to_kopecks(filtered_data["Сумма операции"]).sum() / 100, len(filtered_data)
+
+
+def _category_total_rollup(df: pd.DataFrame, rollup: CategoryRollup, category: str, date_from: datetime,
+                           date_to: datetime) -> tuple[float, int]:
+    """ Сумма категории за период: полные дни из свертки, неполные крайние дни из датафрейма"""
+    day_from = pd.Timestamp(date_from).normalize()
+    day_to = pd.Timestamp(date_to).normalize()
+    if day_from == day_to:
+        return _category_total(df, category, date_from, date_to)
+    next_day = day_from + pd.Timedelta(days=1)
+    head_total, head_count = _category_total(df, category, date_from, next_day - pd.Timedelta(1, "ns"))
+    tail_total, tail_count = _category_total(df, category, day_to, date_to)
+    middle_total, middle_count = rollup.total(category, next_day, day_to - pd.Timedelta(days=1))
+    return head_total + middle_total + tail_total, head_count + middle_count + tail_count
+
+
 @get_expenses_by_category_report()
-def expenses_by_category(df: pd.DataFrame, category: str, date: Optional[str] = None) -> pd.DataFrame:
+def expenses_by_category(df: Union[pd.DataFrame, Iterable[pd.DataFrame], OperationsDatabase], category: str,
+                         date: Optional[str] = None, rollup: Optional[CategoryRollup] = None) -> pd.DataFrame:
     """Функция возвращает траты по заданной категории за последние три месяца (от переданной даты)."""
-    logger.info("Начало обработки данных")
+    logger.debug("Начало обработки данных")
     try:
-        logger.info("Чтение данных из файла: %s", PATH_DATA)
-        df = pd.read_excel(PATH_DATA)
-        if 'Категория' not in df:
-            logger.error("В файле отсутствует колонка 'Категория'")
-            raise TypeError("В файле отсутствует колонка 'Категория'")
-        if date is None:
-            date = datetime.now()
-        else:
-            date = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+        date = datetime.now() if date is None else parse_moment(date)
         three_months = date - timedelta(days=90)
-        df["Дата операции"] = pd.to_datetime(df["Дата операции"], format="%d.%m.%Y %H:%M:%S")
-        filtered_data = df[
-            (df["Категория"] == category) & (df["Дата операции"] >= three_months) & (df["Дата операции"] <= date)
-            ]
-        if filtered_data.empty:
-            logger.warning(f"Нет расходов для категории '{category}' за указанный период.")
+        chunks = [df] if isinstance(df, (pd.DataFrame, OperationsDatabase)) else df
+        total_spend, count = 0.0, 0
+        if rollup is not None and isinstance(df, pd.DataFrame):
+            total_spend, count = _category_total_rollup(df, rollup, category, three_months, date)
+            chunks = []
+        for chunk in chunks:
+            chunk_total, chunk_count = _category_total(chunk, category, three_months, date)
+            total_spend += chunk_total
+            count += chunk_count
+        if count == 0:
+            logger.warning("Нет расходов для категории '%s' за указанный период.", category)
             return pd.DataFrame(
                 {
                     "category": [category],
@@ -76,7 +109,6 @@ def expenses_by_category(df: pd.DataFrame, category: str, date: Optional[str] =
                     "date_to": [date.strftime("%d.%m.%Y")],
                 }
             )
-        total_spend = filtered_data["Сумма операции"].sum()
         report_file = pd.DataFrame(
             {
                 "category": [category],
@@ -85,7 +117,7 @@ def expenses_by_category(df: pd.DataFrame, category: str, date: Optional[str] =
                 "date_to": [date.strftime("%d.%m.%Y")],
             }
         )
-        logger.info(f"Отчет создан для категории '{category}'")
+        logger.info("Отчет создан для категории '%s'", category)
         return report_file
     except FileNotFoundError:
         logger.error("Произошла ошибка: Файл не найден")
@@ -95,6 +127,56 @@ def expenses_by_category(df: pd.DataFrame, category: str, date: Optional[str] =
         return pd.DataFrame({"ERROR": [f"Произошла ошибка: {str(ex)}"]})
 
 
+@get_expenses_by_category_report(BATCH_REPORT_FILE)
+def expenses_by_category_batch(df: pd.DataFrame,
+                               requests: Iterable[tuple[str, Optional[str], int]]) -> pd.DataFrame:
+    """Функция возвращает траты по списку запросов (категория, дата, окно в днях) за один проход по данным."""
+    logger.info("Начало пакетной обработки данных")
+    try:
+        if 'Категория' not in df:
+            logger.error("В файле отсутствует колонка 'Категория'")
+            raise TypeError("В файле отсутствует колонка 'Категория'")
+        batch = pd.DataFrame(list(requests), columns=["category", "date", "window_days"])
+        now = datetime.now()
+        dates_to = [now if date is None else parse_moment(date) for date in batch["date"]]
+        batch["date_to"] = pd.to_datetime(dates_to)
+        batch["date_from"] = batch["date_to"] - pd.to_timedelta(batch["window_days"], unit="D")
+
+        subset = slice_by_date(df, batch["date_from"].min(), batch["date_to"].max())
+        subset = subset[subset["Категория"].isin(batch["category"].unique())]
+        subset = subset.sort_values(["Категория", "Дата операции"], kind="stable")
+        dates = subset["Дата операции"].to_numpy()
+        prefix = np.concatenate([[0], np.cumsum(to_kopecks(subset["Сумма операции"]))])
+        positions = subset.groupby("Категория", sort=False, observed=True).indices
+
+        totals, counts = [], []
+        for category, date_from, date_to in zip(batch["category"], batch["date_from"], batch["date_to"]):
+            rows = positions.get(category)
+            if rows is None:
+                totals.append(0.0)
+                counts.append(0)
+                continue
+            first, last = rows[0], rows[-1] + 1
+            start = first + dates[first:last].searchsorted(np.datetime64(date_from), side="left")
+            end = first + dates[first:last].searchsorted(np.datetime64(date_to), side="right")
+            totals.append(float(prefix[end] - prefix[start]) / 100)
+            counts.append(int(end - start))
+        report_file = pd.DataFrame(
+            {
+                "category": batch["category"],
+                "total_expenses": totals,
+                "operations": counts,
+                "date_from": batch["date_from"].dt.strftime("%d.%m.%Y"),
+                "date_to": batch["date_to"].dt.strftime("%d.%m.%Y"),
+            }
+        )
+        logger.info("Пакетный отчет создан: %s запросов", len(report_file))
+        return report_file
+    except Exception as ex:
+        logger.error("Произошла ошибка: %s", ex)
+        return pd.DataFrame({"ERROR": [f"Произошла ошибка: {str(ex)}"]})
+
+
 if __name__ == "__main__":
-    result = expenses_by_category(PATH_DATA, 'Связь')
+    result = expenses_by_category(get_operations(PATH_DATA), 'Связь')
     print(result)
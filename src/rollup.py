@@ -0,0 +1,155 @@
+import logging
+from datetime import datetime
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.schema import to_kopecks
+from src.utils import card_records, card_totals, top_records, top_rows
+
+logger = logging.getLogger('rollup')
+
+DAY = np.timedelta64(1, "D")
+
+
+def _day(date: Union[str, datetime, pd.Timestamp]) -> np.datetime64:
+    """ Дата без времени в формате numpy"""
+    return np.datetime64(pd.Timestamp(date).normalize().date(), "D")
+
+
+class CategoryRollup:
+    """ Предагрегированные суммы и количества операций по категории (и карте) и дню с префиксными суммами"""
+
+    def __init__(self, by_card: bool = False) -> None:
+        self.by_card = by_card
+        self._rows: dict[tuple, int] = {}
+        self._rows_by_category: dict[str, list[int]] = {}
+        self._origin: Optional[np.datetime64] = None
+        self._daily_totals = np.zeros((0, 0), dtype=np.int64)
+        self._daily_counts = np.zeros((0, 0), dtype=np.int64)
+        self._prefix_totals = np.zeros((0, 1), dtype=np.int64)
+        self._prefix_counts = np.zeros((0, 1), dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, by_card: bool = False) -> "CategoryRollup":
+        """ Построение свертки по датафрейму операций"""
+        rollup = cls(by_card=by_card)
+        rollup.append(df)
+        return rollup
+
+    @property
+    def days(self) -> int:
+        """ Количество дней в свертке"""
+        return self._daily_totals.shape[1]
+
+    def _keys(self) -> list[str]:
+        return ["Категория", "Номер карты"] if self.by_card else ["Категория"]
+
+    def _group(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ Суммы в копейках и количества операций по ключу и дню"""
+        df = df[df["Категория"].notna()]
+        frame = pd.DataFrame({key: df[key].astype(object).where(df[key].notna(), None).to_numpy()
+                              for key in self._keys()})
+        frame["day"] = df["Дата операции"].to_numpy().astype("datetime64[D]")
+        frame["total"] = to_kopecks(df["Сумма операции"])
+        grouped = frame.groupby(self._keys() + ["day"], sort=False, dropna=False)["total"]
+        return grouped.agg(["sum", "size"]).reset_index()
+
+    def _extend_days(self, first: np.datetime64, last: np.datetime64) -> None:
+        """ Расширение диапазона дней свертки"""
+        if self._origin is None:
+            self._origin = first
+        keys = self._daily_totals.shape[0]
+        before = max(int((self._origin - first) / DAY), 0)
+        if before:
+            self._origin = first
+            pad = np.zeros((keys, before), dtype=np.int64)
+            self._daily_totals = np.hstack([pad, self._daily_totals])
+            self._daily_counts = np.hstack([pad, self._daily_counts])
+            self._prefix_totals = np.hstack([pad, self._prefix_totals])
+            self._prefix_counts = np.hstack([pad, self._prefix_counts])
+        after = max(int((last - self._origin) / DAY) + 1 - self.days, 0)
+        if after:
+            pad = np.zeros((keys, after), dtype=np.int64)
+            self._daily_totals = np.hstack([self._daily_totals, pad])
+            self._daily_counts = np.hstack([self._daily_counts, pad])
+            self._prefix_totals = np.hstack([self._prefix_totals, np.repeat(self._prefix_totals[:, -1:], after, 1)])
+            self._prefix_counts = np.hstack([self._prefix_counts, np.repeat(self._prefix_counts[:, -1:], after, 1)])
+
+    def _row(self, key: tuple) -> int:
+        """ Номер строки ключа, новые ключи добавляются нулевой строкой"""
+        if key not in self._rows:
+            self._rows[key] = len(self._rows)
+            self._rows_by_category.setdefault(key[0], []).append(self._rows[key])
+            self._daily_totals = np.vstack([self._daily_totals, np.zeros((1, self.days), dtype=np.int64)])
+            self._daily_counts = np.vstack([self._daily_counts, np.zeros((1, self.days), dtype=np.int64)])
+            self._prefix_totals = np.vstack([self._prefix_totals, np.zeros((1, self.days + 1), dtype=np.int64)])
+            self._prefix_counts = np.vstack([self._prefix_counts, np.zeros((1, self.days + 1), dtype=np.int64)])
+        return self._rows[key]
+
+    def append(self, df: pd.DataFrame) -> None:
+        """ Добавление новых операций с пересчетом префиксных сумм только затронутых строк"""
+        grouped = self._group(df)
+        if grouped.empty:
+            return
+        days = grouped["day"].to_numpy().astype("datetime64[D]")
+        self._extend_days(days.min(), days.max())
+        rows = np.array([self._row(key) for key in grouped[self._keys()].itertuples(index=False, name=None)])
+        columns = ((days - self._origin) / DAY).astype(np.int64)
+        np.add.at(self._daily_totals, (rows, columns), grouped["sum"].to_numpy(dtype=np.int64))
+        np.add.at(self._daily_counts, (rows, columns), grouped["size"].to_numpy(dtype=np.int64))
+        start = int(columns.min())
+        affected = np.unique(rows)
+        for prefix, daily in ((self._prefix_totals, self._daily_totals), (self._prefix_counts, self._daily_counts)):
+            running = np.cumsum(daily[affected, start:], axis=1)
+            prefix[affected, start + 1:] = prefix[affected, start:start + 1] + running
+        logger.info("Свертка обновлена: %s строк, %s дней", len(grouped), self.days)
+
+    def total(self, category: str, date_from: Union[str, datetime], date_to: Union[str, datetime],
+              card: Optional[str] = None) -> tuple[float, int]:
+        """ Сумма в рублях и количество операций категории за дни [date_from, date_to] включительно"""
+        rows = self._rows_by_category.get(category, [])
+        if card is not None:
+            rows = [self._rows[(category, card)]] if (category, card) in self._rows else []
+        if not rows or self._origin is None:
+            return 0.0, 0
+        start = max(int((_day(date_from) - self._origin) / DAY), 0)
+        end = min(int((_day(date_to) - self._origin) / DAY), self.days - 1)
+        if start > end:
+            return 0.0, 0
+        total = self._prefix_totals[rows, end + 1] - self._prefix_totals[rows, start]
+        count = self._prefix_counts[rows, end + 1] - self._prefix_counts[rows, start]
+        return float(total.sum()) / 100, int(count.sum())
+
+
+class RunningAggregates:
+    """ Агрегаты, обновляемые добавлением новых операций: суммы по картам, свертка категорий и кандидаты топа"""
+
+    def __init__(self, top_n: int = 5) -> None:
+        self.top_n = top_n
+        self.card_totals: Optional[pd.DataFrame] = None
+        self.top: Optional[pd.DataFrame] = None
+        self.rollup = CategoryRollup()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, top_n: int = 5) -> "RunningAggregates":
+        aggregates = cls(top_n=top_n)
+        aggregates.append(df)
+        return aggregates
+
+    def append(self, df: pd.DataFrame) -> None:
+        """ Учет новых операций без пересчета по всей истории"""
+        part = card_totals(df)
+        self.card_totals = part if self.card_totals is None else self.card_totals.add(part, fill_value=0)
+        candidates = df if self.top is None else pd.concat([self.top, df], ignore_index=True)
+        self.top = top_rows(candidates, self.top_n)
+        self.rollup.append(df)
+
+    def cards(self) -> list[dict]:
+        """ Суммы платежей и кешбека по картам"""
+        return [] if self.card_totals is None else card_records(self.card_totals)
+
+    def top_transactions(self) -> list[dict]:
+        """ Топ транзакций по сумме платежа"""
+        return [] if self.top is None else top_records(self.top)
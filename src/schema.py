@@ -0,0 +1,95 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('schema')
+
+CATEGORY = "category"
+MONEY = "money"
+INTEGER = "integer"
+
+OPERATIONS_SCHEMA = {
+    "Номер карты": CATEGORY,
+    "Статус": CATEGORY,
+    "Валюта операции": CATEGORY,
+    "Валюта платежа": CATEGORY,
+    "Категория": CATEGORY,
+    "Описание": CATEGORY,
+    "Сумма операции": MONEY,
+    "Сумма платежа": MONEY,
+    "Кэшбэк": MONEY,
+    "Бонусы (включая кэшбэк)": MONEY,
+    "Округление на инвесткопилку": MONEY,
+    "Сумма операции с округлением": MONEY,
+    "MCC": INTEGER,
+}
+
+# Доля уникальных значений, выше которой колонка остается строковой
+CATEGORY_MAX_RATIO = 0.5
+
+
+def memory_usage(df: pd.DataFrame) -> int:
+    """ Объем памяти датафрейма в байтах с учетом строк"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def to_kopecks(amounts: pd.Series) -> np.ndarray:
+    """ Перевод сумм в рублях в целые копейки для точного суммирования"""
+    return np.round(amounts.fillna(0).to_numpy(dtype=np.float64) * 100).astype(np.int64)
+
+
+def _to_category(values: pd.Series) -> pd.Series:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    if len(values) and values.nunique() / len(values) > CATEGORY_MAX_RATIO:
+        return values
+    return values.astype(CATEGORY)
+
+
+# Допустимое отклонение суммы от целого числа копеек (в копейках), больше - суммы округляются с предупреждением
+KOPECK_TOLERANCE = 1e-6
+
+
+def _to_money(values: pd.Series) -> pd.Series:
+    """ Суммы в рублях float64, доли копеек округляются до копейки с предупреждением"""
+    values = pd.to_numeric(values).astype(np.float64)
+    kopecks = values.to_numpy() * 100
+    rounded = np.round(kopecks)
+    fractional = np.abs(kopecks - rounded) > KOPECK_TOLERANCE
+    if fractional.any():
+        logger.warning("В колонке '%s' %s сумм не кратны копейке, они округлены до копейки",
+                       values.name, int(fractional.sum()))
+        values = pd.Series(rounded / 100, index=values.index, name=values.name)
+    return values
+
+
+def _to_integer(values: pd.Series) -> pd.Series:
+    """ Целые значения с пропусками в наименьшем подходящем nullable-типе"""
+    values = pd.to_numeric(values)
+    present = values.dropna()
+    if not np.array_equal(present, np.round(present)):
+        raise ValueError(f"Колонка '{values.name}' содержит нецелые значения")
+    for dtype in ("Int8", "Int16", "Int32", "Int64"):
+        info = np.iinfo(dtype.lower())
+        if present.empty or (present.min() >= info.min and present.max() <= info.max):
+            return values.astype(dtype)
+    return values
+
+
+CONVERTERS = {CATEGORY: _to_category, MONEY: _to_money, INTEGER: _to_integer}
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """ Приведение таблицы операций к компактной схеме: категории, проверенные суммы, уменьшенные целые"""
+    before = memory_usage(df)
+    columns = {}
+    for column, kind in OPERATIONS_SCHEMA.items():
+        if column in df:
+            columns[column] = CONVERTERS[kind](df[column])
+    df = df.assign(**columns)
+    after = memory_usage(df)
+    df.attrs["memory_before"] = before
+    df.attrs["memory_after"] = after
+    logger.info("Схема применена: память %s -> %s байт", before, after)
+    return df
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from src import metrics
+from src.store import OperationsStore, get_store
+
+logger = logging.getLogger('server')
+
+HOST = "127.0.0.1"
+PORT = 8080
+MAX_WORKERS = 4
+REQUEST_TIMEOUT = 30.0
+MAX_HEADER_SIZE = 16 * 1024
+
+
+class BadRequest(Exception):
+    """ Неверные параметры запроса"""
+
+
+class OperationsService:
+    """ HTTP-сервис на asyncio: данные операций, свертки и кэш курсов живут в одном процессе.
+
+    Расчеты pandas выполняются в пуле потоков, одинаковые одновременные запросы объединяются в один расчет.
+    """
+
+    def __init__(self, store: Optional[OperationsStore] = None, max_workers: int = MAX_WORKERS) -> None:
+        self.store = store or get_store()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="service")
+        self.routes: dict[str, Callable[[dict], Any]] = {
+            "/dashboard": self.dashboard,
+            "/search": self.search,
+            "/report": self.report,
+            "/health": self.health,
+            "/metrics": self.metrics,
+        }
+        self.computed = 0
+        self.coalesced = 0
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def dashboard(self, params: dict) -> Any:
+        from src.views import dictionary
+
+        date = _param(params, "date") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return dictionary(date, store=self.store)
+
+    def search(self, params: dict) -> Any:
+        from src.services import get_name_filter
+
+        patterns = params.get("patterns")
+        return get_name_filter(self.store.get(), patterns[-1].split(",") if patterns else None)
+
+    def report(self, params: dict) -> Any:
+        from src.reports import expenses_by_category
+
+        category = _param(params, "category", required=True)
+        report = expenses_by_category(self.store.get(), category, _param(params, "date"),
+                                      rollup=self.store.rollup())
+        return report.to_dict(orient="records")
+
+    def health(self, params: dict) -> Any:
+        return {"status": "ok", "version": self.store.version, "computed": self.computed,
+                "coalesced": self.coalesced}
+
+    def metrics(self, params: dict) -> Any:
+        """ Метрики этапов: JSON или текст Prometheus при format=prometheus"""
+        if _param(params, "format") == "prometheus":
+            return metrics.to_prometheus()
+        return metrics.snapshot()
+
+    async def call(self, route: str, params: dict) -> Any:
+        """ Результат маршрута; одинаковый запрос, уже выполняющийся, не запускается повторно"""
+        handler = self.routes[route]
+        key = (route, tuple(sorted((name, tuple(values)) for name, values in params.items())))
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, handler, params)
+        self._in_flight[key] = future
+        self.computed += 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _respond(self, request: str) -> tuple[HTTPStatus, Any]:
+        parts = request.split()
+        if len(parts) != 3:
+            return HTTPStatus.BAD_REQUEST, {"error": "Неверная строка запроса"}
+        method, target, _ = parts
+        url = urlsplit(target)
+        if url.path not in self.routes:
+            return HTTPStatus.NOT_FOUND, {"error": f"Неизвестный маршрут {url.path}"}
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Поддерживается только GET"}
+        try:
+            return HTTPStatus.OK, await self.call(url.path, parse_qs(url.query))
+        except BadRequest as ex:
+            return HTTPStatus.BAD_REQUEST, {"error": str(ex)}
+        except Exception as ex:
+            logger.error("Ошибка обработки %s: %s", target, ex)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(ex)}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Один запрос на соединение: чтение заголовков, расчет и ответ JSON (метрики Prometheus - текстом)"""
+        request = ""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+            request = head.split(b"\r\n", 1)[0].decode("latin-1")
+            status, body = await self._respond(request)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            status, body = HTTPStatus.BAD_REQUEST, {"error": "Неполный запрос"}
+        if isinstance(body, str):
+            content_type, data = "text/plain; version=0.0.4", body.encode("utf-8")
+        else:
+            content_type = "application/json"
+            data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                     f"Content-Type: {content_type}; charset=utf-8\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        try:
+            await writer.drain()
+        except ConnectionError as ex:
+            logger.warning("Клиент закрыл соединение: %s", ex)
+        finally:
+            writer.close()
+        logger.info("%s %s", status.value, request)
+
+    async def start(self, host: str = HOST, port: int = PORT) -> asyncio.AbstractServer:
+        """ Загрузка данных и запуск сервера; порт 0 выбирает свободный порт"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.store.get)
+        self._server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_SIZE)
+        logger.info("Сервис запущен на %s:%s", host, self.port)
+        return self._server
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._server.sockets[0].getsockname()[1] if self._server else None
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _param(params: dict, name: str, required: bool = False) -> Optional[str]:
+    values = params.get(name)
+    if not values:
+        if required:
+            raise BadRequest(f"Не указан параметр {name}")
+        return None
+    return values[-1]
+
+
+async def _serve(service: OperationsService, host: str, port: int) -> None:
+    server = await service.start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def run(host: str = HOST, port: int = PORT, store: Optional[OperationsStore] = None,
+        max_workers: int = MAX_WORKERS) -> None:
+    """ Запуск сервиса до прерывания"""
+    service = OperationsService(store, max_workers=max_workers)
+    try:
+        asyncio.run(_serve(service, host, port))
+    except KeyboardInterrupt:
+        logger.info("Сервис остановлен")
@@ -1,39 +1,84 @@
 import logging
 import re
+from functools import lru_cache
+from typing import Iterable, Optional, Union
 
+import numpy as np
 import pandas as pd
 
-from config import LOGS_SERVICES, PATH_DATA, W_JSON_SERVICES
+from config import W_JSON_SERVICES
+from src import metrics
+from src.database import OperationsDatabase
+from src.logger import setup_logging
+from src.writers import JSON, frame_records, write_records
 
 logger = logging.getLogger('services')
-logging.basicConfig(
-    filename=LOGS_SERVICES,
-    level=logging.INFO, filemode='w', encoding='utf-8',
-    format='[%(asctime)s.%(msecs)03d] - [%(name)r] - [%(levelname)-7s] - %(message)s',
-)
+setup_logging()
 
+TRANSFER_CATEGORY = 'Переводы'
 
-def get_name_filter(df: pd.DataFrame) -> list[dict]:
-    """ Функция для поиска переводов физическим лицам"""
+NAME_PATTERNS = {
+    'initial': r'\b[А-Я][а-я]+\s[А-Я]\.',
+    'full_name': r'\b[А-ЯЁ][а-яё]+\s[А-ЯЁ][а-яё]+\s[А-ЯЁ]\.',
+    'patronymic': r'\b[А-ЯЁ][а-яё]+\s[А-ЯЁ][а-яё]+(?:вич|вна|ична|инична)\b',
+    'latin': r'\b[A-Z][a-z]+\s[A-Z]\.',
+}
+
+
+@lru_cache(maxsize=32)
+def _compile(patterns: tuple[str, ...]) -> re.Pattern:
+    """ Один скомпилированный шаблон из нескольких: все варианты проверяются за один проход"""
+    sources = [NAME_PATTERNS.get(pattern, pattern) for pattern in patterns]
+    return re.compile("|".join(f"(?:{source})" for source in sources))
+
+
+@lru_cache(maxsize=65536)
+def _is_person(name_pattern: re.Pattern, description: str) -> bool:
+    """ Результат поиска имени в описании, кэшируется: описания часто повторяются"""
+    return name_pattern.search(description) is not None
+
+
+def _category_mask(categories: pd.Series, category: str) -> np.ndarray:
+    """ Маска категории: для categorical сравниваются целочисленные коды"""
+    if isinstance(categories.dtype, pd.CategoricalDtype):
+        if category not in categories.cat.categories:
+            return np.zeros(len(categories), dtype=bool)
+        return categories.cat.codes.to_numpy() == categories.cat.categories.get_loc(category)
+    return (categories == category).to_numpy(dtype=bool)
+
+
+@metrics.timed("filter")
+def find_transfers(df: Union[pd.DataFrame, OperationsDatabase],
+                   patterns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """ Переводы физическим лицам: сначала отбор по категории, затем поиск имени по уникальным описаниям"""
+    name_pattern = _compile(tuple(patterns or ('initial',)))
+    if isinstance(df, OperationsDatabase):
+        return df.transfers(TRANSFER_CATEGORY, name_pattern.pattern)
+    transfers = df[_category_mask(df['Категория'], TRANSFER_CATEGORY)]
+    codes, descriptions = pd.factorize(transfers['Описание'])
+    if len(descriptions) == 0:
+        return transfers.iloc[:0]
+    matched = np.array([_is_person(name_pattern, description) for description in descriptions], dtype=bool)
+    return transfers[(codes >= 0) & matched[codes]]
+
+
+def get_name_filter(df: Union[pd.DataFrame, OperationsDatabase], patterns: Optional[Iterable[str]] = None,
+                    fmt: str = JSON, compact: Optional[bool] = None, records: bool = True) -> Union[list[dict], int]:
+    """ Функция для поиска переводов физическим лицам, записи пишутся в файл (JSON или JSON Lines).
+    Возвращает список записей - его отдает маршрут /search; при records=False записи только пишутся в файл потоком,
+    без списка в памяти, и возвращается их количество"""
     try:
-        logger.info("Начало обработки данных")
-        logger.info(f"Чтение данных из файла: {PATH_DATA}")
-        df = pd.read_excel(PATH_DATA)
-        logger.info("Создание паттерна для поиска имен")
-        name_pattern = re.compile(r'\b[А-Я][а-я]+\s[А-Я]\.')
-        logger.info("Фильтрация транзакций")
-        filtered_df = df[(df['Категория'] == 'Переводы') & (df['Описание'].str.contains(name_pattern))]
+        logger.debug("Начало обработки данных")
+        logger.debug("Фильтрация транзакций")
+        filtered_df = find_transfers(df, patterns)
         filtered_df = filtered_df[['Описание', 'Сумма платежа']]
-        logger.info(f"Найдено записей: {len(filtered_df)}")
-        logger.info("Конвертация данных в JSON формат")
-        json_data = filtered_df.to_json(orient='records', force_ascii=False, indent=2)
-        logger.info(f"Сохранение JSON в файл: {W_JSON_SERVICES}")
-        with open(W_JSON_SERVICES, 'w', encoding='utf-8') as file:
-            file.write(json_data)
+        logger.info("Найдено записей: %s", len(filtered_df))
+        logger.info("Сохранение JSON в файл: %s", W_JSON_SERVICES)
+        with metrics.stage("serialize", "get_name_filter", filtered_df) as stage:
+            result = list(frame_records(filtered_df)) if records else frame_records(filtered_df)
+            count = stage.rows_out = write_records(result, W_JSON_SERVICES, fmt=fmt, compact=compact)
         logger.info("Обработка завершена успешно")
-        return json_data
+        return result if records else count
     except Exception as e:
-        logger.error(f"Произошла ошибка: {str(e)}")
+        logger.error("Произошла ошибка: %s", e)
         raise
-
-
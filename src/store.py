@@ -0,0 +1,349 @@
+import json
+import logging
+import os
+import pickle
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import pandas as pd
+
+from config import PATH_DATA
+from src import metrics
+from src.logger import setup_logging
+from src.rollup import CategoryRollup, RunningAggregates
+from src.schema import apply_schema
+from src.utils import parse_operations, read_excel, slice_by_date, sort_by_date
+
+logger = logging.getLogger('store')
+setup_logging()
+
+
+CACHE_SUFFIX = ".feather"
+CHUNK_SIZE = 50_000
+CACHE_METADATA_KEY = b"operations_source"
+# Память операций до и после приведения к схеме при построении кэша: при чтении кэша схема уже компактная
+CACHE_MEMORY_KEY = b"operations_memory"
+AGGREGATES_SUFFIX = ".aggregates.pkl"
+
+
+def _feather():
+    """ Модуль pyarrow.feather, импортируется при первом обращении к кэшу; None, если pyarrow не установлен"""
+    try:
+        from pyarrow import feather
+    except ImportError:  # pragma: no cover - кэш необязателен
+        return None
+    return feather
+
+
+def require_feather():
+    """ Модуль pyarrow.feather для хранилища .feather; без pyarrow - понятная ошибка вместо AttributeError"""
+    feather = _feather()
+    if feather is None:
+        raise ImportError("Хранилище операций .feather требует pyarrow: установите дополнение cache "
+                          "(pip install .[cache])")
+    return feather
+
+
+def cache_path(path: Union[str, Path]) -> Path:
+    """ Путь к колоночному кэшу рядом с исходным файлом"""
+    return Path(path).with_suffix(CACHE_SUFFIX)
+
+
+def read_cache(path: Union[str, Path], signature: tuple[int, int]) -> Optional[pd.DataFrame]:
+    """ Чтение кэша через memory-map, если он построен для текущей версии файла"""
+    feather = _feather()
+    if feather is None:
+        return None
+    path_cache = cache_path(path)
+    if not path_cache.exists():
+        return None
+    try:
+        table = feather.read_table(path_cache, memory_map=True)
+        metadata = table.schema.metadata or {}
+        source = json.loads(metadata.get(CACHE_METADATA_KEY, b"null"))
+        if source is None or tuple(source) != tuple(signature):
+            logger.info("Кэш устарел: %s", path_cache)
+            return None
+        logger.info("Загрузка операций из кэша: %s", path_cache)
+        df = table.to_pandas()
+        memory = json.loads(metadata.get(CACHE_MEMORY_KEY, b"[null, null]"))
+        df.attrs["memory_before"], df.attrs["memory_after"] = memory
+        return df
+    except Exception as ex:
+        logger.error("Ошибка чтения кэша %s: %s", path_cache, ex)
+        return None
+
+
+def write_cache(df: pd.DataFrame, path: Union[str, Path], signature: tuple[int, int]) -> None:
+    """ Запись датафрейма в колоночный кэш с ключом версии исходного файла"""
+    feather = _feather()
+    if feather is None:
+        logger.info("pyarrow не установлен, кэш не создается")
+        return
+    path_cache = cache_path(path)
+    try:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[CACHE_METADATA_KEY] = json.dumps(list(signature)).encode()
+        metadata[CACHE_MEMORY_KEY] = json.dumps([df.attrs.get("memory_before"), df.attrs.get("memory_after")]).encode()
+        table = table.replace_schema_metadata(metadata)
+        path_tmp = path_cache.with_suffix(CACHE_SUFFIX + ".tmp")
+        feather.write_feather(table, path_tmp, compression="uncompressed")
+        os.replace(path_tmp, path_cache)
+        logger.info("Кэш записан: %s", path_cache)
+    except Exception as ex:
+        logger.error("Ошибка записи кэша %s: %s", path_cache, ex)
+
+
+@metrics.timed("read")
+def read_source(path: Path) -> Union[pd.DataFrame, dict]:
+    """ Чтение операций из XLSX, CSV или сохраненного хранилища Feather"""
+    if path.suffix == CACHE_SUFFIX:
+        return require_feather().read_table(path, memory_map=True).to_pandas()
+    if path.suffix.lower() == ".csv":
+        return parse_operations(pd.read_csv(path), path)
+    return read_excel(path)
+
+
+def write_store(df: pd.DataFrame, path: Path) -> None:
+    """ Атомарная запись хранилища операций в Feather"""
+    path_tmp = path.with_suffix(CACHE_SUFFIX + ".tmp")
+    require_feather().write_feather(df, path_tmp, compression="uncompressed")
+    os.replace(path_tmp, path)
+
+
+def aggregates_path(path: Union[str, Path]) -> Path:
+    """ Путь к сохраненным агрегатам рядом с хранилищем операций"""
+    return Path(path).with_suffix(AGGREGATES_SUFFIX)
+
+
+def read_aggregates(path: Union[str, Path], signature: tuple[int, int]) -> Optional[dict]:
+    """ Агрегаты и свертки хранилища, если они сохранены для текущей версии файла"""
+    path_aggregates = aggregates_path(path)
+    if not path_aggregates.exists():
+        return None
+    try:
+        with open(path_aggregates, "rb") as file:
+            saved = pickle.load(file)
+    except Exception as ex:
+        logger.error("Ошибка чтения агрегатов %s: %s", path_aggregates, ex)
+        return None
+    if tuple(saved.get("signature", ())) != tuple(signature):
+        logger.info("Агрегаты устарели: %s", path_aggregates)
+        return None
+    logger.info("Загрузка агрегатов: %s", path_aggregates)
+    return saved
+
+
+def write_aggregates(path: Union[str, Path], signature: tuple[int, int], aggregates: RunningAggregates,
+                     rollups: dict[bool, CategoryRollup]) -> None:
+    """ Атомарная запись агрегатов и сверток с ключом версии хранилища"""
+    path_aggregates = aggregates_path(path)
+    path_tmp = path_aggregates.with_suffix(AGGREGATES_SUFFIX + ".tmp")
+    try:
+        with open(path_tmp, "wb") as file:
+            pickle.dump({"signature": list(signature), "aggregates": aggregates, "rollups": rollups}, file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path_tmp, path_aggregates)
+        logger.info("Агрегаты записаны: %s", path_aggregates)
+    except Exception as ex:
+        logger.error("Ошибка записи агрегатов %s: %s", path_aggregates, ex)
+
+
+def _sorted_operations(df: pd.DataFrame) -> pd.DataFrame:
+    """ Операции, упорядоченные по дате операции"""
+    if "Дата операции" not in df:
+        return df
+    if df["Дата операции"].is_monotonic_increasing:
+        return df
+    return sort_by_date(df)
+
+
+class OperationsStore:
+    """ Хранилище операций: файл читается один раз и перечитывается только при изменении"""
+
+    def __init__(self, path: Union[str, Path] = PATH_DATA, use_cache: bool = True) -> None:
+        self.path = Path(path)
+        self.use_cache = use_cache
+        self._df: Optional[pd.DataFrame] = None
+        self._signature: Optional[tuple[int, int]] = None
+        self._version = 0
+        self._memory: tuple[Optional[int], Optional[int]] = (None, None)
+        self._rollups: dict[bool, tuple[int, CategoryRollup]] = {}
+        self._aggregates: Optional[tuple[int, RunningAggregates]] = None
+        self._lock = threading.Lock()
+
+    def _file_signature(self) -> tuple[int, int]:
+        """ Время изменения и размер файла"""
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def version(self) -> int:
+        """ Номер версии данных, увеличивается при каждой перезагрузке"""
+        return self._version
+
+    @property
+    def memory(self) -> dict[str, Optional[int]]:
+        """ Объем памяти операций до и после приведения к схеме, в байтах"""
+        return {"before": self._memory[0], "after": self._memory[1]}
+
+    def get(self, rebuild: bool = False) -> pd.DataFrame:
+        """ Возвращает разобранный датафрейм операций, rebuild=True пересобирает кэш"""
+        signature = self._file_signature()
+        with self._lock:
+            if rebuild or self._df is None or signature != self._signature:
+                df = None
+                if self.use_cache and not rebuild and self.path.suffix != CACHE_SUFFIX:
+                    df = read_cache(self.path, signature)
+                if df is None:
+                    logger.info("Загрузка операций из файла: %s", self.path)
+                    df = read_source(self.path)
+                    if not isinstance(df, pd.DataFrame):
+                        raise ValueError(f"Не удалось загрузить операции из файла {self.path}")
+                    df = _sorted_operations(apply_schema(df))
+                    if self.use_cache and self.path.suffix != CACHE_SUFFIX:
+                        write_cache(df, self.path, signature)
+                else:
+                    before = df.attrs.get("memory_before")
+                    df = apply_schema(df)
+                    if before is not None:
+                        df.attrs["memory_before"] = before
+                self._df = _sorted_operations(df)
+                self._memory = (df.attrs.get("memory_before"), df.attrs.get("memory_after"))
+                logger.info("Память операций: %s -> %s байт", *self._memory)
+                self._signature = signature
+                self._version += 1
+                if self.path.suffix == CACHE_SUFFIX and not rebuild:
+                    self._restore_aggregates(signature)
+            return self._df
+
+    def _restore_aggregates(self, signature: tuple[int, int]) -> None:
+        """ Агрегаты хранилища из файла рядом с ним, чтобы новый процесс не пересчитывал всю историю"""
+        saved = read_aggregates(self.path, signature)
+        if saved is None:
+            return
+        self._aggregates = (self._version, saved["aggregates"])
+        self._rollups = {by_card: (self._version, rollup) for by_card, rollup in saved["rollups"].items()}
+
+    def between(self, date_from: Union[str, datetime], date_to: Union[str, datetime]) -> pd.DataFrame:
+        """ Операции в интервале дат: срез отсортированного датафрейма без полного просмотра"""
+        return slice_by_date(self.get(), date_from, date_to)
+
+    def rollup(self, by_card: bool = False) -> CategoryRollup:
+        """ Свертка категория x день для текущей версии данных"""
+        df = self.get()
+        with self._lock:
+            if not by_card and self._aggregates is not None and self._aggregates[0] == self._version:
+                return self._aggregates[1].rollup
+            cached = self._rollups.get(by_card)
+            if cached is None or cached[0] != self._version:
+                cached = (self._version, CategoryRollup.from_frame(df, by_card=by_card))
+                self._rollups[by_card] = cached
+            return cached[1]
+
+    def aggregates(self) -> RunningAggregates:
+        """ Суммы по картам, свертка и кандидаты топа для текущей версии данных"""
+        df = self.get()
+        with self._lock:
+            if self._aggregates is None or self._aggregates[0] != self._version:
+                self._aggregates = (self._version, RunningAggregates.from_frame(df))
+            return self._aggregates[1]
+
+    def append(self, new: pd.DataFrame) -> None:
+        """ Добавление новых операций: агрегаты обновляются инкрементально, хранилище .feather перезаписывается.
+
+        Для хранилища .feather агрегаты и построенные свертки сохраняются рядом с ним, поэтому следующая загрузка
+        в другом процессе и долгоживущие читатели получают их без пересчета всей истории.
+        """
+        if self.path.suffix == CACHE_SUFFIX:
+            require_feather()
+        if self.path.exists():
+            self.get()
+        new = apply_schema(new)
+        with self._lock:
+            merged = new if self._df is None else pd.concat([self._df, new], ignore_index=True)
+            merged = _sorted_operations(apply_schema(merged))
+            for by_card, (version, rollup) in list(self._rollups.items()):
+                if version == self._version:
+                    rollup.append(new)
+                    self._rollups[by_card] = (self._version + 1, rollup)
+            if self._aggregates is not None and self._aggregates[0] == self._version:
+                self._aggregates[1].append(new)
+                self._aggregates = (self._version + 1, self._aggregates[1])
+            elif self.path.suffix == CACHE_SUFFIX:
+                self._aggregates = (self._version + 1, RunningAggregates.from_frame(merged))
+            self._df = merged
+            self._memory = (merged.attrs.get("memory_before"), merged.attrs.get("memory_after"))
+            self._version += 1
+            if self.path.suffix == CACHE_SUFFIX:
+                write_store(merged, self.path)
+                self._signature = self._file_signature()
+                rollups = {by_card: rollup for by_card, (version, rollup) in self._rollups.items()
+                           if version == self._version}
+                write_aggregates(self.path, self._signature, self._aggregates[1], rollups)
+            logger.info("Добавлено операций: %s, всего: %s", len(new), len(merged))
+
+    def clear(self) -> None:
+        """ Сброс загруженных данных"""
+        with self._lock:
+            self._df = None
+            self._signature = None
+            self._rollups.clear()
+            self._aggregates = None
+
+
+_stores: dict[Path, OperationsStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: Union[str, Path] = PATH_DATA) -> OperationsStore:
+    """ Общее для процесса хранилище операций для указанного файла"""
+    path = Path(path)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = OperationsStore(path)
+        return _stores[path]
+
+
+def get_operations(path: Union[str, Path] = PATH_DATA, rebuild: bool = False) -> pd.DataFrame:
+    """ Функция получения датафрейма операций из общего хранилища"""
+    return get_store(path).get(rebuild=rebuild)
+
+
+def _iter_excel_rows(path: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    """ Чтение листа Excel в режиме read-only частями по chunksize строк"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame.from_records(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def iter_operations(path: Union[str, Path] = PATH_DATA, chunksize: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """ Потоковое чтение выгрузки (XLSX или CSV) типизированными частями ограниченного размера"""
+    path = Path(path)
+    logger.info("Потоковое чтение операций из файла: %s", path)
+    if path.suffix.lower() == ".csv":
+        chunks = pd.read_csv(path, chunksize=chunksize)
+    else:
+        chunks = _iter_excel_rows(path, chunksize)
+    for chunk in chunks:
+        yield parse_operations(chunk, path)
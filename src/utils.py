@@ -2,47 +2,67 @@ import json
 import logging
 import os
 from datetime import datetime
-from typing import Any
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
 
+import numpy as np
 import pandas as pd
-import requests
-from dotenv import load_dotenv
-
-from config import JSON_DATA, LOGS_UTILS, PATH_DATA
-
-load_dotenv(r'..\.env')
-
-API_KEY = os.getenv('API_KEY')
-
-headers = {"apikey": "API_KEY"}
 
+from config import JSON_DATA
+from src import metrics
+from src.database import OperationsDatabase
+from src.dates import parse_dates, parse_moment, to_datetime
+from src.logger import setup_logging
+from src.schema import to_kopecks
 
 logger = logging.getLogger('utils')
-logging.basicConfig(
-    filename=LOGS_UTILS,
-    level=logging.INFO, filemode='w', encoding='utf-8',
-    format='[%(asctime)s.%(msecs)03d] - [%(name)r] - [%(levelname)-7s] - %(message)s',
-)
+setup_logging()
 
 
+@metrics.timed("read")
 def read_excel(path: str) -> pd.DataFrame:
     """ Функция чтения Excel файла"""
     try:
         logger.info("Запускается чтение файла")
         df = pd.read_excel(path)
-        df["Дата операции"] = pd.to_datetime(df["Дата операции"], dayfirst=True)
-        return df
+        return parse_operations(df, path)
     except Exception as ex:
         logger.error("Ошибка загрузки %s", ex)
         return {}
 
 
+def parse_operations(df: pd.DataFrame, source: Union[str, Path, None] = None) -> pd.DataFrame:
+    """ Приведение типов колонок выгрузки операций, формат дат запоминается для файла source"""
+    return parse_dates(df, source)
+
+
+def sort_by_date(df: pd.DataFrame) -> pd.DataFrame:
+    """ Сортировка операций по дате для бинарного поиска"""
+    return df.sort_values("Дата операции", kind="stable", ignore_index=True)
+
+
+@metrics.timed("filter")
+def slice_by_date(df: pd.DataFrame, date_from: Union[str, datetime], date_to: Union[str, datetime]) -> pd.DataFrame:
+    """ Операции в интервале [date_from, date_to]: срез бинарным поиском, если даты отсортированы.
+    Порядок проверяется по самим датам: пометка в attrs переносится pandas и в пересортированные копии"""
+    dates = df["Дата операции"]
+    dates = to_datetime(dates)
+    date_from, date_to = pd.Timestamp(date_from), pd.Timestamp(date_to)
+    if dates.is_monotonic_increasing:
+        values = dates.to_numpy()
+        start = values.searchsorted(np.datetime64(date_from), side="left")
+        end = values.searchsorted(np.datetime64(date_to), side="right")
+        return df.iloc[start:end]
+    return df[(dates >= date_from) & (dates <= date_to)]
+
+
 def data_time(date_str: str) -> str:
     """ Функция для приветсвия клиента по текущему времени"""
-    logger.info(f"Запуск функции {data_time}")
+    logger.debug("Запуск функции %s", data_time)
     try:
-        logger.info("Получение даты")
-        now = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
+        logger.debug("Получение даты")
+        now = parse_moment(date_str)
     except ValueError:
         logger.error("Неверный формат даты, используется текущая дата")
         now = datetime.now()
@@ -57,126 +77,188 @@ def data_time(date_str: str) -> str:
     return None
 
 
-def get_operations_with_range(date: str) -> pd.DataFrame:
-    """ Функция получения операций за период с начала месяца по введенныю дату"""
-    logger.info(f"Запуск функции {get_operations_with_range}")
+def get_operations_with_range(df: Union[pd.DataFrame, OperationsDatabase], date: Union[str, datetime]) -> pd.DataFrame:
+    """ Функция получения операций за период с начала месяца по введенныю дату (из датафрейма или базы)"""
+    logger.debug("Запуск функции %s", get_operations_with_range)
     try:
-        logger.info("Получение даты")
-        date_start = datetime.strptime(date, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-01 00:00:00")
-        df = read_excel(PATH_DATA)
-        filter_operations = df[(df["Дата операции"] >= date_start) & (df["Дата операции"] <= date)]
-        return filter_operations
+        logger.debug("Получение даты")
+        date = parse_moment(date)
+        date_start = date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if isinstance(df, OperationsDatabase):
+            return df.between(date_start, date)
+        return slice_by_date(df, date_start, date)
     except ValueError:
         logger.error("Неверный формат даты")
         return "Неверный формат даты"
 
 
-def summ_by_category(transactions: pd.DataFrame) -> list[dict]:
-    """ Считаем сумму платежа и кешбека по каждой карте"""
-    logger.info(f"Запуск функции {summ_by_category}")
+def card_totals(transactions: pd.DataFrame) -> pd.DataFrame:
+    """ Суммы платежей и кешбека по картам для одного датафрейма"""
+    transactions = transactions[(transactions["Сумма платежа"] < 0) & (transactions["Статус"] == "OK")]
+    kopecks = pd.DataFrame({
+        "Сумма платежа": to_kopecks(transactions["Сумма платежа"]),
+        "Номер карты": transactions["Номер карты"].to_numpy(),
+        "Кэшбэк": to_kopecks(transactions["Кэшбэк"]),
+    })
+    return kopecks.groupby("Номер карты", observed=True).sum()
+
+
+def card_records(totals: pd.DataFrame) -> list[dict]:
+    """ Записи сумм по картам (в копейках) в формате ответа"""
+    transactions = (totals / 100).reset_index()
+    transactions['last_digits'] = transactions.pop("Номер карты")
+    transactions['total_spent'] = transactions.pop("Сумма платежа")
+    transactions['cashback'] = transactions.pop("Кэшбэк")
+    return transactions.to_dict(orient="records")
+
+
+@metrics.timed("groupby")
+def summ_by_category(transactions: Union[pd.DataFrame, Iterable[pd.DataFrame], OperationsDatabase],
+                     date_from: Optional[Union[str, datetime]] = None,
+                     date_to: Optional[Union[str, datetime]] = None) -> list[dict]:
+    """ Считаем сумму платежа и кешбека по каждой карте (датафрейм, поток частей или база).
+    Если заданы date_from и date_to, учитываются только операции этого интервала: в базе - запросом по индексу даты"""
+    logger.debug("Запуск функции %s", summ_by_category)
+    bounded = date_from is not None and date_to is not None
     try:
-        transactions = transactions[(transactions["Сумма платежа"] < 0) & (transactions["Статус"] == "OK")]
-        transactions = transactions[["Сумма платежа", "Номер карты",
-                                     "Кэшбэк"]].groupby("Номер карты").sum().reset_index()
-        transactions['last_digits'] = transactions.pop("Номер карты")
-        transactions['total_spent'] = transactions.pop("Сумма платежа")
-        transactions['cashback'] = transactions.pop("Кэшбэк")
-        cards = transactions.to_dict(orient="records")
-        logger.info("Получение данных")
+        if isinstance(transactions, OperationsDatabase):
+            totals = transactions.card_totals(date_from, date_to)
+        elif isinstance(transactions, pd.DataFrame):
+            totals = card_totals(slice_by_date(transactions, date_from, date_to) if bounded else transactions)
+        else:
+            totals = None
+            for chunk in transactions:
+                part = card_totals(slice_by_date(chunk, date_from, date_to) if bounded else chunk)
+                totals = part if totals is None else totals.add(part, fill_value=0)
+            if totals is None:
+                return []
+        cards = card_records(totals)
+        logger.debug("Получение данных")
         return cards
     except Exception as ex:
-        logging.error("Ошибка фильтрации: %s. Возврат данных", ex)
+        logger.error("Ошибка фильтрации: %s. Возврат данных", ex)
         return transactions
 
 
-def get_top_transactions(df: pd.DataFrame) -> list[dict]:
-    """ Топ 5 транзакций по сумме платежа"""
-    result = []
-    df = read_excel(PATH_DATA)
-    logger.info(f"Запуск функции {get_top_transactions}")
+TOP_KEYS = {"payment": "Сумма платежа", "amount": "Сумма операции", "cashback": "Кэшбэк"}
+
+TOP_GROUPS = {"category": "Категория", "card": "Номер карты"}
+
+
+def top_rows(df: pd.DataFrame, n: int, key: str = "Сумма платежа", group_by: Optional[str] = None) -> pd.DataFrame:
+    """ Первые n строк по ключу (в каждой группе) частичным отбором, без полной сортировки"""
+    if group_by is None:
+        return df.nlargest(n, key, keep="first")
+    values = pd.Series(df[key].to_numpy(dtype=np.float64))
+    groups = df[group_by].to_numpy(dtype=object)
+    positions = values.groupby(groups, sort=False).nlargest(n, keep="first").index.get_level_values(-1)
+    return df.iloc[positions]
+
+
+def top_records(top: pd.DataFrame) -> list[dict]:
+    """ Записи топа транзакций в формате ответа"""
+    return pd.DataFrame({
+        "date": top["Дата операции"].dt.strftime('%d.%m.%Y').to_numpy(dtype=object),
+        "amount": top["Сумма операции"].to_numpy(dtype=np.float64),
+        "category": top["Категория"].to_numpy(dtype=object),
+        "description": top["Описание"].to_numpy(dtype=object),
+    }).to_dict(orient="records")
+
+
+@metrics.timed("groupby")
+def get_top_transactions(df: Union[pd.DataFrame, Iterable[pd.DataFrame]], n: int = 5, key: str = "payment",
+                         group_by: Optional[str] = None) -> Union[list[dict], dict[str, list[dict]]]:
+    """ Топ n транзакций по сумме платежа, сумме операции или кешбеку, при group_by - по категориям или картам"""
+    logger.debug("Запуск функции %s", get_top_transactions)
     try:
-        logger.info("Получение данных")
-        top_transactions = df.sort_values(by="Сумма платежа", ascending=False).head(5).reset_index().to_dict(
-            orient="records")
-        for transaction in top_transactions:
-            date = transaction['Дата операции'].strftime('%d.%m.%Y')
-            amount = float(transaction['Сумма операции'])
-            category = transaction['Категория']
-            description = transaction['Описание']
-            result.append({
-                "date": date,
-                "amount": amount,
-                "category": category,
-                "description": description
-            })
-        logger.info("Запись полученных транзакций")
-        return result
+        logger.debug("Получение данных")
+        key = TOP_KEYS.get(key, key)
+        group_column = TOP_GROUPS.get(group_by, group_by)
+        if isinstance(df, pd.DataFrame):
+            top = top_rows(df, n, key, group_column)
+        else:
+            top = None
+            for chunk in df:
+                candidates = chunk if top is None else pd.concat([top, chunk], ignore_index=True)
+                top = top_rows(candidates, n, key, group_column)
+            if top is None:
+                return {} if group_by else []
+        logger.debug("Запись полученных транзакций")
+        if group_column is None:
+            return top_records(top)
+        top = top.sort_values(key, ascending=False, kind="stable")
+        return {group: top_records(rows) for group, rows in top.groupby(group_column, sort=True, observed=True)}
     except Exception as ex:
-        logging.error("Ошибка получения данных: %s", ex)
+        logger.error("Ошибка получения данных: %s", ex)
         return []
 
 
-def get_currency(currency: list, api_key=None) -> Any:
+@lru_cache(maxsize=1)
+def get_api_key() -> Optional[str]:
+    """ Ключ API котировок из окружения или файла .env, читается при первом запросе"""
+    from dotenv import load_dotenv
+
+    load_dotenv(r'..\.env')
+    return os.getenv('API_KEY')
+
+
+def get_market_client(key: Optional[str] = None):
+    """ Клиент рыночных данных: модуль market и requests загружаются только при первом запросе к API"""
+    from src.market import get_market_client as market_client
+
+    return market_client(key)
+
+
+def load_user_settings(path: Union[str, Path] = JSON_DATA) -> dict:
+    """ Функция чтения пользовательских настроек (валюты и акции)"""
+    logger.info("Чтение данных из файла: %s", path)
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def get_currency(currency: list, api_key=None, settings: Optional[dict] = None) -> Any:
     """ Функция берет данные из JSON файла курс валют через API запрос"""
-    logger.info(f"Запуск функции {get_currency}")
-    results = []
+    logger.debug("Запуск функции %s", get_currency)
+    from src.market import MalformedResponseError, MarketDataError
+
     try:
-        logger.info(f"Чтение данных из файла: {JSON_DATA}")
-        with open(JSON_DATA, encoding='utf-8') as file:
-            currency_json = json.load(file)
-            currency_symbol = currency_json['user_currencies']
-            logger.info("Обращение к Api")
-            for curr in currency_symbol:
-                url = "https://www.cbr-xml-daily.ru/daily_json.js"
-                response = requests.request("GET", url, headers=headers)
-                status_code = response.status_code
-                logger.info("Проверка статус-ответа")
-                if status_code == 200:
-                    result = response.json()['Valute'][curr]['Value']
-                    logger.info(f"Запрос данных по: {curr}")
-                    results.append((float(result)))
-                    logger.info("Обращение успешно")
-                    formatted_rates = [
-                        {"currency": c, "rate": r}
-                        for c, r in zip(currency_symbol, results)
-                    ]
-                else:
-                    logger.error(f"Не успешный запрос, код ошибки: {status_code}")
-                    return f"Не успешный запрос, код ошибки: {status_code}"
-            return formatted_rates
-    except Exception as ex:
-        logger.error(f"Ошибка получения курса валют: {ex}")
+        if settings is None:
+            settings = load_user_settings()
+        currency_symbol = settings['user_currencies']
+        logger.debug("Обращение к Api")
+        formatted_rates = get_market_client(get_api_key()).get_rates(currency_symbol)
+        logger.debug("Обращение успешно")
         return formatted_rates
+    except MalformedResponseError as ex:
+        logger.error("Ошибка получения курса валют: %s", ex)
+        return []
+    except MarketDataError as ex:
+        logger.error("Не успешный запрос, код ошибки: %s", ex.status_code)
+        return f"Не успешный запрос, код ошибки: {ex.status_code}"
+    except Exception as ex:
+        logger.error("Ошибка получения курса валют: %s", ex)
+        return []
 
 
-def get_stocks(stock: list) -> Any:
-    logger.info(f"Запуск функции {get_stocks}")
+def get_stocks(stock: list, settings: Optional[dict] = None) -> Any:
     """ Функция берет данные из JSON файла и возвращает акции через API"""
+    logger.debug("Запуск функции %s", get_stocks)
+    from src.market import MalformedResponseError, MarketDataError
+
     try:
-        results = []
-        logger.info(f"Чтение данных из файла: {JSON_DATA}")
-        with open(JSON_DATA, encoding='utf-8') as file:
-            stocks_json = json.load(file)
-            stock_symbol = stocks_json['user_stocks']
-            logger.info("Обращение к Api")
-            for stock in stock_symbol:
-                url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={stock}&apikey={API_KEY}"
-                response = requests.request("GET", url, headers=headers)
-                status_code = response.status_code
-                logger.info("Проверка статус-ответа")
-                if status_code == 200:
-                    result = response.json()["Global Quote"]["02. open"]
-                    logger.info(f"Запрос данных по: {stock}")
-                    results.append((float(result)))
-                    logger.info("Обращение успешно")
-                    formated_stocks = [
-                        {"stock": s, "price": p}
-                        for s, p in zip(stock_symbol, results)
-                    ]
-                else:
-                    logger.error(f"Не успешный запрос, код ошибки: {status_code}")
-                    return f"Не успешный запрос, код ошибки: {status_code}"
-            return formated_stocks
+        if settings is None:
+            settings = load_user_settings()
+        stock_symbol = settings['user_stocks']
+        logger.debug("Обращение к Api")
+        formated_stocks = get_market_client(get_api_key()).get_quotes(stock_symbol)
+        logger.debug("Обращение успешно")
+        return formated_stocks
+    except MalformedResponseError as ex:
+        logger.error("Ошибка получения цен акций: %s", ex)
+        return []
+    except MarketDataError as ex:
+        logger.error("Не успешный запрос, код ошибки: %s", ex.status_code)
+        return f"Не успешный запрос, код ошибки: {ex.status_code}"
     except Exception as ex:
-        logger.error(f"Ошибка получения цены для {stock}: {ex}")
-        return results
+        logger.error("Ошибка получения цен акций: %s", ex)
+        return []
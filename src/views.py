@@ -1,33 +1,187 @@
+import hashlib
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Any, Callable, Optional
 
-from config import LOGS_VIEWS, W_JSON_VIEWS
+from config import W_JSON_VIEWS
+from src import metrics
+from src.cards import DEFAULT_PERIODS, get_card_summary
+from src.database import OperationsDatabase
+from src.dates import INPUT_FORMAT, parse_moment
+from src.logger import setup_logging
+from src.store import OperationsStore, get_store
 from src.utils import (data_time, get_currency, get_operations_with_range, get_stocks, get_top_transactions,
-                       summ_by_category)
+                       load_user_settings)
+from src.writers import atomic_open, dumps
 
 logger = logging.getLogger('views')
-logging.basicConfig(
-    filename=LOGS_VIEWS,
-    level=logging.INFO, filemode='w', encoding='utf-8',
-    format='[%(asctime)s.%(msecs)03d] - [%(name)r] - [%(levelname)-7s] - %(message)s',
-)
-
-
-def dictionary(transactions):
-    """ Функция записи данных в JSON файл"""
-    logger.info("Запуск функции для создания JSON файла")
-    my_dict = {}
-    my_dict['greeting'] = data_time("2025-05-05 16:44:00")
-    my_dict['cards'] = summ_by_category(get_operations_with_range("2025-05-31 12:12:12"))
-    my_dict['top_transactions'] = get_top_transactions(transactions)
-    my_dict['stock_prices'] = get_currency("")
-    my_dict['currency_rates'] = get_stocks("")
-    logger.info(f"Открытие и запись в {W_JSON_VIEWS}")
-    with open(W_JSON_VIEWS, 'w', encoding='utf-8') as file:
-        json.dump(my_dict, file, ensure_ascii=False, indent=4)
+setup_logging()
+
+SECTION_TIMEOUT = 10.0
+
+SECTION_TIMEOUTS = {'greeting': 1.0}
+
+SECTION_PLACEHOLDERS = {'greeting': "Здравствуйте"}
+
+MEMO_SIZE = 128
+
+MEMO_TTL = 600.0
+
+# Ответ с заглушкой секции, ошибкой или неполными/устаревшими рыночными данными хранится недолго,
+# чтобы следующий запрос после восстановления сети получил полный ответ
+DEGRADED_MEMO_TTL = 15.0
+
+# Секции рыночных данных и ключи настроек с запрошенными символами
+MARKET_SECTIONS = {'stock_prices': 'user_currencies', 'currency_rates': 'user_stocks'}
+
+last_timings: dict[str, Optional[float]] = {}
+
+_memo: "OrderedDict[tuple, tuple[float, dict, str]]" = OrderedDict()
+_memo_lock = threading.Lock()
+_last_written: Optional[tuple] = None
+
+
+def _timed(func: Callable[[], Any]) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def assemble_sections(sections: dict[str, Callable[[], Any]],
+                      timeouts: Optional[dict[str, float]] = None) -> tuple[dict, dict[str, Optional[float]]]:
+    """ Параллельная сборка секций ответа: секция, не уложившаяся в таймаут, заменяется заглушкой"""
+    timeouts = {**SECTION_TIMEOUTS, **(timeouts or {})}
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=len(sections), thread_name_prefix="section")
+    futures = {name: executor.submit(_timed, func) for name, func in sections.items()}
+    result: dict[str, Any] = {}
+    timings: dict[str, Optional[float]] = {}
+    for name, future in futures.items():
+        remaining = start + timeouts.get(name, SECTION_TIMEOUT) - time.perf_counter()
+        try:
+            result[name], timings[name] = future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            logger.error("Секция %s не уложилась в таймаут, используется заглушка", name)
+            result[name], timings[name] = SECTION_PLACEHOLDERS.get(name, []), None
+        except Exception as ex:
+            logger.error("Ошибка секции %s: %s, используется заглушка", name, ex)
+            result[name], timings[name] = SECTION_PLACEHOLDERS.get(name, []), None
+    executor.shutdown(wait=False, cancel_futures=True)
+    timings['total'] = time.perf_counter() - start
+    logger.info("Время сборки секций: %s", timings)
+    return result, timings
+
+
+def _settings_hash(settings: dict) -> str:
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def _memo_get(key: tuple) -> Optional[tuple[dict, str]]:
+    """ Готовый ответ из LRU-кэша, если срок его хранения не истек"""
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is None or time.monotonic() >= cached[0]:
+            return None
+        _memo.move_to_end(key)
+        return cached[1], cached[2]
+
+
+def _memo_put(key: tuple, response: dict, text: str, ttl: float = MEMO_TTL) -> None:
+    with _memo_lock:
+        _memo[key] = (time.monotonic() + ttl, response, text)
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def _degraded(sections: dict, timings: dict[str, Optional[float]], settings: dict) -> bool:
+    """ Ответ неполный: секция заменена заглушкой, API вернуло ошибку, пропустило символы или отдало устаревшие
+    значения"""
+    if any(timings.get(name, 0.0) is None for name in sections):
+        return True
+    for name, setting in MARKET_SECTIONS.items():
+        value = sections.get(name)
+        if not isinstance(value, list) or len(value) < len(set(settings.get(setting, []))):
+            return True
+        if any(isinstance(item, dict) and item.get("stale") for item in value):
+            return True
+    return False
+
+
+def clear_memo() -> None:
+    """ Сброс кэша ответов"""
+    global _last_written
+    with _memo_lock:
+        _memo.clear()
+        _last_written = None
+
+
+def _write(key: tuple, text: str) -> None:
+    """ Запись ответа в файл, повторный ответ на тот же ключ не перезаписывается"""
+    global _last_written
+    if key == _last_written:
+        return
+    logger.info("Открытие и запись в %s", W_JSON_VIEWS)
+    with atomic_open(W_JSON_VIEWS) as file:
+        file.write(text)
+    _last_written = key
+
+
+def dictionary(date: str, settings: Optional[dict] = None, store: Optional[OperationsStore] = None,
+               database: Optional[OperationsDatabase] = None) -> dict:
+    """ Функция записи данных в JSON файл: приветствие, карты и топ операций с начала месяца по дату.
+    Периоды сводки по картам и разбивка по валютам берутся из настроек card_periods и card_by_currency.
+    С базой database срез месяца и суммы по картам считаются запросами в базе вместо хранилища"""
+    logger.debug("Запуск функции для создания JSON файла")
+    if settings is None:
+        settings = load_user_settings()
+    try:
+        moment = parse_moment(date)
+    except ValueError:
+        logger.error("Неверный формат даты, используется текущая дата")
+        moment = datetime.now()
+    greeting = data_time(moment.strftime(INPUT_FORMAT))
+    if database is not None:
+        transactions = database
+        key = (moment.date(), greeting, _settings_hash(settings), database.path, database.source)
+    else:
+        store = store or get_store()
+        transactions = store.get()
+        key = (moment.date(), greeting, _settings_hash(settings), str(store.path), store.version)
+    cached = _memo_get(key)
+    if cached is not None:
+        logger.info("Ответ взят из кэша")
+        _write(key, cached[1])
+        return cached[0]
+
+    day_end = datetime.combine(moment.date(), datetime.max.time())
+    month_operations = get_operations_with_range(transactions, day_end)
+    sections, timings = assemble_sections({
+        'cards': lambda: get_card_summary(transactions, day_end, settings.get('card_periods', DEFAULT_PERIODS),
+                                          settings.get('card_by_currency', False)),
+        'top_transactions': lambda: get_top_transactions(month_operations),
+        'stock_prices': lambda: get_currency("", settings=settings),
+        'currency_rates': lambda: get_stocks("", settings=settings),
+    })
+    my_dict = {'greeting': greeting, **sections}
+    last_timings.clear()
+    last_timings.update(timings)
+    with metrics.stage("serialize", "dictionary"):
+        text = dumps(my_dict)
+        _write(key, text)
+    if _degraded(sections, timings, settings):
+        logger.warning("Ответ неполный, он хранится в кэше %s с", DEGRADED_MEMO_TTL)
+        _memo_put(key, my_dict, text, DEGRADED_MEMO_TTL)
+    else:
+        _memo_put(key, my_dict, text)
     return my_dict
 
 
 if __name__ == "__main__":
-    input_date = "2025-05-05 16:44:00"
-    response = dictionary(input_date)
+    response = dictionary("2025-05-05 16:44:00")
@@ -0,0 +1,108 @@
+import json
+import os
+import secrets
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, TextIO, Union
+
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - быстрый сериализатор необязателен
+    orjson = None
+
+# Компактный вывод без отступов по умолчанию, включается переменной окружения JSON_COMPACT=1
+COMPACT = os.getenv("JSON_COMPACT", "0") == "1"
+
+CHUNK_SIZE = 10_000
+
+JSON = "json"
+JSON_LINES = "jsonl"
+
+# Права временного файла до маски процесса, как у open(); маску применяет ядро при создании файла
+FILE_MODE = 0o666
+
+
+def _default(value: Any) -> Any:
+    """ Значения, которые не сериализуются стандартно: даты, numpy-скаляры"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def dumps(value: Any, compact: Optional[bool] = None, indent: int = 4) -> str:
+    """ Сериализация одного значения: orjson, если установлен, иначе json"""
+    compact = COMPACT if compact is None else compact
+    if orjson is not None and (compact or indent == 2):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | (0 if compact else orjson.OPT_INDENT_2)
+        return orjson.dumps(value, default=_default, option=option).decode("utf-8")
+    if compact:
+        return json.dumps(value, ensure_ascii=False, default=_default, separators=(",", ":"))
+    return json.dumps(value, ensure_ascii=False, default=_default, indent=indent)
+
+
+def _create_tmp(path: Path) -> tuple[int, Path]:
+    """ Новый временный файл рядом с целевым: в отличие от mkstemp (0600), права задает маска процесса"""
+    while True:
+        path_tmp = path.parent / f".{path.name}.{secrets.token_hex(4)}.tmp"
+        try:
+            return os.open(path_tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, FILE_MODE), path_tmp
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_open(path: Union[str, Path]) -> Iterator[TextIO]:
+    """ Запись во временный файл рядом с целевым и замена целевого файла после успешной записи.
+    Замененный файл сохраняет права прежнего, новый получает права по маске процесса"""
+    path = Path(path)
+    descriptor, path_tmp = _create_tmp(path)
+    try:
+        with open(descriptor, "w", encoding="utf-8") as file:
+            yield file
+        if path.exists():
+            os.chmod(path_tmp, path.stat().st_mode & 0o7777)
+        os.replace(path_tmp, path)
+    except BaseException:
+        os.unlink(path_tmp)
+        raise
+
+
+def write_json(value: Any, path: Union[str, Path], compact: Optional[bool] = None, indent: int = 4) -> None:
+    """ Атомарная запись одного JSON-значения"""
+    with atomic_open(path) as file:
+        file.write(dumps(value, compact, indent))
+
+
+def write_records(records: Iterable[dict], path: Union[str, Path], fmt: str = JSON,
+                  compact: Optional[bool] = None, indent: int = 2) -> int:
+    """ Потоковая атомарная запись записей: массив JSON или JSON Lines, возвращает количество записей"""
+    compact = COMPACT if compact is None else compact
+    count = 0
+    with atomic_open(path) as file:
+        if fmt == JSON_LINES:
+            for record in records:
+                file.write(dumps(record, compact=True))
+                file.write("\n")
+                count += 1
+            return count
+        separator = "," if compact else ",\n"
+        file.write("[" if compact else "[\n")
+        for record in records:
+            if count:
+                file.write(separator)
+            text = dumps(record, compact, indent)
+            file.write(text if compact else "\n".join(" " * indent + line for line in text.splitlines()))
+            count += 1
+        file.write("]" if compact or not count else "\n]")
+    return count
+
+
+def frame_records(df: pd.DataFrame, chunksize: int = CHUNK_SIZE) -> Iterator[dict]:
+    """ Записи датафрейма частями, без построения всего списка; пропуски становятся null"""
+    for start in range(0, len(df), chunksize):
+        chunk = df.iloc[start:start + chunksize].astype(object)
+        yield from chunk.where(chunk.notna(), None).to_dict(orient="records")
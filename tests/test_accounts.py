@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from src.accounts import collect_files, process_files
+from src.schema import apply_schema
+from src.utils import get_top_transactions, summ_by_category
+
+
+def _account(rows, card, shift):
+    return pd.DataFrame({
+        'Дата операции': [f'{day + shift:02d}.05.2025 12:00:00' for day in range(1, rows + 1)],
+        'Номер карты': [card] * rows,
+        'Статус': ['OK'] * rows,
+        'Сумма операции': [-100.0 * (day + shift) for day in range(1, rows + 1)],
+        'Сумма платежа': [-100.0 * (day + shift) for day in range(1, rows + 1)],
+        'Кэшбэк': [1.0] * rows,
+        'Категория': ['Еда' if day % 2 else 'Связь' for day in range(rows)],
+        'Описание': ['Магнит'] * rows,
+    })
+
+
+@pytest.fixture
+def exports(tmp_path):
+    accounts = [_account(4, '*1111', 0), _account(3, '*2222', 5), _account(5, '*1111', 10)]
+    for number, account in enumerate(accounts):
+        account.to_csv(tmp_path / f"account_{number}.csv", index=False)
+    (tmp_path / "notes.txt").write_text("не выгрузка")
+    combined = pd.concat(accounts, ignore_index=True)
+    combined['Дата операции'] = pd.to_datetime(combined['Дата операции'], dayfirst=True)
+    return tmp_path, apply_schema(combined)
+
+
+def test_collect_files(exports):
+    """ Проверка выбора выгрузок из каталога и по маске """
+    directory, _ = exports
+    assert [path.name for path in collect_files(directory)] == ['account_0.csv', 'account_1.csv', 'account_2.csv']
+    assert len(collect_files(directory / "account_[01].csv")) == 2
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_process_files_matches_combined(exports, max_workers):
+    """ Проверка, что объединенные частичные агрегаты совпадают с расчетом по общей таблице """
+    directory, combined = exports
+
+    dashboard = process_files(directory, top_n=3, max_workers=max_workers)
+
+    assert dashboard['operations'] == 12
+    assert dashboard['cards'] == summ_by_category(combined)
+    assert dashboard['top_transactions'] == get_top_transactions(combined, n=3)
+    assert dashboard['categories'] == [
+        {'category': 'Связь', 'total_expenses': -5700.0, 'operations': 7},
+        {'category': 'Еда', 'total_expenses': -3900.0, 'operations': 5},
+    ]
+
+
+def test_process_files_missing(tmp_path):
+    """ Проверка ошибки при отсутствии файлов """
+    with pytest.raises(FileNotFoundError):
+        process_files(tmp_path / "*.xlsx")
@@ -0,0 +1,112 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from src.batch import build_dashboards, collect_settings, load_users
+from src.market import MarketDataClient
+
+
+@pytest.fixture
+def users(tmp_path):
+    accounts = {}
+    for name, card in (("first", "*1111"), ("second", "*2222")):
+        path = tmp_path / f"{name}.csv"
+        pd.DataFrame({
+            'Дата операции': ['10.05.2025 12:00:00', '20.05.2025 12:00:00'],
+            'Номер карты': [card, card],
+            'Статус': ['OK', 'OK'],
+            'Сумма операции': [-100.0, -200.0],
+            'Сумма платежа': [-100.0, -200.0],
+            'Кэшбэк': [1.0, 2.0],
+            'Категория': ['Еда', 'Еда'],
+            'Описание': ['Лента', 'Ашан'],
+        }).to_csv(path, index=False)
+        accounts[name] = path
+    folder = tmp_path / "users"
+    folder.mkdir()
+    for user, account, currencies, stocks in (
+            ("anna", "first", ["USD"], ["AAPL"]),
+            ("boris", "first", ["USD", "EUR"], ["AAPL", "MSFT"]),
+            ("vera", "second", ["EUR"], []),
+    ):
+        settings = {"user_currencies": currencies, "user_stocks": stocks, "account": str(accounts[account])}
+        (folder / f"{user}.json").write_text(json.dumps(settings), encoding="utf-8")
+    return folder
+
+
+def test_build_dashboards(users, tmp_path):
+    """ Проверка одного запроса курсов и котировок на всех пользователей и расчета секций один раз на выгрузку """
+    client = MagicMock()
+    client.get_rates.return_value = [{"currency": "USD", "rate": 78.5}, {"currency": "EUR", "rate": 89.3}]
+    client.get_quotes.return_value = [{"stock": "AAPL", "price": 150.0}, {"stock": "MSFT", "price": 400.0}]
+    output = tmp_path / "dashboards"
+
+    with patch('src.utils.get_market_client', return_value=client), \
+            patch('src.batch.get_top_transactions', return_value=[]) as mock_top:
+        paths = build_dashboards(users, "2025-05-20 14:00:00", output)
+
+    client.get_rates.assert_called_once_with(["USD", "EUR"])
+    client.get_quotes.assert_called_once_with(["AAPL", "MSFT"])
+    assert mock_top.call_count == 2
+    assert set(paths) == {"anna", "boris", "vera"}
+    anna = json.loads(paths["anna"].read_text(encoding="utf-8"))
+    vera = json.loads(paths["vera"].read_text(encoding="utf-8"))
+    assert anna["greeting"] == "Добрый день"
+    assert anna["cards"] == [{"last_digits": "*1111", "total_spent": -300.0, "cashback": 3.0}]
+    assert anna["stock_prices"] == [{"currency": "USD", "rate": 78.5}]
+    assert anna["currency_rates"] == [{"stock": "AAPL", "price": 150.0}]
+    assert vera["cards"][0]["last_digits"] == "*2222"
+    assert vera["stock_prices"] == [{"currency": "EUR", "rate": 89.3}]
+    assert vera["currency_rates"] == []
+
+
+def test_collect_settings(users):
+    """ Проверка сбора файлов настроек из каталога, по маске и из списка """
+    assert [path.stem for path in collect_settings(users)] == ["anna", "boris", "vera"]
+    assert [path.stem for path in collect_settings(str(users / "b*.json"))] == ["boris"]
+    assert [path.stem for path in collect_settings([users / "vera.json", users])] == ["vera", "anna", "boris", "vera"]
+
+
+def _response(body, status_code=200):
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = body
+    return response
+
+
+def test_unknown_symbol_skipped_per_user(users, tmp_path):
+    """ Проверка, что неизвестные валюта и тикер одного пользователя не лишают остальных курсов и котировок """
+    boris = users / "boris.json"
+    boris.write_text(json.dumps({**json.loads(boris.read_text(encoding="utf-8")),
+                                 "user_currencies": ["USD", "XXX"], "user_stocks": ["AAPL", "XXX"]}),
+                     encoding="utf-8")
+
+    def get(url, params=None, timeout=None):
+        if params is None:
+            return _response({"Valute": {"USD": {"Value": 78.5}, "EUR": {"Value": 89.3}}})
+        if params["symbol"] == "AAPL":
+            return _response({"Global Quote": {"02. open": "150.00"}})
+        return _response({"Note": "Invalid API call"})
+
+    client = MarketDataClient(api_key="demo", session=MagicMock(get=MagicMock(side_effect=get)))
+    with patch('src.utils.get_market_client', return_value=client):
+        paths = build_dashboards(users, "2025-05-20 14:00:00", tmp_path / "dashboards")
+
+    anna = json.loads(paths["anna"].read_text(encoding="utf-8"))
+    boris = json.loads(paths["boris"].read_text(encoding="utf-8"))
+    assert anna["stock_prices"] == [{"currency": "USD", "rate": 78.5}]
+    assert anna["currency_rates"] == [{"stock": "AAPL", "price": 150.0}]
+    assert boris["stock_prices"] == [{"currency": "USD", "rate": 78.5}]
+    assert boris["currency_rates"] == [{"stock": "AAPL", "price": 150.0}]
+
+
+def test_load_users_rejects_same_name(users, tmp_path):
+    """ Проверка, что повтор файла читается один раз, а разные файлы с одним именем отклоняются """
+    assert list(load_users([users / "anna.json", users / "anna.json"])) == ["anna"]
+
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "anna.json").write_text("{}", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_users([users / "anna.json", other / "anna.json"])
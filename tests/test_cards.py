@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from src.cards import card_summary, get_card_summary, period_start
+
+
+@pytest.fixture
+def operations():
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['25.04.2025 12:00:00', '12.05.2025 12:00:00', '19.05.2025 12:00:00',
+                                         '20.05.2025 18:00:00', '20.05.2025 19:00:00'], dayfirst=True),
+        'Номер карты': pd.Series(['*1111', '*1111', '*1111', '*2222', '*2222'], dtype="category"),
+        'Статус': ['OK', 'OK', 'OK', 'OK', 'FAILED'],
+        'Сумма платежа': [-1000.0, -100.0, -200.0, -50.0, -70.0],
+        'Валюта платежа': pd.Series(['RUB', 'RUB', 'USD', 'RUB', 'RUB'], dtype="category"),
+        'Кэшбэк': [10.0, 1.0, 2.0, 0.0, 0.0],
+    })
+
+
+@pytest.mark.parametrize("period, expected", [
+    ("mtd", "2025-05-01"),
+    ("wtd", "2025-05-19"),
+    ("rolling_30", "2025-04-21"),
+])
+def test_period_start(period, expected):
+    """ Проверка начала периодов для вторника 20.05.2025 """
+    assert period_start(period, "2025-05-20 14:00:00") == pd.Timestamp(expected)
+
+
+def test_period_start_unknown():
+    """ Проверка ошибки для неизвестного периода """
+    with pytest.raises(ValueError):
+        period_start("quarter", "2025-05-20 14:00:00")
+
+
+def test_card_summary_periods(operations):
+    """ Проверка сумм всех периодов за одну группировку, отклоненные операции не учитываются """
+    summary = card_summary(operations, "2025-05-20 23:59:59", ["mtd", "wtd", "rolling_30"])
+
+    assert summary.loc['*1111', ('mtd', 'Сумма платежа')] == -30000
+    assert summary.loc['*1111', ('wtd', 'Сумма платежа')] == -20000
+    assert summary.loc['*1111', ('rolling_30', 'Сумма платежа')] == -130000
+    assert summary.loc['*1111', ('rolling_30', 'Кэшбэк')] == 1300
+    assert summary.loc['*2222', ('mtd', 'Сумма платежа')] == -5000
+
+
+def test_card_summary_by_currency(operations):
+    """ Проверка разбивки по картам и валютам в формате ответа """
+    records = get_card_summary(operations, "2025-05-20 23:59:59", by_currency=True)
+
+    assert records == [
+        {"last_digits": "*1111", "currency": "RUB", "total_spent": -100.0, "cashback": 1.0},
+        {"last_digits": "*1111", "currency": "USD", "total_spent": -200.0, "cashback": 2.0},
+        {"last_digits": "*2222", "currency": "RUB", "total_spent": -50.0, "cashback": 0.0},
+    ]
+
+
+def test_card_summary_matches_single_period(operations):
+    """ Проверка, что сводка за месяц совпадает с прежним расчетом по картам """
+    from src.utils import get_operations_with_range, summ_by_category
+
+    expected = summ_by_category(get_operations_with_range(operations, "2025-05-20 23:59:59"))
+
+    assert get_card_summary(operations, "2025-05-20 23:59:59") == expected
@@ -0,0 +1,70 @@
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from config import BASE_DIR
+from src.cli import build_parser, cmd_all, cmd_dashboards, cmd_report, main
+
+
+def _loaded_modules(code):
+    result = subprocess.run([sys.executable, "-c", f"import sys; {code}; print(' '.join(sys.modules))"],
+                            cwd=BASE_DIR, capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def test_cli_import_is_light():
+    """ Проверка, что импорт точки входа не загружает pandas и сетевой клиент """
+    modules = _loaded_modules("import src.cli")
+    assert not modules & {"pandas", "numpy", "requests", "openpyxl", "dotenv"}
+
+
+def test_views_import_without_network_client():
+    """ Проверка, что requests загружается только при запросе курсов """
+    modules = _loaded_modules("import src.views")
+    assert "requests" not in modules
+    assert "openpyxl" not in modules
+
+
+def test_parser_subcommands():
+    """ Проверка разбора подкоманд """
+    parser = build_parser()
+    assert parser.parse_args([]).func is cmd_all
+    args = parser.parse_args(["--backend", "sqlite", "report", "--category", "Связь",
+                              "--date", "2025-05-05 00:00:00"])
+    assert (args.func, args.backend, args.category) == (cmd_report, "sqlite", "Связь")
+    assert args.date == "2025-05-05 00:00:00"
+    args = parser.parse_args(["dashboards", "users/a.json", "users/b.json", "--output", "out"])
+    assert (args.func, args.settings, args.output) == (cmd_dashboards, ["users/a.json", "users/b.json"], "out")
+
+
+def test_report_command(capsys):
+    """ Проверка команды отчета по категории """
+    report = pd.DataFrame({"category": ["Связь"], "total_expenses": [-100.0]})
+    with patch('src.store.get_operations', return_value=pd.DataFrame()) as mock_get_operations, \
+            patch('src.reports.expenses_by_category', return_value=report) as mock_report:
+        main(["report", "--category", "Связь"])
+
+    mock_get_operations.assert_called_once()
+    assert mock_report.call_args.args[1:] == ("Связь", "2025-05-05 16:44:00")
+    assert "Связь" in capsys.readouterr().out
+
+
+def test_sqlite_backend_skips_pandas_store(capsys):
+    """ Проверка, что с базой SQLite отчет и главная страница не читают выгрузку в хранилище """
+    database = MagicMock()
+    report = pd.DataFrame({"category": ["Связь"], "total_expenses": [-100.0]})
+    with patch('src.store.get_operations') as mock_get_operations, \
+            patch('src.store.get_store') as mock_get_store, \
+            patch('src.database.open_database', return_value=database) as mock_open, \
+            patch('src.reports.expenses_by_category', return_value=report) as mock_report, \
+            patch('src.views.dictionary') as mock_dictionary:
+        main(["--backend", "sqlite", "report", "--category", "Связь"])
+        main(["--backend", "sqlite", "dashboard"])
+
+    mock_get_operations.assert_not_called()
+    mock_get_store.assert_not_called()
+    assert mock_open.call_count == 2
+    assert mock_report.call_args.args[0] is database
+    assert mock_dictionary.call_args.kwargs == {"database": database}
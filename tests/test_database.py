@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.cards import get_card_summary
+from src.database import OperationsDatabase, open_database
+from src.reports import expenses_by_category
+from src.services import get_name_filter
+from src.utils import get_operations_with_range, summ_by_category
+
+
+@pytest.fixture
+def operations():
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['30.04.2025 23:00:00', '01.05.2025 10:00:00', '02.05.2025 11:00:00',
+                                         '03.05.2025 12:00:00', '05.05.2025 09:00:00'], dayfirst=True),
+        'Номер карты': ['*1111', '*1111', '*2222', None, '*2222'],
+        'Статус': ['OK', 'OK', 'OK', 'OK', 'FAILED'],
+        'Сумма операции': [-10.10, -100.10, -200.20, -5.0, -1.0],
+        'Сумма платежа': [-10.10, -100.10, -200.20, -5.0, -1.0],
+        'Кэшбэк': [0.0, 1.0, None, 0.0, 0.0],
+        'Категория': ['Переводы', 'Переводы', 'Еда', 'Переводы', 'Еда'],
+        'Описание': ['Иванов И.', 'Оплата товара', 'Магнит', 'Петров П.', 'Магнит'],
+    })
+
+
+def test_range_matches_pandas(operations):
+    """ Проверка, что срез с начала месяца из базы совпадает с pandas """
+    database = OperationsDatabase.from_frame(operations)
+
+    expected = get_operations_with_range(operations, "2025-05-03 12:00:00")
+    result = get_operations_with_range(database, "2025-05-03 12:00:00")
+
+    pd.testing.assert_frame_equal(result.astype(object), expected.reset_index(drop=True).astype(object))
+
+
+def test_card_totals_match_pandas(operations):
+    """ Проверка группировки по картам в базе """
+    database = OperationsDatabase.from_frame(operations)
+
+    assert summ_by_category(database) == summ_by_category(operations)
+    assert summ_by_category(database, "2025-05-01", "2025-05-31") == \
+        summ_by_category(operations, "2025-05-01", "2025-05-31") == \
+        [{"last_digits": "*1111", "total_spent": -100.1, "cashback": 1.0},
+         {"last_digits": "*2222", "total_spent": -200.2, "cashback": 0.0}]
+
+
+@pytest.mark.parametrize("periods, by_currency", [(["mtd"], False), (["mtd", "rolling_7"], False)])
+def test_card_summary_matches_pandas(operations, periods, by_currency):
+    """ Проверка сводки по картам за периоды из базы """
+    database = OperationsDatabase.from_frame(operations)
+
+    expected = get_card_summary(operations, "2025-05-03 23:59:59", periods, by_currency)
+
+    assert get_card_summary(database, "2025-05-03 23:59:59", periods, by_currency) == expected
+
+
+def test_category_window_matches_pandas(operations):
+    """ Проверка суммы категории за окно в базе """
+    database = OperationsDatabase.from_frame(operations)
+
+    expected = expenses_by_category(operations, 'Переводы', "2025-05-04 00:00:00")
+    result = expenses_by_category(database, 'Переводы', "2025-05-04 00:00:00")
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result['total_expenses'][0] == -115.2
+
+
+def test_transfers_match_pandas(operations):
+    """ Проверка поиска переводов через функцию REGEXP в базе """
+    database = OperationsDatabase.from_frame(operations)
+
+    assert get_name_filter(database) == get_name_filter(operations)
+
+
+def test_open_database_reloads_on_change(tmp_path, operations):
+    """ Проверка, что база перезаполняется только при изменении исходного файла """
+    source = tmp_path / "operations.csv"
+    operations.to_csv(source, index=False, date_format="%d.%m.%Y %H:%M:%S")
+    path = tmp_path / "operations.sqlite"
+
+    first = open_database(source, path)
+    signature = first.source
+    assert len(first.between("2025-01-01", "2025-12-31")) == 5
+    first.close()
+
+    with patch('src.store.get_operations') as mock_get_operations:
+        second = open_database(source, path)
+    mock_get_operations.assert_not_called()
+    assert second.source == signature
+    second.close()
@@ -0,0 +1,58 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.dates import clear_formats, detect_format, parse_dates, parse_moment
+from src.store import read_source
+
+
+@pytest.fixture(autouse=True)
+def formats():
+    clear_formats()
+    yield
+    clear_formats()
+
+
+@pytest.mark.parametrize("values, expected", [
+    (['01.06.2025 23:01:57', '02.06.2025 10:00:00'], "%d.%m.%Y %H:%M:%S"),
+    (['02.06.2025', None], "%d.%m.%Y"),
+    (['2025-06-01 23:01:57'], "%Y-%m-%d %H:%M:%S"),
+    (['не_дата'], None),
+])
+def test_detect_format(values, expected):
+    """ Проверка определения формата по выборке значений """
+    assert detect_format(pd.Series(values)) == expected
+
+
+def test_parse_dates_both_columns():
+    """ Проверка разбора даты операции и даты платежа в datetime64 """
+    df = parse_dates(pd.DataFrame({
+        'Дата операции': ['01.06.2025 23:01:57', '13.06.2025 10:00:00'],
+        'Дата платежа': ['02.06.2025', None],
+    }))
+
+    assert df['Дата операции'].tolist() == [pd.Timestamp(2025, 6, 1, 23, 1, 57), pd.Timestamp(2025, 6, 13, 10)]
+    assert df['Дата платежа'].iloc[0] == pd.Timestamp(2025, 6, 2)
+    assert pd.isna(df['Дата платежа'].iloc[1])
+
+
+def test_format_detected_once_per_file(tmp_path):
+    """ Проверка, что формат файла определяется один раз и затем берется из кэша """
+    path = tmp_path / "operations.csv"
+    pd.DataFrame({'Дата операции': ['01.06.2025 23:01:57'], 'Дата платежа': ['02.06.2025']}).to_csv(path, index=False)
+
+    with patch('src.dates.detect_format', wraps=detect_format) as mock_detect:
+        read_source(path)
+        second = read_source(path)
+
+    assert mock_detect.call_count == 2
+    assert second['Дата платежа'].iloc[0] == pd.Timestamp(2025, 6, 2)
+
+
+def test_parse_moment():
+    """ Проверка разбора даты пользователя """
+    assert parse_moment("2025-05-05 16:44:00") == datetime(2025, 5, 5, 16, 44)
+    with pytest.raises(ValueError):
+        parse_moment("05.05.2025")
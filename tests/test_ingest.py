@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.ingest import ingest_export, load_state
+from src.rollup import RunningAggregates
+from src.store import OperationsStore, get_store, write_store
+
+
+def _export(path, dates, amounts):
+    """ Выгрузка в CSV в формате банка """
+    pd.DataFrame({
+        'Дата операции': dates,
+        'Номер карты': ['*7197'] * len(dates),
+        'Статус': ['OK'] * len(dates),
+        'Сумма операции': amounts,
+        'Сумма платежа': amounts,
+        'Кэшбэк': [0.0] * len(dates),
+        'Категория': ['Супермаркеты'] * len(dates),
+        'Описание': ['Магнит'] * len(dates),
+    }).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def paths(tmp_path):
+    pytest.importorskip("pyarrow")
+    first = _export(tmp_path / "first.csv",
+                    ['01.05.2025 10:00:00', '02.05.2025 10:00:00', '03.05.2025 10:00:00'], [-100.0, -200.0, -300.0])
+    second = _export(tmp_path / "second.csv",
+                     ['02.05.2025 10:00:00', '03.05.2025 10:00:00', '03.05.2025 10:00:00', '04.05.2025 10:00:00'],
+                     [-200.0, -300.0, -300.0, -400.0])
+    return first, second, tmp_path / "operations.feather", tmp_path / "state.json"
+
+
+def test_ingest_skips_overlap(paths):
+    """ Проверка, что из пересекающейся выгрузки добавляются только новые операции """
+    first, second, store_path, state_path = paths
+
+    assert ingest_export(first, store_path, state_path) == 3
+    assert ingest_export(second, store_path, state_path) == 2
+    assert ingest_export(second, store_path, state_path) == 0
+
+    stored = OperationsStore(store_path).get()
+    assert stored['Сумма операции'].tolist() == [-100.0, -200.0, -300.0, -300.0, -400.0]
+    assert load_state(state_path)['last_date'] == '2025-05-04 10:00:00'
+
+
+def test_ingest_updates_aggregates(paths):
+    """ Проверка, что инкрементально обновленные агрегаты совпадают с полным пересчетом """
+    first, second, store_path, state_path = paths
+    ingest_export(first, store_path, state_path)
+    store = get_store(store_path)
+    aggregates = store.aggregates()
+    rollup = store.rollup()
+
+    ingest_export(second, store_path, state_path)
+
+    full = RunningAggregates.from_frame(OperationsStore(store_path).get())
+    assert store.aggregates() is aggregates
+    assert aggregates.cards() == full.cards()
+    assert aggregates.top_transactions() == full.top_transactions()
+    assert store.rollup() is rollup
+    assert rollup.total('Супермаркеты', '2025-05-01', '2025-05-04') == (-1300.0, 5)
+
+
+def test_ingest_persists_aggregates(paths):
+    """ Проверка, что новый процесс получает сохраненные агрегаты без пересчета истории """
+    first, second, store_path, state_path = paths
+    ingest_export(first, store_path, state_path)
+    get_store(store_path).clear()
+
+    store = OperationsStore(store_path)
+    with patch.object(RunningAggregates, 'from_frame', side_effect=AssertionError("full rebuild")):
+        assert ingest_export(second, store_path, state_path) == 2
+        aggregates = store.aggregates()
+        assert store.rollup() is aggregates.rollup
+
+    full = RunningAggregates.from_frame(store.get())
+    assert aggregates.cards() == full.cards()
+    assert aggregates.top_transactions() == full.top_transactions()
+    assert aggregates.rollup.total('Супермаркеты', '2025-05-01', '2025-05-04') == (-1300.0, 5)
+
+
+def test_stale_aggregates_rebuilt(paths):
+    """ Проверка, что агрегаты от другой версии хранилища не используются """
+    first, second, store_path, state_path = paths
+    ingest_export(first, store_path, state_path)
+    write_store(OperationsStore(second).get(), store_path)
+
+    aggregates = OperationsStore(store_path).aggregates()
+
+    assert aggregates.cards() == RunningAggregates.from_frame(OperationsStore(second).get()).cards()
+
+
+def test_ingest_requires_pyarrow(tmp_path):
+    """ Проверка понятной ошибки без pyarrow: хранилище и водяной знак не трогаются """
+    export = _export(tmp_path / "first.csv", ['01.05.2025 10:00:00'], [-100.0])
+    store_path, state_path = tmp_path / "operations.feather", tmp_path / "state.json"
+
+    with patch('src.store._feather', return_value=None), pytest.raises(ImportError, match="pyarrow"):
+        ingest_export(export, store_path, state_path)
+
+    assert not store_path.exists() and not state_path.exists()
@@ -0,0 +1,73 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.logger import ModuleFileHandler, _level, setup_logging, stop_logging, worker_logging
+
+
+def test_level_from_env(monkeypatch):
+    """ Проверка уровня логирования из переменной окружения LOG_LEVEL """
+    monkeypatch.setenv("LOG_LEVEL", "warning")
+    assert _level(None) == logging.WARNING
+    assert _level("DEBUG") == logging.DEBUG
+    monkeypatch.setenv("LOG_LEVEL", "unknown")
+    assert _level(None) == logging.INFO
+
+
+def test_module_file_handler(tmp_path):
+    """ Проверка записи каждого модуля в свой файл """
+    handler = ModuleFileHandler(tmp_path)
+    handler.setFormatter(logging.Formatter("%(name)s %(message)s"))
+    for name, message in (("utils", "первое"), ("views.sections", "второе"), ("utils", "третье")):
+        handler.handle(logging.LogRecord(name, logging.INFO, __file__, 0, message, None, None))
+    handler.close()
+
+    assert (tmp_path / "utils.logs").read_text(encoding="utf-8").splitlines() == ["utils первое", "utils третье"]
+    assert (tmp_path / "views.logs").read_text(encoding="utf-8") == "views.sections второе\n"
+
+
+def test_queue_listener_writes_lazily(tmp_path):
+    """ Проверка записи через очередь и отсутствия форматирования отключенных уровней """
+    stop_logging()
+    setup_logging("INFO", directory=tmp_path)
+    try:
+        class Expensive:
+            formatted = False
+
+            def __str__(self):
+                Expensive.formatted = True
+                return "значение"
+
+        logger = logging.getLogger("reports")
+        logger.debug("Отладка %s", Expensive())
+        assert not Expensive.formatted
+        logger.info("Отчет %s", Expensive())
+    finally:
+        stop_logging()
+        setup_logging()
+
+    assert Expensive.formatted
+    assert (tmp_path / "reports.logs").read_text(encoding="utf-8").endswith("- Отчет значение\n")
+
+
+def _log_in_worker(message):
+    logging.getLogger("accounts").info(message)
+    return os.getpid()
+
+
+def test_worker_logging_reaches_parent_files(tmp_path):
+    """ Проверка, что записи процессов пула попадают в файлы родителя и не перезаписывают их """
+    stop_logging()
+    setup_logging("INFO", directory=tmp_path)
+    try:
+        logging.getLogger("accounts").info("родитель")
+        with worker_logging() as pool_logging, ProcessPoolExecutor(max_workers=2, **pool_logging) as executor:
+            pids = set(executor.map(_log_in_worker, ["процесс"] * 4))
+    finally:
+        stop_logging()
+        setup_logging()
+
+    lines = (tmp_path / "accounts.logs").read_text(encoding="utf-8").splitlines()
+    assert os.getpid() not in pids
+    assert lines[0].endswith("- родитель")
+    assert sum(line.endswith("- процесс") for line in lines) == 4
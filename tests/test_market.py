@@ -0,0 +1,177 @@
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.market import MOSCOW, MarketDataClient, MarketDataError, next_publication
+
+PRICES = {"AAPL": "150.00", "AMZN": "3173.18", "GOOGL": "120.50", "MSFT": "410.00", "TSLA": "180.25"}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """ Заглушка API ЦБ и Alpha Vantage """
+    delay = 0.2
+    rate_limited = False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.hits.append(url.path)
+        if url.path == "/daily_json.js":
+            body = {"Valute": {"USD": {"Value": 78.5025}, "EUR": {"Value": 89.3108}}}
+        elif url.path == "/query":
+            time.sleep(self.delay)
+            symbol = parse_qs(url.query)["symbol"][0]
+            if symbol not in PRICES:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = ({"Note": "API call frequency exceeded"} if self.rate_limited
+                    else {"Global Quote": {"02. open": PRICES[symbol]}})
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.hits = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server, **kwargs):
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return MarketDataClient(api_key="demo", cbr_url=f"{base}/daily_json.js", stocks_url=f"{base}/query", **kwargs)
+
+
+def test_rates_single_document_request(stub_server):
+    """ Проверка, что курсы всех валют берутся из одного запроса и кэшируются """
+    client = _client(stub_server)
+
+    assert client.get_rates(["USD", "EUR"]) == [{"currency": "USD", "rate": 78.5025},
+                                                {"currency": "EUR", "rate": 89.3108}]
+    client.get_rates(["EUR"])
+
+    assert stub_server.hits == ["/daily_json.js"]
+
+
+def test_quotes_concurrent_and_cached(stub_server):
+    """ Проверка параллельных запросов котировок и повторного ответа из кэша """
+    client = _client(stub_server)
+
+    start = time.perf_counter()
+    result = client.get_quotes(list(PRICES))
+    elapsed = time.perf_counter() - start
+    client.get_quotes(list(PRICES))
+
+    assert result == [{"stock": symbol, "price": float(price)} for symbol, price in PRICES.items()]
+    assert elapsed < StubHandler.delay * len(PRICES)
+    assert stub_server.hits.count("/query") == len(PRICES)
+
+
+def test_stale_while_revalidate(stub_server):
+    """ Проверка, что устаревшее значение отдается сразу с пометкой, а обновление идет в фоне """
+    client = _client(stub_server, ttl=0)
+
+    client.get_rates(["USD"])
+    result = client.get_rates(["USD"])
+    client.wait_refresh(5)
+
+    assert result[0]["rate"] == 78.5025
+    assert result[0]["stale"] is True
+    assert stub_server.hits == ["/daily_json.js", "/daily_json.js"]
+
+
+def test_persistent_cache(stub_server, tmp_path):
+    """ Проверка, что сохраненные на диск значения используются новым клиентом без запросов """
+    cache = tmp_path / "market_cache.json"
+    _client(stub_server, cache_path=cache).get_quotes(["AAPL"])
+
+    result = _client(stub_server, cache_path=cache).get_quotes(["AAPL"])
+
+    assert result == [{"stock": "AAPL", "price": 150.0}]
+    assert stub_server.hits == ["/query"]
+
+
+def test_offline_fallback(stub_server, tmp_path):
+    """ Проверка, что при недоступном API отдается сохраненный снимок с пометкой устаревания """
+    cache = tmp_path / "market_cache.json"
+    _client(stub_server, cache_path=cache).get_rates(["USD", "EUR"])
+    offline = MarketDataClient(cbr_url="http://127.0.0.1:9/daily_json.js", cache_path=cache, ttl=0, timeout=0.5)
+
+    result = offline.get_rates(["USD", "EUR"])
+    offline.wait_refresh(5)
+
+    assert [item["rate"] for item in result] == [78.5025, 89.3108]
+    assert all(item["stale"] for item in result)
+    assert offline.get_rates(["USD"])[0]["stale"] is True
+    with pytest.raises(Exception):
+        offline.get_rates(["GBP"])
+
+
+def test_quote_error_status(stub_server):
+    """ Проверка, что тикер с ошибкой пропускается, а если не получен ни один - выбрасывается ошибка API """
+    client = _client(stub_server)
+
+    assert client.get_quotes(["AAPL", "UNKNOWN"]) == [{"stock": "AAPL", "price": 150.0}]
+    with pytest.raises(MarketDataError) as ex:
+        client.get_quotes(["UNKNOWN"])
+
+    assert ex.value.status_code == 404
+
+
+def test_rate_limit_reply_serves_snapshot(stub_server, tmp_path, monkeypatch):
+    """ Проверка, что ответ 200 без "Global Quote" считается ошибкой API и отдается сохраненный снимок """
+    cache = tmp_path / "market_cache.json"
+    _client(stub_server, cache_path=cache).get_quotes(["AAPL"])
+    monkeypatch.setattr(StubHandler, "rate_limited", True)
+    client = _client(stub_server, cache_path=cache, ttl=0)
+
+    result = client.get_quotes(["AAPL", "MSFT"])
+    client.wait_refresh(5)
+
+    assert result[0]["stock"] == "AAPL" and result[0]["price"] == 150.0 and result[0]["stale"] is True
+    assert len(result) == 1
+    with pytest.raises(MarketDataError) as ex:
+        client.get_quotes(["MSFT"])
+    assert ex.value.status_code == 200
+
+
+@pytest.mark.parametrize("fetched, expected", [
+    (datetime(2025, 5, 20, 9, 0, tzinfo=MOSCOW), datetime(2025, 5, 20, 11, 30, tzinfo=MOSCOW)),
+    (datetime(2025, 5, 20, 11, 30, tzinfo=MOSCOW), datetime(2025, 5, 21, 11, 30, tzinfo=MOSCOW)),
+    (datetime(2025, 5, 20, 23, 0, tzinfo=MOSCOW), datetime(2025, 5, 21, 11, 30, tzinfo=MOSCOW)),
+])
+def test_next_publication(fetched, expected):
+    """ Проверка, что значение живет до ближайшей публикации курсов ЦБ """
+    assert next_publication(fetched.timestamp()) == expected.timestamp()
+
+
+def test_default_ttl_until_publication(stub_server):
+    """ Проверка, что без ttl значение свежо до публикации и повторный запрос в тот же день не идет в сеть """
+    client = _client(stub_server)
+    client.get_rates(["USD"])
+    fetched = client._cache[("rate", "USD")][0]
+
+    assert client._fresh(fetched, next_publication(fetched) - 1)
+    assert not client._fresh(fetched, next_publication(fetched))
+    assert "stale" not in client.get_rates(["USD"])[0]
+    assert stub_server.hits == ["/daily_json.js"]
@@ -0,0 +1,75 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src import metrics
+from src.services import get_name_filter
+from src.utils import slice_by_date
+
+
+@pytest.fixture
+def collected():
+    metrics.reset()
+    metrics.enable(memory=True)
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+@pytest.fixture
+def operations():
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['01.05.2025 10:00:00', '02.05.2025 11:00:00', '03.05.2025 12:00:00'],
+                                        dayfirst=True),
+        'Категория': ['Переводы', 'Еда', 'Переводы'],
+        'Описание': ['Иванов И.', 'Лента', 'Магазин'],
+        'Сумма платежа': [-100.0, -200.0, -300.0],
+    })
+
+
+def test_disabled_records_nothing(operations):
+    """ Проверка, что без включения метрики не собираются """
+    metrics.reset()
+    slice_by_date(operations, "2025-05-01", "2025-05-02 23:59:59")
+    with metrics.stage("read", "manual") as stage:
+        stage.rows_out = 10
+
+    assert metrics.snapshot() == {}
+
+
+def test_stage_rows_and_time(collected, operations, tmp_path, monkeypatch):
+    """ Проверка строк на входе и выходе этапов фильтрации и сериализации """
+    monkeypatch.setattr('src.services.W_JSON_SERVICES', tmp_path / "services.json")
+    slice_by_date(operations, "2025-05-01", "2025-05-02 23:59:59")
+    get_name_filter(operations)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["filter"]["slice_by_date"]["rows_in"] == 3
+    assert snapshot["filter"]["slice_by_date"]["rows_out"] == 2
+    assert snapshot["filter"]["find_transfers"]["rows_out"] == 1
+    assert snapshot["serialize"]["get_name_filter"]["rows_out"] == 1
+    assert snapshot["filter"]["slice_by_date"]["calls"] == 1
+    assert snapshot["filter"]["slice_by_date"]["seconds"] >= 0
+    assert json.loads(metrics.to_json()) == snapshot
+
+
+def test_prometheus_text(collected):
+    """ Проверка текстового формата Prometheus """
+    with metrics.stage("groupby", "manual", [1, 2, 3]) as stage:
+        stage.rows_out = 2
+
+    text = metrics.to_prometheus()
+    assert "# TYPE operations_stage_calls_total counter" in text
+    assert 'operations_stage_rows_in_total{stage="groupby",function="manual"} 3' in text
+    assert 'operations_stage_rows_out_total{stage="groupby",function="manual"} 2' in text
+
+
+def test_profile_single_run(tmp_path, operations):
+    """ Проверка профилирования одного запуска """
+    with metrics.profile(tmp_path / "run.pstats") as report:
+        slice_by_date(operations, "2025-05-01", "2025-05-02 23:59:59")
+
+    assert "slice_by_date" in report["cpu"]
+    assert "memory" in report
+    assert (tmp_path / "run.pstats").exists()
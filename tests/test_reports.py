@@ -1,10 +1,12 @@
+import json
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
 import pandas as pd
 import pytest
 
-from src.reports import expenses_by_category
+from config import BASE_DIR
+from src.reports import BATCH_REPORT_FILE, expenses_by_category, expenses_by_category_batch
 
 
 def test_expenses_by_category_success():
@@ -65,3 +67,41 @@ def test_expenses_by_category_empty_file():
         assert result.loc[0, 'total_expenses'] == 0
         assert result.loc[0, 'date_from'] == (datetime.now() - timedelta(days=90)).strftime("%d.%m.%Y")
         assert result.loc[0, 'date_to'].split(' ')[0] == datetime.now().strftime("%d.%m.%Y").split(' ')[0]
+
+
+def test_expenses_by_category_chunks():
+    """ Проверка подсчета расходов по потоку частей датафрейма """
+    mock_df = pd.DataFrame({
+        'Категория': ['Еда', 'Еда', 'Транспорт', 'Еда'],
+        'Дата операции': ['01.03.2025 12:00:00', '01.04.2025 12:00:00', '01.05.2025 12:00:00', '01.06.2025 12:00:00'],
+        'Сумма операции': [100, 200, 150, 250]
+    })
+    chunks = (mock_df.iloc[i:i + 2] for i in range(0, len(mock_df), 2))
+
+    result = expenses_by_category(chunks, 'Еда', '2025-05-15 00:00:00')
+
+    assert result['total_expenses'][0] == 300.00
+    assert result['date_from'][0] == '14.02.2025'
+
+
+def test_expenses_by_category_batch():
+    """ Проверка пакетного отчета: результат совпадает с отдельными вызовами, отчет пишется одним файлом """
+    mock_df = pd.DataFrame({
+        'Категория': ['Еда', 'Еда', 'Транспорт', 'Еда', 'Транспорт'],
+        'Дата операции': pd.to_datetime(['01.03.2025 12:00:00', '01.04.2025 12:00:00', '01.05.2025 12:00:00',
+                                         '01.06.2025 12:00:00', '02.06.2025 12:00:00'], dayfirst=True),
+        'Сумма операции': [100.1, 200.2, 150, 250, 50]
+    })
+    requests = [('Еда', '2025-05-15 00:00:00', 90), ('Транспорт', '2025-06-02 12:00:00', 30),
+                ('Еда', '2025-06-01 11:00:00', 10), ('Связь', '2025-06-01 11:00:00', 90)]
+
+    result = expenses_by_category_batch(mock_df, requests)
+
+    for (category, date, window), total in zip(requests, result['total_expenses']):
+        if window == 90:
+            assert expenses_by_category(mock_df, category, date)['total_expenses'][0] == total
+    assert result['total_expenses'].tolist() == [300.3, 50.0, 0.0, 0.0]
+    assert result['operations'].tolist() == [2, 1, 0, 0]
+    assert result['date_from'].tolist() == ['14.02.2025', '03.05.2025', '22.05.2025', '03.03.2025']
+    with open(BASE_DIR / "logs" / BATCH_REPORT_FILE, encoding="UTF-8") as f:
+        assert json.load(f)['category'] == {'0': 'Еда', '1': 'Транспорт', '2': 'Еда', '3': 'Связь'}
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from src.reports import expenses_by_category
+from src.rollup import CategoryRollup
+
+
+def _operations_df():
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['01.05.2025 10:00:00', '01.05.2025 18:00:00', '02.05.2025 11:00:00',
+                                         '05.05.2025 12:00:00', '07.05.2025 09:00:00', '07.05.2025 13:00:00'],
+                                        dayfirst=True),
+        'Категория': ['Еда', 'Еда', 'Связь', 'Еда', 'Еда', None],
+        'Номер карты': ['*1111', '*2222', '*1111', '*1111', None, '*1111'],
+        'Сумма операции': [-100.10, -200.20, -50.0, -300.30, -400.40, -1.0],
+    })
+
+
+def test_rollup_total():
+    """ Проверка сумм и количеств по категории за интервал дней """
+    rollup = CategoryRollup.from_frame(_operations_df())
+
+    assert rollup.total('Еда', '2025-05-01', '2025-05-07') == (-1001.0, 4)
+    assert rollup.total('Еда', '2025-05-02', '2025-05-05') == (-300.3, 1)
+    assert rollup.total('Еда', '2025-06-01', '2025-06-30') == (0.0, 0)
+    assert rollup.total('Транспорт', '2025-05-01', '2025-05-07') == (0.0, 0)
+
+
+def test_rollup_append_matches_full_build():
+    """ Проверка инкрементального добавления операций, в том числе более ранних дат """
+    df = _operations_df()
+    rollup = CategoryRollup.from_frame(df.iloc[2:4])
+    rollup.append(df.iloc[4:])
+    rollup.append(df.iloc[:2])
+    full = CategoryRollup.from_frame(df)
+
+    assert rollup.days == full.days == 7
+    periods = [('2025-05-01', '2025-05-07'), ('2025-05-01', '2025-05-01'), ('2025-05-03', '2025-05-07')]
+    for date_from, date_to in periods:
+        assert rollup.total('Еда', date_from, date_to) == full.total('Еда', date_from, date_to)
+
+
+def test_rollup_by_card():
+    """ Проверка свертки с разбивкой по картам """
+    rollup = CategoryRollup.from_frame(_operations_df(), by_card=True)
+
+    assert rollup.total('Еда', '2025-05-01', '2025-05-07', card='*1111') == (-400.4, 2)
+    assert rollup.total('Еда', '2025-05-01', '2025-05-07') == (-1001.0, 4)
+
+
+def test_expenses_by_category_with_rollup():
+    """ Проверка, что отчет по свертке совпадает с отчетом по полному просмотру """
+    df = _operations_df()
+    rollup = CategoryRollup.from_frame(df)
+
+    for date in ['2025-05-07 10:00:00', '2025-05-01 12:00:00', '2025-08-01 09:30:00']:
+        expected = expenses_by_category(df, 'Еда', date)
+        result = expenses_by_category(df, 'Еда', date, rollup=rollup)
+        assert result.to_dict() == expected.to_dict()
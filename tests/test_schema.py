@@ -0,0 +1,55 @@
+import pandas as pd
+
+from src.schema import apply_schema, to_kopecks
+from src.utils import get_top_transactions, summ_by_category
+
+
+def _operations_df(rows=100):
+    return pd.DataFrame({
+        'Дата операции': pd.date_range('2025-05-01', periods=rows, freq='h'),
+        'Номер карты': ['*1111', '*2222'] * (rows // 2),
+        'Статус': ['OK', 'FAILED', 'OK', 'OK'] * (rows // 4),
+        'Сумма платежа': [-100.1, -20.02, 300.0, -0.01] * (rows // 4),
+        'Сумма операции': [-100.1, -20.02, 300.0, -0.01] * (rows // 4),
+        'Кэшбэк': [1.0, None, 3.0, None] * (rows // 4),
+        'Категория': ['Еда', 'Связь', 'Переводы', 'Еда'] * (rows // 4),
+        'MCC': [5411.0, None, 4829.0, 5411.0] * (rows // 4),
+        'Описание': ['Лента', 'билайн', 'Иван П.', 'Лента'] * (rows // 4),
+    })
+
+
+def test_apply_schema_types_and_memory():
+    """ Проверка типов колонок и уменьшения памяти """
+    result = apply_schema(_operations_df())
+
+    assert isinstance(result['Категория'].dtype, pd.CategoricalDtype)
+    assert isinstance(result['Номер карты'].dtype, pd.CategoricalDtype)
+    assert str(result['MCC'].dtype) == 'Int16'
+    assert result['MCC'].isna().sum() == 25
+    assert result['Сумма платежа'].dtype == 'float64'
+    assert result.attrs['memory_after'] < result.attrs['memory_before']
+
+
+def test_apply_schema_rounds_fractional_kopecks(caplog):
+    """ Проверка, что суммы с долями копеек округляются до копейки с предупреждением, а не отклоняют файл """
+    df = _operations_df(4).assign(**{'Сумма платежа': [1.005, 2.0, 3.0, 1e9 + 0.5001]})
+
+    with caplog.at_level("WARNING", logger="schema"):
+        result = apply_schema(df)
+
+    assert result['Сумма платежа'].tolist() == [1.0, 2.0, 3.0, 1e9 + 0.5]
+    assert "не кратны копейке" in caplog.text
+
+
+def test_results_same_with_schema():
+    """ Проверка, что агрегаты по компактной схеме совпадают с исходными """
+    df = _operations_df()
+    compact = apply_schema(df)
+
+    assert summ_by_category(compact) == summ_by_category(df)
+    assert get_top_transactions(compact, group_by="category") == get_top_transactions(df, group_by="category")
+
+
+def test_to_kopecks():
+    """ Проверка точного перевода сумм в копейки """
+    assert to_kopecks(pd.Series([0.1, 0.2, None, -20.02])).tolist() == [10, 20, 0, -2002]
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.server import OperationsService
+from src.store import OperationsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "operations.csv"
+    pd.DataFrame({
+        'Дата операции': ['01.05.2025 10:00:00', '02.05.2025 11:00:00', '03.05.2025 12:00:00'],
+        'Номер карты': ['*1111', '*1111', '*2222'],
+        'Статус': ['OK', 'OK', 'OK'],
+        'Сумма операции': [-100.0, -200.0, -300.0],
+        'Сумма платежа': [-100.0, -200.0, -300.0],
+        'Кэшбэк': [1.0, 2.0, 3.0],
+        'Категория': ['Переводы', 'Еда', 'Переводы'],
+        'Описание': ['Иванов И.', 'Лента', 'Магазин'],
+    }).to_csv(path, index=False)
+    return OperationsStore(path, use_cache=False)
+
+
+def _get(port, target):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{target}", timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as ex:
+        return ex.code, json.loads(ex.read())
+
+
+def _with_service(store, scenario):
+    """ Запуск сервиса на свободном порту и выполнение сценария запросов в пуле потоков """
+    async def main():
+        service = OperationsService(store)
+        await service.start(port=0)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, scenario, service)
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+
+def test_routes(store):
+    """ Проверка маршрутов отчета, поиска и ошибок запроса """
+    def scenario(service):
+        return {target: _get(service.port, target) for target in (
+            "/report?category=%D0%9F%D0%B5%D1%80%D0%B5%D0%B2%D0%BE%D0%B4%D1%8B&date=2025-05-03%2023:00:00",
+            "/search", "/report", "/unknown")}
+
+    responses = _with_service(store, scenario)
+    statuses = [status for status, _ in responses.values()]
+    bodies = list(responses.values())
+
+    assert statuses == [200, 200, 400, 404]
+    assert bodies[0][1][0]["total_expenses"] == -400.0
+    assert bodies[1][1] == [{"Описание": "Иванов И.", "Сумма платежа": -100.0}]
+
+
+def test_dashboard_route(store):
+    """ Проверка главной страницы без обращения к внешним API """
+    with patch('src.views.get_currency', return_value=[]), patch('src.views.get_stocks', return_value=[]):
+        status, body = _with_service(store, lambda service: _get(service.port, "/dashboard?date=2025-05-03+13:00:00"))
+
+    assert status == 200
+    assert body["greeting"] == "Добрый день"
+    assert [card["last_digits"] for card in body["cards"]] == ["*1111", "*2222"]
+
+
+def test_identical_requests_coalesced(store):
+    """ Проверка, что одинаковые одновременные запросы выполняются одним расчетом """
+    calls = []
+    lock = threading.Lock()
+
+    def slow_report(params):
+        with lock:
+            calls.append(params)
+        time.sleep(0.2)
+        return {"category": params["category"][0]}
+
+    async def main():
+        service = OperationsService(store)
+        service.routes["/report"] = slow_report
+        results = await asyncio.gather(*[service.call("/report", {"category": ["Еда"]}) for _ in range(5)],
+                                       service.call("/report", {"category": ["Связь"]}))
+        await service.stop()
+        return service, results
+
+    service, results = asyncio.run(main())
+
+    assert len(calls) == 2
+    assert (service.computed, service.coalesced) == (2, 4)
+    assert results[:5] == [{"category": "Еда"}] * 5
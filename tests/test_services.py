@@ -4,8 +4,8 @@ from unittest.mock import patch
 import pandas as pd
 import pytest
 
-from config import W_JSON_SERVICES, PATH_DATA
-from src.services import get_name_filter
+from config import W_JSON_SERVICES
+from src.services import find_transfers, get_name_filter
 
 
 def test_get_name_filter():
@@ -17,35 +17,30 @@ def test_get_name_filter():
         'Сумма платежа': [1000, 2000, 1500, 3000]
     })
 
-    # Патч для имитации чтения Excel
-    with patch('pandas.read_excel', return_value=mock_df):
-        # Вызываем функцию
-        result = get_name_filter(PATH_DATA)
+    # Вызываем функцию
+    result = get_name_filter(mock_df)
 
-        # Исправляем проверку, сравнивая JSON как объекты, а не строки
-        result_obj = json.loads(result)
-        expected_obj = [
-            {"Описание": "Иванов И.", "Сумма платежа": 1000},
-            {"Описание": "Петров П.", "Сумма платежа": 2000},
-            {"Описание": "Сидоров С.", "Сумма платежа": 3000}
-        ]
+    expected_obj = [
+        {"Описание": "Иванов И.", "Сумма платежа": 1000},
+        {"Описание": "Петров П.", "Сумма платежа": 2000},
+        {"Описание": "Сидоров С.", "Сумма платежа": 3000}
+    ]
 
-        # Проверяем результат
-        assert result_obj == expected_obj
+    # Проверяем результат
+    assert result == expected_obj
 
-        # Проверяем создание файла
-        with open(W_JSON_SERVICES, 'r', encoding='utf-8') as file:
-            file_content = file.read()
-            file_obj = json.loads(file_content)
-            assert file_obj == expected_obj
+    # Проверяем создание файла
+    with open(W_JSON_SERVICES, 'r', encoding='utf-8') as file:
+        file_content = file.read()
+        file_obj = json.loads(file_content)
+        assert file_obj == expected_obj
 
 
 def test_get_name_filter_missing_columns():
     """ Проверка обработки DataFrame без необходимых колонок """
     mock_df = pd.DataFrame({'Неправильная_категория': ['Переводы'], 'Неправильное_описание': ['Иванов И.']})
-    with patch('pandas.read_excel', return_value=mock_df):
-        with pytest.raises(KeyError):
-            get_name_filter(PATH_DATA)
+    with pytest.raises(KeyError):
+        get_name_filter(mock_df)
 
 
 def test_get_name_filter_file_write_error():
@@ -56,7 +51,42 @@ def test_get_name_filter_file_write_error():
         'Сумма платежа': [1000]
     })
 
-    with patch('pandas.read_excel', return_value=mock_df):
-        with patch('builtins.open', side_effect=IOError):
-            with pytest.raises(IOError):
-                get_name_filter(PATH_DATA)
+    with patch('builtins.open', side_effect=IOError):
+        with pytest.raises(IOError):
+            get_name_filter(mock_df)
+
+
+def test_get_name_filter_extra_patterns():
+    """ Проверка дополнительных шаблонов имен и отбора по категории типа category """
+    mock_df = pd.DataFrame({
+        'Категория': pd.Categorical(['Переводы', 'Переводы', 'Переводы', 'Переводы', 'Оплата']),
+        'Описание': ['Иванов И.', 'Ivan P.', 'Петр Сергеевич', 'Перевод между счетами', 'Сидоров С.'],
+        'Сумма платежа': [1000, 2000, 3000, 4000, 5000]
+    })
+
+    default = get_name_filter(mock_df)
+    extended = get_name_filter(mock_df, patterns=['initial', 'latin', 'patronymic'])
+
+    assert [item['Описание'] for item in default] == ['Иванов И.']
+    assert [item['Описание'] for item in extended] == ['Иванов И.', 'Ivan P.', 'Петр Сергеевич']
+
+
+def test_get_name_filter_count_only():
+    """ Проверка записи потоком без списка в памяти: возвращается количество записей """
+    mock_df = pd.DataFrame({
+        'Категория': ['Переводы', 'Переводы', 'Оплата'],
+        'Описание': ['Иванов И.', 'Петров П.', 'Оплата товара'],
+        'Сумма платежа': [1000, 2000, 1500]
+    })
+
+    assert get_name_filter(mock_df, records=False) == 2
+    with open(W_JSON_SERVICES, 'r', encoding='utf-8') as file:
+        assert [item['Описание'] for item in json.load(file)] == ['Иванов И.', 'Петров П.']
+
+
+def test_find_transfers_empty_descriptions():
+    """ Проверка переводов, у которых нет ни одного описания """
+    df = pd.DataFrame({'Категория': ['Переводы', 'Переводы', 'Еда'], 'Описание': [None, None, 'Лента'],
+                       'Сумма платежа': [-100.0, -200.0, -50.0]})
+
+    assert find_transfers(df).empty
@@ -0,0 +1,131 @@
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.store import OperationsStore, cache_path, get_store, iter_operations, read_cache
+
+
+def test_store_reads_file_once(tmp_path):
+    """ Проверка, что файл читается один раз при неизменном файле """
+    path = tmp_path / "operations.xlsx"
+    path.write_bytes(b"data")
+    mock_df = pd.DataFrame({'Дата операции': pd.to_datetime(['01.05.2025 12:00:00'], dayfirst=True)})
+
+    with patch('src.store.read_excel', return_value=mock_df) as mock_read_excel:
+        store = OperationsStore(path)
+        first = store.get()
+        second = store.get()
+
+    assert first is second
+    assert store.version == 1
+    mock_read_excel.assert_called_once_with(path)
+
+
+def test_store_reloads_changed_file(tmp_path):
+    """ Проверка перезагрузки при изменении размера или времени изменения файла """
+    path = tmp_path / "operations.xlsx"
+    path.write_bytes(b"data")
+    mock_df = pd.DataFrame({'Сумма платежа': [1.0]})
+
+    with patch('src.store.read_excel', return_value=mock_df) as mock_read_excel:
+        store = OperationsStore(path)
+        store.get()
+        path.write_bytes(b"new data")
+        os.utime(path, ns=(1, 1))
+        store.get()
+
+    assert mock_read_excel.call_count == 2
+    assert store.version == 2
+
+
+def test_get_store_shared(tmp_path):
+    """ Проверка, что хранилище общее для одного пути """
+    path = tmp_path / "operations.xlsx"
+    assert get_store(path) is get_store(str(path))
+
+
+def test_store_uses_cache(tmp_path):
+    """ Проверка загрузки из колоночного кэша без повторного чтения Excel """
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "operations.xlsx"
+    path.write_bytes(b"data")
+    mock_df = pd.DataFrame({'Категория': ['Еда', 'Связь'], 'Сумма платежа': [-100.0, -200.0]})
+
+    with patch('src.store.read_excel', return_value=mock_df) as mock_read_excel:
+        OperationsStore(path).get()
+        cached = OperationsStore(path).get()
+
+    mock_read_excel.assert_called_once()
+    assert cache_path(path).exists()
+    assert cached['Сумма платежа'].tolist() == [-100.0, -200.0]
+
+
+def test_store_cache_keeps_memory_saving(tmp_path):
+    """ Проверка, что загрузка из кэша сообщает память до приведения к схеме, а не уже компактную """
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "operations.xlsx"
+    path.write_bytes(b"data")
+    mock_df = pd.DataFrame({'Категория': ['Еда', 'Связь'] * 50, 'Сумма платежа': [-100.0, -200.0] * 50})
+
+    with patch('src.store.read_excel', return_value=mock_df):
+        first = OperationsStore(path)
+        first.get()
+        warm = OperationsStore(path)
+        warm.get()
+
+    assert warm.memory["before"] == first.memory["before"]
+    assert warm.memory["after"] < warm.memory["before"]
+
+
+def test_store_cache_invalidated(tmp_path):
+    """ Проверка, что кэш пересобирается при изменении файла и по флагу rebuild """
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "operations.xlsx"
+    path.write_bytes(b"data")
+    mock_df = pd.DataFrame({'Сумма платежа': [1.0]})
+
+    with patch('src.store.read_excel', return_value=mock_df) as mock_read_excel:
+        OperationsStore(path).get()
+        path.write_bytes(b"new data")
+        OperationsStore(path).get()
+        OperationsStore(path).get(rebuild=True)
+
+    assert mock_read_excel.call_count == 3
+    assert read_cache(path, (0, 0)) is None
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".xlsx"])
+def test_iter_operations_chunks(tmp_path, suffix):
+    """ Проверка потокового чтения выгрузки частями с приведением дат """
+    df = pd.DataFrame({
+        'Дата операции': ['01.05.2025 12:00:00', '02.05.2025 12:00:00', '03.05.2025 12:00:00'],
+        'Сумма платежа': [-100.0, -200.0, -300.0],
+    })
+    path = tmp_path / f"operations{suffix}"
+    if suffix == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+
+    chunks = list(iter_operations(path, chunksize=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert all(pd.api.types.is_datetime64_any_dtype(chunk['Дата операции']) for chunk in chunks)
+    assert chunks[1]['Дата операции'].iloc[0] == pd.Timestamp(2025, 5, 3, 12)
+
+
+def test_store_sorted_between(tmp_path):
+    """ Проверка, что хранилище сортирует операции по дате и отдает срез интервала """
+    path = tmp_path / "operations.xlsx"
+    path.write_bytes(b"data")
+    mock_df = pd.DataFrame({
+        'Дата операции': pd.to_datetime(['03.05.2025', '01.05.2025', '02.05.2025'], dayfirst=True),
+        'Сумма платежа': [-3.0, -1.0, -2.0],
+    })
+
+    with patch('src.store.read_excel', return_value=mock_df):
+        store = OperationsStore(path, use_cache=False)
+        assert store.get()['Сумма платежа'].tolist() == [-1.0, -2.0, -3.0]
+        assert store.between('2025-05-02', '2025-05-03')['Сумма платежа'].tolist() == [-2.0, -3.0]
@@ -1,10 +1,13 @@
 import json
+from datetime import datetime
 from unittest.mock import Mock, mock_open, patch
 
 import pandas as pd
 import pytest
 
-from src.utils import data_time, get_currency, get_stocks, read_excel
+from src.market import MarketDataClient
+from src.utils import (data_time, get_currency, get_operations_with_range, get_stocks, get_top_transactions,
+                       read_excel, slice_by_date, sort_by_date, summ_by_category)
 
 
 # Тесты для функции get_greeting
@@ -29,18 +32,27 @@ def test_get_greeting(test_inp: str, expected: str) -> None:
     assert data_time(test_inp) == expected
 
 
-@patch("requests.get")
-def test_successful_response_with_valid_currencies(mock_get) -> None:
+def _market_client(**response) -> MarketDataClient:
+    """ Клиент рыночных данных с подмененной HTTP-сессией """
+    session = Mock()
+    session.get.return_value = Mock(**response)
+    return MarketDataClient(session=session)
+
+
+def test_successful_response_with_valid_currencies() -> None:
     mock_response = Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = {
         "Valute": {"USD": {"Value": 78.5025}, "EUR": {"Value": 89.3108}}
     }
-    mock_get.return_value = mock_response
+    client = MarketDataClient(session=Mock(get=Mock(return_value=mock_response)))
 
     currencies = ["USD", "EUR"]
-    result = get_currency(currencies)
+    with patch('builtins.open', mock_open(read_data=json.dumps({"user_currencies": currencies}))):
+        with patch('src.utils.get_market_client', return_value=client):
+            result = get_currency(currencies)
 
+    client.session.get.assert_called_once()
     assert len(result) == 2
     assert {"currency": "USD", "rate": 78.5025} == result[0]
     assert {"currency": "EUR", "rate": 89.3108} == result[1]
@@ -88,11 +100,8 @@ def test_get_stocks_success():
     }
 
     with patch('builtins.open', mock_open(read_data=json.dumps(mock_json))):
-        with patch('requests.request') as mock_requests:
-            mock_requests.return_value = Mock(
-                status_code=200,
-                json=lambda: mock_response
-            )
+        with patch('src.utils.get_market_client',
+                   return_value=_market_client(status_code=200, json=lambda: mock_response)):
             result = get_stocks(["AAPL", "GOOGL"])
 
             assert result == [
@@ -122,11 +131,7 @@ def test_get_stocks_api_error():
     }
 
     with patch('builtins.open', mock_open(read_data=json.dumps(mock_json))):
-        with patch('requests.request') as mock_requests:
-            mock_requests.return_value = Mock(
-                status_code=500
-            )
-
+        with patch('src.utils.get_market_client', return_value=_market_client(status_code=500)):
             result = get_stocks(["AAPL"])
             assert result == "Не успешный запрос, код ошибки: 500"
 
@@ -138,11 +143,7 @@ def test_get_stocks_invalid_api_key():
     }
 
     with patch('builtins.open', mock_open(read_data=json.dumps(mock_json))):
-        with patch('requests.request') as mock_requests:
-            mock_requests.return_value = Mock(
-                status_code=401
-            )
-
+        with patch('src.utils.get_market_client', return_value=_market_client(status_code=401)):
             result = get_stocks(["AAPL"])
             assert result == "Не успешный запрос, код ошибки: 401"
 
@@ -154,11 +155,99 @@ def test_get_stocks_missing_api_key():
     }
 
     with patch('builtins.open', mock_open(read_data=json.dumps(mock_json))):
-        with patch('requests.request') as mock_requests:
-            mock_requests.return_value = Mock(
-                status_code=200,
-                json=lambda: {}
-            )
-
+        with patch('src.utils.get_market_client', return_value=_market_client(status_code=200, json=lambda: {})):
             result = get_stocks(["AAPL"])
             assert result == []
+
+
+def _operations_df():
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['01.05.2025 10:00:00', '02.05.2025 11:00:00', '03.05.2025 12:00:00',
+                                         '04.05.2025 13:00:00'], dayfirst=True),
+        'Номер карты': ['*1111', '*2222', '*1111', '*2222'],
+        'Статус': ['OK', 'OK', 'OK', 'FAILED'],
+        'Сумма платежа': [-100.0, -250.5, -300.0, -50.0],
+        'Сумма операции': [-100.0, -250.5, -300.0, -50.0],
+        'Кэшбэк': [1.0, None, 3.0, None],
+        'Категория': ['Еда', 'Связь', 'Еда', 'Еда'],
+        'Описание': ['Лента', 'билайн', 'Пятерочка', 'Лента'],
+    })
+
+
+def test_summ_by_category_chunks():
+    """ Проверка, что потоковая агрегация по картам совпадает с обработкой всего датафрейма """
+    df = _operations_df()
+    chunks = (df.iloc[i:i + 1] for i in range(len(df)))
+
+    expected = [
+        {"last_digits": "*1111", "total_spent": -400.0, "cashback": 4.0},
+        {"last_digits": "*2222", "total_spent": -250.5, "cashback": 0.0},
+    ]
+    assert summ_by_category(df) == expected
+    assert summ_by_category(chunks) == expected
+
+
+def test_get_top_transactions_chunks():
+    """ Проверка, что топ по частям совпадает с топом по всему датафрейму """
+    df = _operations_df()
+    chunks = (df.iloc[i:i + 2] for i in range(0, len(df), 2))
+
+    assert get_top_transactions(chunks, n=2) == get_top_transactions(df, n=2)
+    assert [item["description"] for item in get_top_transactions(df, n=2)] == ["Лента", "Лента"]
+
+
+def test_slice_by_date_sorted_and_unsorted():
+    """ Проверка среза по датам бинарным поиском и маской для неотсортированных данных """
+    df = _operations_df().iloc[::-1]
+    sorted_df = sort_by_date(df)
+
+    expected = ['Связь', 'Еда']
+    unsorted_result = slice_by_date(df, datetime(2025, 5, 2), datetime(2025, 5, 3, 12))
+    sorted_result = slice_by_date(sorted_df, datetime(2025, 5, 2), datetime(2025, 5, 3, 12))
+
+    assert sorted(unsorted_result['Категория'].tolist()) == sorted(expected)
+    assert sorted_result['Категория'].tolist() == expected
+
+
+def test_slice_by_date_resorted_copy():
+    """ Проверка среза отсортированного датафрейма, пересортированного по другой колонке """
+    df = sort_by_date(_operations_df()).sort_values("Сумма платежа")
+
+    result = slice_by_date(df, datetime(2025, 5, 2), datetime(2025, 5, 3, 12))
+
+    assert sorted(result['Категория'].tolist()) == ['Еда', 'Связь']
+    assert len(get_operations_with_range(df, "2025-05-03 12:00:00")) == 3
+
+
+def test_get_operations_with_range_month_to_date():
+    """ Проверка выборки операций с начала месяца по дату, строкой и datetime """
+    df = sort_by_date(pd.concat([_operations_df(), _operations_df().assign(**{
+        'Дата операции': pd.to_datetime(['30.04.2025 10:00:00'] * 4, dayfirst=True)})]))
+
+    assert len(get_operations_with_range(df, "2025-05-03 12:00:00")) == 3
+    assert len(get_operations_with_range(df, datetime(2025, 5, 2, 23, 59))) == 2
+    assert get_operations_with_range(df, "не дата") == "Неверный формат даты"
+
+
+def test_get_top_transactions_key_and_n():
+    """ Проверка выбора ключа сортировки и количества записей """
+    df = _operations_df()
+
+    result = get_top_transactions(df, n=1, key="cashback")
+
+    assert result == [{"date": "03.05.2025", "amount": -300.0, "category": "Еда", "description": "Пятерочка"}]
+    assert len(get_top_transactions(df, n=3, key="amount")) == 3
+
+
+def test_get_top_transactions_group_by():
+    """ Проверка топа по группам для датафрейма и для потока частей """
+    df = _operations_df()
+    chunks = (df.iloc[i:i + 1] for i in range(len(df)))
+
+    result = get_top_transactions(df, n=1, group_by="category")
+
+    assert result == {
+        "Еда": [{"date": "04.05.2025", "amount": -50.0, "category": "Еда", "description": "Лента"}],
+        "Связь": [{"date": "02.05.2025", "amount": -250.5, "category": "Связь", "description": "билайн"}],
+    }
+    assert get_top_transactions(chunks, n=1, group_by="category") == result
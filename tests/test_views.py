@@ -0,0 +1,158 @@
+import json
+import time
+from unittest.mock import patch
+
+import pandas as pd
+
+from config import W_JSON_VIEWS
+from src.database import OperationsDatabase
+from src.views import assemble_sections, clear_memo, dictionary, last_timings
+
+
+def test_assemble_sections_parallel():
+    """ Проверка, что секции выполняются параллельно и время каждой записывается """
+    def slow():
+        time.sleep(0.2)
+        return [1]
+
+    start = time.perf_counter()
+    result, timings = assemble_sections({'a': slow, 'b': slow, 'c': slow})
+    elapsed = time.perf_counter() - start
+
+    assert result == {'a': [1], 'b': [1], 'c': [1]}
+    assert elapsed < 0.5
+    assert all(timings[name] >= 0.2 for name in 'abc')
+    assert timings['total'] < 0.5
+
+
+def test_assemble_sections_timeout_and_error():
+    """ Проверка заглушек для медленной и упавшей секции """
+    def failing():
+        raise ValueError("ошибка")
+
+    start = time.perf_counter()
+    result, timings = assemble_sections(
+        {'greeting': lambda: time.sleep(1) or "Добрый день", 'slow': lambda: time.sleep(1), 'failing': failing,
+         'fast': lambda: "ok"},
+        timeouts={'greeting': 0.1, 'slow': 0.1},
+    )
+
+    assert time.perf_counter() - start < 0.5
+    assert result == {'greeting': "Здравствуйте", 'slow': [], 'failing': [], 'fast': "ok"}
+    assert timings['slow'] is None and timings['failing'] is None
+
+
+class _Store:
+    """ Хранилище операций для тестов """
+    path = "operations.xlsx"
+
+    def __init__(self, df):
+        self.df = df
+        self.version = 1
+
+    def get(self):
+        return self.df
+
+
+def _operations_df():
+    return pd.DataFrame({
+        'Дата операции': pd.to_datetime(['30.04.2025 12:00:00', '10.05.2025 12:00:00', '20.05.2025 12:00:00',
+                                         '20.05.2025 18:00:00'], dayfirst=True),
+        'Номер карты': ['*1111', '*1111', '*1111', '*2222'],
+        'Статус': ['OK', 'OK', 'OK', 'OK'],
+        'Сумма платежа': [-1000.0, -100.0, -200.0, -50.0],
+        'Сумма операции': [-1000.0, -100.0, -200.0, -50.0],
+        'Кэшбэк': [10.0, 1.0, 2.0, 0.0],
+        'Категория': ['Еда', 'Еда', 'Еда', 'Связь'],
+        'Описание': ['Ашан', 'Лента', 'Пятерочка', 'билайн'],
+    })
+
+
+SETTINGS = {"user_currencies": ["USD"], "user_stocks": ["AAPL"]}
+RATES = [{"currency": "USD", "rate": 78.5}]
+STOCKS = [{"stock": "AAPL", "price": 150.0}]
+
+
+def test_dictionary_sections():
+    """ Проверка состава ответа главной страницы по переданной дате и записи в файл """
+    clear_memo()
+    with patch('src.views.get_currency', return_value=RATES), patch('src.views.get_stocks', return_value=STOCKS):
+        result = dictionary("2025-05-20 14:00:00", SETTINGS, store=_Store(_operations_df()))
+
+    assert result['greeting'] == "Добрый день"
+    assert result['cards'] == [{"last_digits": "*1111", "total_spent": -300.0, "cashback": 3.0},
+                               {"last_digits": "*2222", "total_spent": -50.0, "cashback": 0.0}]
+    assert [item['description'] for item in result['top_transactions']] == ['билайн', 'Лента', 'Пятерочка']
+    assert result['stock_prices'] == RATES
+    assert result['currency_rates'] == STOCKS
+    assert set(last_timings) == {'cards', 'top_transactions', 'stock_prices', 'currency_rates', 'total'}
+    with open(W_JSON_VIEWS, encoding='utf-8') as file:
+        assert json.load(file) == result
+
+
+def test_dictionary_month_to_date():
+    """ Проверка, что карты считаются с начала месяца до конца переданного дня """
+    clear_memo()
+    with patch('src.views.get_currency', return_value=RATES), patch('src.views.get_stocks', return_value=STOCKS):
+        result = dictionary("2025-05-10 08:00:00", SETTINGS, store=_Store(_operations_df()))
+
+    assert result['greeting'] == "Доброе утро"
+    assert result['cards'] == [{"last_digits": "*1111", "total_spent": -100.0, "cashback": 1.0}]
+
+
+def test_dictionary_memoized():
+    """ Проверка кэша ответов: тот же день, настройки и версия данных не пересчитываются """
+    clear_memo()
+    store = _Store(_operations_df())
+    with patch('src.views.get_currency', return_value=RATES), \
+            patch('src.views.get_stocks', return_value=STOCKS) as mock_stocks:
+        first = dictionary("2025-05-20 14:00:00", SETTINGS, store=store)
+        second = dictionary("2025-05-20 15:30:00", SETTINGS, store=store)
+        dictionary("2025-05-20 15:30:00", {**SETTINGS, "user_stocks": ["MSFT"]}, store=store)
+        store.version = 2
+        dictionary("2025-05-20 15:30:00", SETTINGS, store=store)
+
+    assert first is second
+    assert mock_stocks.call_count == 3
+
+
+def test_dictionary_card_periods():
+    """ Проверка сводки по картам за несколько периодов из настроек """
+    clear_memo()
+    settings = {**SETTINGS, "card_periods": ["mtd", "rolling_30"]}
+    with patch('src.views.get_currency', return_value=RATES), patch('src.views.get_stocks', return_value=STOCKS):
+        result = dictionary("2025-05-20 14:00:00", settings, store=_Store(_operations_df()))
+
+    assert result['cards'][0] == {
+        "last_digits": "*1111", "total_spent": -300.0, "cashback": 3.0,
+        "periods": {"mtd": {"total_spent": -300.0, "cashback": 3.0},
+                    "rolling_30": {"total_spent": -1300.0, "cashback": 13.0}},
+    }
+
+
+def test_dictionary_degraded_not_memoized():
+    """ Проверка, что ответ с ошибкой API хранится в кэше недолго и следующий запрос получает полные данные """
+    clear_memo()
+    store = _Store(_operations_df())
+    with patch('src.views.DEGRADED_MEMO_TTL', 0.0), \
+            patch('src.views.get_currency', side_effect=["Не успешный запрос, код ошибки: 503", RATES]), \
+            patch('src.views.get_stocks', return_value=STOCKS):
+        first = dictionary("2025-05-20 14:00:00", SETTINGS, store=store)
+        second = dictionary("2025-05-20 15:30:00", SETTINGS, store=store)
+
+    assert first['stock_prices'] == "Не успешный запрос, код ошибки: 503"
+    assert second['stock_prices'] == RATES
+
+
+def test_dictionary_database_matches_store():
+    """ Проверка, что главная страница из базы SQLite совпадает с ответом из хранилища """
+    database = OperationsDatabase.from_frame(_operations_df())
+    with patch('src.views.get_currency', return_value=RATES), patch('src.views.get_stocks', return_value=STOCKS):
+        clear_memo()
+        expected = dictionary("2025-05-20 14:00:00", SETTINGS, store=_Store(_operations_df()))
+        clear_memo()
+        with patch('src.views.get_store') as mock_get_store:
+            result = dictionary("2025-05-20 14:00:00", SETTINGS, database=database)
+
+    mock_get_store.assert_not_called()
+    assert result == expected
@@ -0,0 +1,78 @@
+import json
+import os
+from contextlib import nullcontext
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.writers import FILE_MODE, JSON_LINES, frame_records, write_json, write_records
+
+RECORDS = [{"Описание": "Иванов И.", "Сумма платежа": -100.5}, {"Описание": "Петров П.", "Сумма платежа": None}]
+
+
+@pytest.mark.parametrize("fast", [True, False])
+@pytest.mark.parametrize("compact", [True, False])
+def test_write_records_array(tmp_path, fast, compact):
+    """ Проверка потоковой записи массива с orjson и без него, с отступами и компактно """
+    path = tmp_path / "records.json"
+    with nullcontext() if fast else patch('src.writers.orjson', None):
+        count = write_records(iter(RECORDS), path, compact=compact)
+
+    text = path.read_text(encoding="utf-8")
+    assert count == 2
+    assert json.loads(text) == RECORDS
+    assert ("\n" in text) is not compact
+    assert "Иванов" in text
+
+
+def test_write_records_empty_and_lines(tmp_path):
+    """ Проверка пустого массива и формата JSON Lines """
+    write_records([], tmp_path / "empty.json")
+    write_records(RECORDS, tmp_path / "records.jsonl", fmt=JSON_LINES)
+
+    assert json.loads((tmp_path / "empty.json").read_text(encoding="utf-8")) == []
+    lines = (tmp_path / "records.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == RECORDS
+
+
+def test_write_is_atomic(tmp_path):
+    """ Проверка, что при ошибке записи прежний файл остается целым, а временный удаляется """
+    path = tmp_path / "w_json_services.json"
+    write_json({"old": True}, path)
+
+    def broken():
+        yield {"new": 1}
+        raise RuntimeError("обрыв")
+
+    with pytest.raises(RuntimeError):
+        write_records(broken(), path)
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {"old": True}
+    assert [file.name for file in tmp_path.iterdir()] == ["w_json_services.json"]
+
+
+def test_write_keeps_file_mode(tmp_path):
+    """ Проверка прав: новый файл создается по маске процесса, замененный сохраняет прежние права """
+    umask = os.umask(0o027)
+    try:
+        created = tmp_path / "created.json"
+        write_json({}, created)
+    finally:
+        os.umask(umask)
+    assert created.stat().st_mode & 0o777 == FILE_MODE & ~0o027
+
+    shared = tmp_path / "shared.json"
+    write_json({}, shared)
+    shared.chmod(0o640)
+    write_json({"new": True}, shared)
+    assert shared.stat().st_mode & 0o777 == 0o640
+
+
+def test_frame_records_chunks():
+    """ Проверка записей датафрейма частями с пропусками и numpy-значениями """
+    df = pd.DataFrame({"a": [1.5, np.nan, 3.0], "b": ["x", None, "z"]})
+
+    assert list(frame_records(df, chunksize=2)) == [{"a": 1.5, "b": "x"}, {"a": None, "b": None},
+                                                    {"a": 3.0, "b": "z"}]